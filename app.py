@@ -1,110 +1,79 @@
 import pandas as pd
 import streamlit as st
-import pickle
 import numpy as np
-from sklearn.preprocessing import LabelEncoder
 import os
-import altair as alt
+import contextlib
 
+from previnad import explicacao, inferencia, metricas, monitoramento, registro, tabela_risco
+from previnad.cache import CachePredicoes
+from previnad.dominios import MAPAS_FORMULARIO, VALORES_FORMULARIO
 
 
-# Importado o melhor modelo do arquivo pkl:
-modelo = pickle.load(open('data/modelo_final.pkl', 'rb'))
-params = modelo['resultados']
-
-# Criando função de classificação:
-def classificar(df):
-    "Função de predição/classificação"
-    previsoes = params.predict(df)
-    return previsoes, params.predict_proba(df)
-
+# Importado o melhor modelo (pkl do notebook ou artefato .npz exportado).
+# O registro guarda o modelo carregado pelo hash do arquivo, então os reruns do Streamlit não o leem de novo.
+# Para um pkl logístico com a cópia .npz ao lado (data/modelo_final.npz), o registro a lê sem importar o scikit-learn.
+CAMINHO_MODELO = os.environ.get('PREVINAD_MODELO', os.path.join('data', 'modelo_final.pkl'))
 
+# A carga começa numa thread assim que o app abre: o formulário é desenhado enquanto o modelo carrega.
+@st.cache_resource(show_spinner=False)
+def carga_modelo(caminho):
+    return registro.carregar_em_segundo_plano(caminho)
 
-# Configuração da página:
-
-st.set_page_config("PrevInad: previna a inadimplência", "💡")
+# Com PREVINAD_PERFIL=1, cada envio do formulário grava um cProfile e um snapshot do tracemalloc em data/perfis/
+PERFILAR = os.environ.get('PREVINAD_PERFIL') == '1'
 
-st.title("PrevInad")
+# Cache de predições compartilhado entre sessões; é esvaziado quando o hash do modelo muda.
+@st.cache_resource
+def obter_cache():
+    return CachePredicoes()
 
-st.markdown(f"""
-PrevInad é uma aplicação que prevê a probabilidade de um aluno se tornar inadimplente, 
-através do uso de modelos de Aprendizado de Máquina (Machine Learning).
+# Tabela de risco pré-calculada (python -m previnad.tabela_risco gerar), quando existe para esta versão do modelo.
+# O cache é indexado pela versão; o modelo (com _ no nome) não entra no hash do Streamlit.
+@st.cache_resource
+def _tabela_risco(_modelo, versao):
+    return tabela_risco.abrir_tabela(_modelo)
 
-O modelo usado neste APP foi selecionado por meio de uma validação cruzada, tendo um F1
-de {round(modelo['f1']*100)}%. E o Modelo com maior precisão foi o {modelo['metodo']}.
-""")
+# Uma tabela ausente não fica em cache: ela pode ser gerada com o app aberto.
+def obter_tabela_risco(modelo, versao):
+    tabela = _tabela_risco(modelo, versao)
+    if tabela is None:
+        _tabela_risco.clear(modelo, versao)
+    return tabela
 
-st.header('Preencha os dados do aluno:')
+# Criando função de classificação:
+def classificar(perfil):
+    "Função de predição/classificação: classe prevista e probabilidade de adimplência de um perfil do formulário"
+    colunas = {nome: [valor] for nome, valor in perfil.items()}
+    tabela = obter_tabela_risco(modelo, modelo['versao'])
+    if tabela is not None:
+        classe, prob, _ = tabela.pontuar(colunas)
+        # A tabela não passa pela inferência: o envio entra no monitoramento de deriva aqui
+        codificador = modelo['codificadores']['formulario']
+        monitoramento.registrar(modelo, codificador, *codificador.codificar_ativos(colunas), prob)
+    else:
+        classe, prob, _ = inferencia.pontuar_colunas(modelo, modelo['codificadores']['formulario'], colunas, cache=obter_cache())
+    return classe, prob
 
 
-# Definindo funções de transformação e tradução de valores
 
-def criar_mapa_formulario_modelo(valores_formulario, valores_modelo):
-    """
-    Cria um dicionário de mapeamento entre os valores do formulário e os valores do modelo.
+# Configuração da página:
 
-    Exemplo:
-    'Não' -> 0
-    'Sim' -> 1
-    """
-    mapa = {}
-    
-    # Verifica se o número de valores do formulário é igual ao número de valores no modelo
-    if len(valores_formulario) != len(valores_modelo):
-        raise ValueError("O número de valores do formulário deve ser igual ao número de valores no modelo.")
+st.set_page_config("PrevInad: previna a inadimplência", "💡")
 
-    # Cria o mapeamento entre os valores do formulário e do modelo
-    for val_form, val_modelo in zip(valores_formulario, valores_modelo):
-        mapa[val_form] = val_modelo
+carga = carga_modelo(CAMINHO_MODELO)
 
-    return mapa
+st.title("PrevInad")
 
-def processar_variavel(nome_variavel, valor_input, mapa, valores_modelo):
-    # Aplica o mapeamento do nome amigável para o nome usado no modelo
-    valor_mapeado = mapa.get(valor_input, valor_input)
+# Apresentação: preenchida quando o modelo termina de carregar
+apresentacao = st.empty()
 
-    # Cria dicionário de dummies no formato 'VARIAVEL_VALOR': [0 ou 1]
-    dummies = {
-        f'{nome_variavel}_{valor}': [1 if valor_mapeado == valor else 0]
-        for valor in valores_modelo
-    }
+st.header('Preencha os dados do aluno:')
 
-    return valor_mapeado, dummies
-def processar_multiplas_variaveis(variaveis_info):
-    """
-    Processa várias variáveis e gera o input_dict com as dummies.
-    
-    Args:
-        variaveis_info (list of dicts): Lista de dicionários com as informações necessárias para processar cada variável.
-        
-    Returns:
-        dict: Dicionário com todas as dummies mapeadas e valores convertidos.
-    """
-    input_dict = {}
-
-    for variavel in variaveis_info:
-        nome_variavel = variavel['nome_variavel']
-        valor_input = variavel['valor_input']
-        mapa = variavel['mapa']
-        valores_modelo = variavel['valores_modelo']
-        
-        # Processa a variável e cria as dummies
-        _, dummies = processar_variavel(
-            nome_variavel=nome_variavel,
-            valor_input=valor_input,
-            mapa=mapa,
-            valores_modelo=valores_modelo
-        )
-        
-        # Adiciona as dummies ao input_dict
-        input_dict.update(dummies)
-    
-    return input_dict
 
 # Formulário:
 
 with st.form('user_input_form'):
-    genero = st.selectbox('Gênero:', ['Feminino', 'Masculino', 'Indeterminado'])
+    genero = st.selectbox('Gênero:', list(MAPAS_FORMULARIO['GENERO']))
 
     pgto_anuidade_2022 = st.selectbox('Pagou a anuidade de 2022?', ['Sim','Não'])
 
@@ -112,395 +81,74 @@ with st.form('user_input_form'):
 
     num_disciplinas_original = st.slider('NUMERO DE DISCIPLINAS MATRICULADAS (0-6):', 0, 6, 0)
 
-    departamento = st.selectbox('DEPARTAMENTO:', ['LIMA', 'CALLAO', 'AMAZONAS', 'ICA', 'AREQUIPA', 'SAN MARTIN',
-                                                'JUNIN', 'LA LIBERTAD', 'HUANUCO', 'AYACUCHO', 'ANCASH', 'PASCO',
-                                                'CUSCO', 'LAMBAYEQUE', 'HUANCAVELICA', 'PIURA', 'CAJAMARCA',
-                                                'APURIMAC', 'PUNO', 'UCAYALI', 'MADRE DE DIOS', 'LORETO', 'TACNA',
-                                                'MOQUEGUA', 'TUMBES'])
+    departamento = st.selectbox('DEPARTAMENTO:', list(MAPAS_FORMULARIO['DEPARTAMENTO']))
 
    
     deficiencia = st.selectbox('DEFICIENCIA:', ['Não', 'Sim'])
 
     modalidade_ensino = st.selectbox('MODALIDADE DE ENSINO:', ['Presencial', 'Virtual', 'Remoto'])
 
-    turno = st.selectbox('TURNO/HORARIO:', ['Manhã', 'Tarde', 'Noite', 'Misto'])
-
-    matricula = st.selectbox('MATRICULA:', ['Novo', 'Reincorporado', 'Reinscrito'])
-
-    classificacao = st.selectbox('CLASSIFICACAO:', ['Graduação',
-                                                    'Graduação Semipresencial(50-50)',
-                                                    'Graduação Semipresencial (80-20)',
-                                                    'Curso para Trabalhadores',
-                                                    'Graduação Virtual'])
-
-    campus = st.selectbox('CAMPUS:', ['Lima Centro',
-                                        'Lima Norte',
-                                        'Lima SJL',
-                                        'Lima Este',
-                                        'Lima Sur',
-                                        'Arequipa',
-                                        'Chiclayo',
-                                        'Piura',
-                                        'Chimbote',
-                                        'Huancayo',
-                                        'Ica',
-                                        'Beca 18',
-                                        'Trujillo',
-                                        'Virtual'])
-
-    faculdade = st.selectbox('FACULDADE:', ['Engenharia Sistemas Eletrica',
-                                            'Direito Ciencias Politicas',
-                                            'Administracao Negocios',
-                                            'Ciencias Comunicacao',
-                                            'Engenharia Industrial Mecanica',
-                                            'Humanas Ciencias Sociais',
-                                            'Contabilidade',
-                                            'Saude'])
-
-    faixa_etaria = st.selectbox('FAIXA ETARIA:', ['Menor que 18', '19-20', '21-23', '24-29', 'Maior que 30'])
-
-    bolsas_desconto = st.selectbox('BOLSAS DE DESCONTO:', ['Sem Benefício',
-                                                            'Convenios',
-                                                            'Bolsa Socioeconômica Especial',
-                                                            'Bolsa Socioeconomica',
-                                                            'Bolsa Madre De Dios',
-                                                            'Bolsa Alto Potencial',
-                                                            'Bolsa Talento'])
+    turno = st.selectbox('TURNO/HORARIO:', list(MAPAS_FORMULARIO['TURNO']))
+
+    matricula = st.selectbox('MATRICULA:', list(MAPAS_FORMULARIO['MATRICULA']))
+
+    classificacao = st.selectbox('CLASSIFICACAO:', list(MAPAS_FORMULARIO['CLASSIFICACAO']))
+
+    campus = st.selectbox('CAMPUS:', list(MAPAS_FORMULARIO['CAMPUS']))
+
+    faculdade = st.selectbox('FACULDADE:', list(MAPAS_FORMULARIO['FACULDADE']))
+
+    faixa_etaria = st.selectbox('FAIXA ETARIA:', list(MAPAS_FORMULARIO['FAIXA_ETARIA']))
+
+    bolsas_desconto = st.selectbox('BOLSAS DE DESCONTO:', list(MAPAS_FORMULARIO['BOLSAS_DESCONTO']))
 
     # Every form must have a submit button
     submitted = st.form_submit_button("Enviar")
 
+# Daqui em diante o modelo é necessário (o formulário já está na tela)
+try:
+    modelo = carga.result()
+except Exception:
+    # Não guarda a falha: a próxima execução tenta carregar de novo
+    carga_modelo.clear()
+    raise
+
+apresentacao.markdown(f"""
+PrevInad é uma aplicação que prevê a probabilidade de um aluno se tornar inadimplente, 
+através do uso de modelos de Aprendizado de Máquina (Machine Learning).
+
+O modelo usado neste APP foi selecionado por meio de uma validação cruzada, tendo um F1
+de {round(modelo['f1']*100)}%. E o Modelo com maior precisão foi o {modelo['metodo']}.
+""")
+
 # Ao submeter
 if submitted:
-    # Variáveis que já vieram dummy desde o início e que não tiveram novas colunas feitas
-    # São essas: PGTO_ANUIDADE_2022 E DEFICIENCIA
-    ja_dummy_modelo = [0, 1]
-    ja_dummy_form = ['Não', 'Sim']
-    ja_dummy_map = criar_mapa_formulario_modelo(ja_dummy_form, ja_dummy_modelo)
-
-    genero_modelo = ['M', 'H', 'I']
-    genero_form = ['Feminino', 'Masculino', 'Indeterminado']
-    genero_map = criar_mapa_formulario_modelo(genero_form,genero_modelo)
-
-# TURNO
-    turno_modelo = ['Manha', 'Tarde', 'Noite', 'Misto']
-    turno_form = ['Manhã', 'Tarde', 'Noite', 'Misto']
-    turno_map = criar_mapa_formulario_modelo(turno_form,turno_modelo)
-
-# DEPARTAMENTO
-    departamentos_modelo = ['SAN_MARTIN',
-                                'LA_LIBERTAD',
-                                'MADRE_DE_DIOS',
-                                'LIMA',
-                                'CALLAO',
-                                'AMAZONAS',
-                                'ICA',
-                                'AREQUIPA',
-                                'JUNIN',
-                                'HUANUCO',
-                                'AYACUCHO',
-                                'ANCASH',
-                                'PASCO',
-                                'CUSCO',
-                                'LAMBAYEQUE',
-                                'HUANCAVELICA',
-                                'PIURA',
-                                'CAJAMARCA',
-                                'APURIMAC',
-                                'PUNO',
-                                'UCAYALI',
-                                'LORETO',
-                                'TACNA',
-                                'MOQUEGUA',
-                                'TUMBES']
-        
-    departamento_form = ['SAN MARTIN',
-                        'LA LIBERTAD',
-                        'MADRE DE DIOS',
-                        'LIMA',
-                        'CALLAO',
-                        'AMAZONAS',
-                        'ICA',
-                        'AREQUIPA',
-                        'JUNIN',
-                        'HUANUCO',
-                        'AYACUCHO',
-                        'ANCASH',
-                        'PASCO',
-                        'CUSCO',
-                        'LAMBAYEQUE',
-                        'HUANCAVELICA',
-                        'PIURA',
-                        'CAJAMARCA',
-                        'APURIMAC',
-                        'PUNO',
-                        'UCAYALI',
-                        'LORETO',
-                        'TACNA',
-                        'MOQUEGUA',
-                        'TUMBES']
-
-    departamento_map = criar_mapa_formulario_modelo(departamento_form, departamentos_modelo)
-
-    modalidade_ensino_modelo = ['Presencial', 'Virtual', 'Remoto']
-    modalidade_ensino_map = criar_mapa_formulario_modelo(modalidade_ensino_modelo, modalidade_ensino_modelo)
-
-    matricula_modelo = ['Novo', 'Reincorporado', 'Reinscrito']
-    matricula_map = criar_mapa_formulario_modelo(matricula_modelo, matricula_modelo)
-
-    # CLASSIFICACAO:
-    classificacao_modelo = [
-        'Graduacao',
-        'Graduacao_Semipresencial_50_50',
-        'Graduacao_Semipresencial_80_20',
-        'Curso_para_Trabalhadores',
-        'Graduacao_Virtual'
-    ]
-
-    classificacao_map = {
-        'Graduação':'Graduacao',
-        'Graduação Semipresencial(50-50)':'Graduacao_Semipresencial_50_50',
-        'Graduação Semipresencial (80-20)':'Graduacao_Semipresencial_80_20',
-        'Curso para Trabalhadores':'Curso_para_Trabalhadores',
-        'Graduação Virtual':'Graduacao_Virtual'
-        }
-
-    # CAMPUS
-    campus_modelo = [
-        'Lima_Centro',
-        'Lima_Norte',
-        'Lima_SJL',
-        'Lima_Este',
-        'Lima_Sur',
-        'Arequipa',
-        'Chiclayo',
-        'Piura',
-        'Chimbote',
-        'Huancayo',
-        'Ica',
-        'Beca_18',
-        'Trujillo',
-        'Virtual']
-
-    campus_map = {
-        'Lima Centro': 'Lima_Centro',
-        'Lima Norte': 'Lima_Norte',
-        'Lima SJL': 'Lima_SJL',
-        'Lima Este': 'Lima_Este',
-        'Lima Sur': 'Lima_Sur',
-        'Arequipa': 'Arequipa',
-        'Chiclayo': 'Chiclayo',
-        'Piura': 'Piura',
-        'Chimbote': 'Chimbote',
-        'Huancayo': 'Huancayo',
-        'Ica': 'Ica',
-        'Beca 18': 'Beca_18',
-        'Trujillo': 'Trujillo',
-        'Virtual': 'Virtual'
+    # MODALIDADE_ENSINO não entra no modelo: foi descartada no treino por ser redundante com CLASSIFICACAO
+    perfil = {
+        'PGTO_ANUIDADE_2022': pgto_anuidade_2022,
+        'DEFICIENCIA': deficiencia,
+        'NUMERO_DISCIPLINAS_MATRICULADAS': num_disciplinas_original,
+        'CURSO_EM_RISCO': curso_em_risco_original,
+        'MATRICULA': matricula,
+        'GENERO': genero,
+        'DEPARTAMENTO': departamento,
+        'CLASSIFICACAO': classificacao,
+        'CAMPUS': campus,
+        'FACULDADE': faculdade,
+        'TURNO': turno,
+        'BOLSAS_DESCONTO': bolsas_desconto,
+        'FAIXA_ETARIA': faixa_etaria
     }
+    # Guarda o perfil para a seção de cenários, que continua disponível nas próximas execuções
+    st.session_state['perfil_cenarios'] = perfil
 
-
-    # FACULDADE
-    faculdade_modelo = ['Engenharia_Sistemas_Eletrica',
-                        'Direito_Ciencias_Politicas',
-                        'Administracao_Negocios',
-                        'Ciencias_Comunicacao',
-                        'Engenharia_Industrial_Mecanica',
-                        'Humanas_Ciencias_Sociais',
-                        'Contabilidade',
-                        'Saude']
-
-    faculdade_form = ['Engenharia Sistemas Eletrica',
-                    'Direito Ciencias Politicas',
-                    'Administracao Negocios',
-                    'Ciencias Comunicacao',
-                    'Engenharia Industrial Mecanica',
-                    'Humanas Ciencias Sociais',
-                    'Contabilidade',
-                    'Saude']
-
-    faculdade_map = criar_mapa_formulario_modelo(faculdade_modelo, faculdade_form)
-
-
-    # FAIXA_ETARIA
-    faixa_etaria_modelo = ['Menor_que_18', 'De_19_a_20', 'De_21_a_23', 'De_24_a_29', 'Maior_que_30']
-    faixa_etaria_form = ['Menor que 18', '19-20', '21-23', '24-29', 'Maior que 30']
-    faixa_etaria_map= criar_mapa_formulario_modelo(faixa_etaria_modelo, faixa_etaria_form)
-
-    # BOLSAS_DESCONTO
-    bolsas_desconto_modelo = ['Sem_Beneficio',
-                            'Convenios',
-                            'Bolsa_Socioecon_Especial',
-                            'Bolsa_Socioeconomica',
-                            'Bolsa_MadreDeDios',
-                            'Bolsa_Alto_Potencial',
-                            'Bolsa_Talento']
-
-    bolsas_desconto_form = ['Sem Benefício',
-                            'Convenios',
-                            'Bolsa Socioeconômica Especial',
-                            'Bolsa Socioeconomica',
-                            'Bolsa Madre De Dios',
-                            'Bolsa Alto Potencial',
-                            'Bolsa Talento']
-
-    bolsas_desconto_map = criar_mapa_formulario_modelo(bolsas_desconto_modelo, bolsas_desconto_form)
-    # Informações das variáveis
-    variaveis_dummy_info = [
-        {
-            'nome_variavel': 'GENERO',
-            'valor_input': genero,
-            'mapa': genero_map,
-            'valores_modelo': genero_modelo
-        },
-        {
-            'nome_variavel': 'DEPARTAMENTO',
-            'valor_input': departamento,
-            'mapa': departamento_map,
-            'valores_modelo': departamentos_modelo
-        },
-        {
-            'nome_variavel': 'MODALIDADE_ENSINO',
-            'valor_input': modalidade_ensino,
-            'mapa': modalidade_ensino_map,
-            'valores_modelo': modalidade_ensino_modelo
-        },
-        {
-            'nome_variavel': 'TURNO',
-            'valor_input': turno,
-            'mapa': turno_map,
-            'valores_modelo': turno_modelo
-        },
-        {
-            'nome_variavel': 'MATRICULA',
-            'valor_input': matricula,
-            'mapa': matricula_map,
-            'valores_modelo': matricula_modelo
-        },
-        {
-            'nome_variavel': 'CLASSIFICACAO',
-            'valor_input': classificacao,
-            'mapa': classificacao_map,
-            'valores_modelo': classificacao_modelo
-        },
-        {
-            'nome_variavel': 'CAMPUS',
-            'valor_input': campus,
-            'mapa': campus_map,
-            'valores_modelo': campus_modelo
-        },
-        {
-            'nome_variavel': 'FACULDADE',
-            'valor_input': faculdade,
-            'mapa': faculdade_map,
-            'valores_modelo': faculdade_modelo
-        },
-        {
-            'nome_variavel': 'FAIXA_ETARIA',
-            'valor_input': faixa_etaria,
-            'mapa': faixa_etaria_map,
-            'valores_modelo': faixa_etaria_modelo
-        },
-        {
-            'nome_variavel': 'BOLSAS_DESCONTO',
-            'valor_input': bolsas_desconto,
-            'mapa': bolsas_desconto_map,
-            'valores_modelo': bolsas_desconto_modelo
-        }
-        ]
-    input_dict = processar_multiplas_variaveis(variaveis_dummy_info)
-    # DEFICIENCIA
-    deficiencia = 1 if deficiencia == 'Sim' else 0
-
-    # ANUIDADE
-    pgto_anuidade_2022 = 1 if pgto_anuidade_2022 == 'Sim' else 0
-
-    input_dict.update({'PGTO_ANUIDADE_2022' : [pgto_anuidade_2022],
-                    'DEFICIENCIA': [deficiencia]})
-    # Normalização para o intervalo [0. , 0.4, 0.2, 0.6, 1. , 0.8]
-    # Vamos mapear os valores originais para os normalizados.
-    # Assumindo uma correspondência linear aproximada, mas a ordem dos normalizados não é estritamente crescente.
-    # Uma maneira mais robusta seria ter um dicionário de mapeamento se a relação não for linear.
-    mapeamento_curso_risco = {
-        0: 0.0,
-        1: 0.4,
-        2: 0.2,
-        3: 0.6,
-        4: 1.0,
-        5: 0.8
-    }
-    curso_em_risco = mapeamento_curso_risco[curso_em_risco_original]
-
-    # Adiciona depois:
-    input_dict.update({'CURSO_EM_RISCO': curso_em_risco})
-
-    # Normalização para o intervalo [0.        , 0.5       , 0.16666667, 0.33333333, 0.66666667, 0.83333333, 1.        ]
-    # Novamente, assumindo uma correspondência por índice, já que a relação não é estritamente linear.
-    # Uma maneira mais robusta seria ter um dicionário de mapeamento.
-
-    mapeamento_num_disciplinas = {
-        0: 0.0,
-        1: 0.5,
-        2: 0.16666667,
-        3: 0.33333333,
-        4: 0.66666667,
-        5: 0.83333333,
-        6: 1.0
-    }
-    numero_disciplinas_matriculadas = mapeamento_num_disciplinas[num_disciplinas_original]
-
-    # Agora, 'curso_em_risco_normalizado' e 'num_disciplinas_normalizado' contêm os valores
-    # normalizados que você pode usar para alimentar seu modelo de machine learning
-    # dentro do DataFrame 'df'. Por exemplo:
-    # df['CURSO EM RISCO'] = [curso_em_risco_normalizado]
-    # df['NUMERO DE DISCIPLINAS MATRICULADAS'] = [num_disciplinas_normalizado]
-
-
-    input_dict.update({'NUMERO_DISCIPLINAS_MATRICULADAS': numero_disciplinas_matriculadas})
-    # Atualizando dicionário para retirar as variáveis de categoria base das dummies:
-
-    modelo_vars = ['PGTO_ANUIDADE_2022', 'DEFICIENCIA',
-                    'NUMERO_DISCIPLINAS_MATRICULADAS', 'CURSO_EM_RISCO',
-                    'MATRICULA_Reincorporado', 'MATRICULA_Reinscrito', 'GENERO_I',
-                    'GENERO_M', 'DEPARTAMENTO_ANCASH', 'DEPARTAMENTO_APURIMAC',
-                    'DEPARTAMENTO_AREQUIPA', 'DEPARTAMENTO_AYACUCHO',
-                    'DEPARTAMENTO_CAJAMARCA', 'DEPARTAMENTO_CALLAO', 'DEPARTAMENTO_CUSCO',
-                    'DEPARTAMENTO_HUANCAVELICA', 'DEPARTAMENTO_HUANUCO', 'DEPARTAMENTO_ICA',
-                    'DEPARTAMENTO_JUNIN', 'DEPARTAMENTO_LAMBAYEQUE',
-                    'DEPARTAMENTO_LA_LIBERTAD', 'DEPARTAMENTO_LIMA', 'DEPARTAMENTO_LORETO',
-                    'DEPARTAMENTO_MADRE_DE_DIOS', 'DEPARTAMENTO_MOQUEGUA',
-                    'DEPARTAMENTO_PASCO', 'DEPARTAMENTO_PIURA', 'DEPARTAMENTO_PUNO',
-                    'DEPARTAMENTO_SAN_MARTIN', 'DEPARTAMENTO_TACNA', 'DEPARTAMENTO_TUMBES',
-                    'DEPARTAMENTO_UCAYALI', 'CLASSIFICACAO_Graduacao',
-                    'CLASSIFICACAO_Graduacao_Semipresencial_50_50',
-                    'CLASSIFICACAO_Graduacao_Semipresencial_80_20',
-                    'CLASSIFICACAO_Graduacao_Virtual', 'CAMPUS_Beca_18', 'CAMPUS_Chiclayo',
-                    'CAMPUS_Chimbote', 'CAMPUS_Huancayo', 'CAMPUS_Ica',
-                    'CAMPUS_Lima_Centro', 'CAMPUS_Lima_Este', 'CAMPUS_Lima_Norte',
-                    'CAMPUS_Lima_SJL', 'CAMPUS_Lima_Sur', 'CAMPUS_Piura', 'CAMPUS_Trujillo',
-                    'CAMPUS_Virtual', 'FACULDADE_Ciencias_Comunicacao',
-                    'FACULDADE_Contabilidade', 'FACULDADE_Direito_Ciencias_Politicas',
-                    'FACULDADE_Engenharia_Industrial_Mecanica',
-                    'FACULDADE_Engenharia_Sistemas_Eletrica',
-                    'FACULDADE_Humanas_Ciencias_Sociais', 'FACULDADE_Saude', 'TURNO_Misto',
-                    'TURNO_Noite', 'TURNO_Tarde', 'BOLSAS_DESCONTO_Bolsa_MadreDeDios',
-                    'BOLSAS_DESCONTO_Bolsa_Socioecon_Especial',
-                    'BOLSAS_DESCONTO_Bolsa_Socioeconomica', 'BOLSAS_DESCONTO_Bolsa_Talento',
-                    'BOLSAS_DESCONTO_Convenios', 'BOLSAS_DESCONTO_Sem_Beneficio',
-                    'FAIXA_ETARIA_De_21_a_23', 'FAIXA_ETARIA_De_24_a_29',
-                    'FAIXA_ETARIA_Maior_que_30', 'FAIXA_ETARIA_Menor_que_18']
-
-    novo_dict = {}
-
-    for i in modelo_vars:
-        novo_dict[i] = input_dict[i]
-    input_dict = novo_dict
-    data = {key: value[0] if isinstance(value, list) else value for key, value in input_dict.items()}
-    input_df = pd.DataFrame([data])
-
-    # Faz a predição com o modelo de regressão logística
-    pred = params.predict(input_df)[0]
-    prob = params.predict_proba(input_df)[0][1]  # probabilidade da classe 1, se for binário
+    # Faz a predição (classe e probabilidade da classe 1 numa única passada)
+    with metricas.perfil('app') if PERFILAR else contextlib.nullcontext({}) as perfilamento, metricas.etapa('classificar'):
+        previsoes, probabilidades = classificar(perfil)
+    if 'relatorio' in perfilamento:
+        st.sidebar.caption(f"Perfil gravado em {perfilamento['relatorio']}")
+    pred = previsoes[0]
+    prob = probabilidades[0]
 
     # Mapeia a classe prevista para um rótulo mais legível
     classe_map = {0: "Inadimplente", 1: "Adimplente"}
@@ -511,39 +159,156 @@ if submitted:
     st.write(f"**Classe prevista:** {classe_prevista}")
     st.write(f"**Probabilidade de adimplência:** {prob:.2%}")
 
-    st.markdown("<br><br>", unsafe_allow_html=True)
+    # Principais fatores deste aluno: contribuição de cada variável para o logito
+    if modelo['motor'] is not None:
+        codificador = modelo['codificadores']['formulario']
+        ativos, densas, validos = codificador.codificar_ativos(
+            {nome: [valor] for nome, valor in perfil.items()})
+        nomes, valores = explicacao.principais_fatores(
+            explicacao.contribuicoes_linhas(modelo, codificador, ativos, densas),
+            codificador.variaveis, k=5)
+        st.markdown("#### Principais fatores")
+        st.caption("Contribuição de cada variável para o logito: valores positivos aumentam a probabilidade "
+                   "de adimplência. Na categoria de referência de uma variável, a contribuição é zero.")
+        st.dataframe(pd.DataFrame({'Variável': nomes[0], 'Contribuição': valores[0].round(3)}), hide_index=True)
 
-    # Gráfico dos coeficientes:
-    if hasattr(params, 'coef_'):
-        coefficients = params.coef_[0]
+    st.markdown("<br><br>", unsafe_allow_html=True)
 
-        feature_names = None
-        if hasattr(params, 'feature_names_'):
-            feature_names = params.feature_names_
+    # Gráfico dos coeficientes (montado uma única vez por versão do modelo):
+    with metricas.etapa('grafico'):
+        grafico = explicacao.grafico_importancia(modelo)
+        if grafico is not None:
+            st.vega_lite_chart(spec=grafico, use_container_width=True)
         else:
-            feature_names = modelo_vars # Usando modelo_vars como fallback
-
-        if feature_names is not None and len(feature_names) == len(coefficients):
-            # Criar DataFrame
-            importance_df = pd.DataFrame({'Feature': feature_names, 'Coefficient': coefficients})
-            importance_df['Magnitude'] = np.abs(importance_df['Coefficient'])
-            importance_df = importance_df.sort_values(by='Magnitude', ascending=False).head(10)
-
-            # Criar o gráfico de barras
-            chart = alt.Chart(importance_df).mark_bar().encode(
-                x=alt.X('Coefficient:Q'),
-                y=alt.Y('Feature:N', sort='-x'),
-                color=alt.Color('Coefficient:Q', scale=alt.Scale(scheme='viridis')),
-                tooltip=['Feature', 'Coefficient']
-            ).properties(
-                title='Top 10 Variáveis Mais Influentes (Magnitude dos Coeficientes)'
-            )
-            st.altair_chart(chart, use_container_width=True)
-        else:
-            st.warning("Não foi possível determinar os nomes das variáveis ou houve uma incompatibilidade com o número de coeficientes.")
-            st.info("Certifique-se de que a lista 'modelo_vars' está definida corretamente e corresponde à ordem das variáveis usadas no modelo.")
-    else:
-        st.warning("O modelo de regressão logística não possui o atributo 'coef_'.")
-        st.info("A importância das variáveis pode ser interpretada analisando os coeficientes do modelo (não visualizados aqui).")
+            st.warning("O modelo de regressão logística não possui o atributo 'coef_'.")
+            st.info("A importância das variáveis pode ser interpretada analisando os coeficientes do modelo (não visualizados aqui).")
+
 
+# Cenários "e se" do último aluno enviado:
 
+if 'perfil_cenarios' in st.session_state:
+    from previnad import cenarios
+
+    st.header('E se?')
+    st.markdown("""
+Compare o risco do último aluno enviado com outros valores em alguns campos (por exemplo, outra bolsa,
+turno ou campus). Todas as combinações são pontuadas de uma só vez.
+""")
+    opcoes_campos = {**MAPAS_FORMULARIO, **VALORES_FORMULARIO}
+    campos = st.multiselect('Campos a variar:', list(opcoes_campos), default=['BOLSAS_DESCONTO'])
+    with st.form('cenarios_form'):
+        alternativas = {campo: st.multiselect(f'{campo}:', list(opcoes_campos[campo]),
+                                              default=list(opcoes_campos[campo]))
+                        for campo in campos}
+        so_uma_mudanca = st.checkbox('Só cenários com um único campo alterado')
+        comparar = st.form_submit_button('Comparar cenários')
+
+    if comparar and campos:
+        try:
+            ranking = cenarios.avaliar(modelo, st.session_state['perfil_cenarios'], alternativas)
+        except ValueError as erro:
+            st.error(str(erro))
+        else:
+            base = ranking.loc[0, cenarios.COLUNA_INADIMPLENCIA]
+            st.write(f"**{len(ranking)} cenários.** Probabilidade de inadimplência do aluno enviado: {base:.2%}")
+            if so_uma_mudanca:
+                ranking = ranking[ranking[cenarios.COLUNA_MUDANCAS] <= 1]
+            principais = ranking.head(15)
+            rotulos = principais[campos].astype(str).agg(' / '.join, axis=1)
+            st.vega_lite_chart(spec={
+                'data': {'values': [{'Cenário': rotulo, 'Variação': float(v)}
+                                    for rotulo, v in zip(rotulos, principais[cenarios.COLUNA_VARIACAO])]},
+                'mark': 'bar',
+                'encoding': {
+                    'x': {'field': 'Variação', 'type': 'quantitative', 'axis': {'format': '.2%'},
+                          'title': 'Variação da probabilidade de inadimplência'},
+                    'y': {'field': 'Cenário', 'type': 'nominal', 'sort': None, 'title': None}
+                }
+            }, use_container_width=True)
+            st.dataframe(ranking, column_config={
+                cenarios.COLUNA_ADIMPLENCIA: None,
+                cenarios.COLUNA_INADIMPLENCIA: st.column_config.NumberColumn(format='%.4f'),
+                cenarios.COLUNA_VARIACAO: st.column_config.NumberColumn(format='%.4f')
+            })
+
+
+# Pontuação em lote:
+
+st.header('Pontuação em lote')
+
+st.markdown("""
+Envie um arquivo de matrículas no mesmo formato de `peru_student_enrollment_data_2023.csv`
+(CSV separado por `;` ou Parquet) para receber a classe e a probabilidade prevista de cada aluno.
+""")
+
+arquivo_lote = st.file_uploader('Arquivo de matrículas:', type=['csv', 'parquet'])
+formato_saida = st.radio('Formato do arquivo de saída:', ['CSV', 'Parquet'], horizontal=True)
+fatores_lote = 3 if modelo['motor'] is not None and st.checkbox('Incluir os 3 principais fatores de cada aluno') else 0
+
+if arquivo_lote is not None:
+    import tempfile
+
+    from previnad import lote
+
+    # O resultado fica na sessão: o arquivo só é pontuado de novo quando ele, o formato, os fatores ou o modelo mudam
+    # (qualquer outro widget ou envio do formulário roda o script inteiro de novo)
+    chave_lote = (arquivo_lote.file_id, formato_saida, fatores_lote, modelo['versao'])
+    if st.session_state.get('chave_lote') != chave_lote:
+        # O resultado vai para um arquivo temporário, um bloco por vez; o download_button precisa dos bytes
+        barra = st.progress(0.0, text='Pontuando alunos...')
+        # Cada arquivo entra uma única vez no monitoramento de deriva, mesmo pontuado de novo com outro formato
+        monitorados = st.session_state.setdefault('lotes_monitorados', set())
+        chave_monitor = (arquivo_lote.file_id, modelo['versao'])
+        with tempfile.TemporaryFile() as saida_lote:
+            contagem = lote.pontuar_arquivo(arquivo_lote, arquivo_lote.name, saida_lote, formato_saida, modelo,
+                                            cache=obter_cache(), fatores=fatores_lote,
+                                            progresso=lambda fracao: barra.progress(fracao, text='Pontuando alunos...'),
+                                            monitorar=chave_monitor not in monitorados)
+            saida_lote.seek(0)
+            st.session_state.update(chave_lote=chave_lote, resultado_lote=saida_lote.read(), contagem_lote=contagem)
+        monitorados.add(chave_monitor)
+        barra.empty()
+    contagem = st.session_state['contagem_lote']
+
+    invalidos = contagem['linhas'] - contagem['pontuadas']
+    st.write(f"**Alunos pontuados:** {contagem['pontuadas']} de {contagem['linhas']}")
+    if invalidos:
+        st.warning(f"{invalidos} linhas têm valores ausentes ou desconhecidos e ficaram sem pontuação.")
+
+    extensao = 'parquet' if formato_saida == 'Parquet' else 'csv'
+    st.download_button('Baixar resultado', data=st.session_state['resultado_lote'], file_name=f'previsoes.{extensao}')
+
+
+estatisticas_cache = obter_cache().estatisticas()
+st.sidebar.caption(f"Cache de predições: {estatisticas_cache['acertos']} acertos, "
+                   f"{estatisticas_cache['falhas']} falhas, {estatisticas_cache['perfis']} perfis guardados")
+
+with st.sidebar.expander('Tempo por etapa'):
+    etapas = metricas.METRICAS.resumo()['histogramas'].get('etapa_segundos', [])
+    if etapas:
+        st.dataframe(pd.DataFrame({
+            'Etapa': [e['rotulos']['etapa'] for e in etapas],
+            'Chamadas': [e['contagem'] for e in etapas],
+            'Média (ms)': [round(e['media'] * 1e3, 3) for e in etapas]
+        }), hide_index=True)
+    else:
+        st.caption('Nenhuma medição ainda.')
+
+# Deriva das entradas e das probabilidades deste processo contra o treino (previnad.monitoramento)
+relatorio = monitoramento.monitor(modelo).relatorio()
+for alerta in relatorio['alertas']:
+    st.sidebar.warning(f"Deriva: {alerta}")
+with st.sidebar.expander('Monitoramento'):
+    if not relatorio['referencia']:
+        st.info("O modelo não tem referência do treino. Gere com: "
+                "python -m previnad.monitoramento referencia <arquivo de treino>")
+    st.caption(f"{relatorio['linhas']} alunos pontuados, {relatorio['invalidas']} sem pontuação")
+    if relatorio['variaveis']:
+        st.dataframe(pd.DataFrame({
+            'Variável': [v['variavel'] for v in relatorio['variaveis']],
+            'PSI': [round(v['psi'], 4) for v in relatorio['variaveis']],
+            'KL': [round(v['kl'], 4) for v in relatorio['variaveis']],
+            'Nível': [v['nivel'] for v in relatorio['variaveis']]
+        }), hide_index=True)
+    elif relatorio['referencia']:
+        st.caption(f"A deriva é avaliada a partir de {monitoramento.MINIMO_LINHAS} alunos pontuados.")
@@ -0,0 +1,4 @@
+"""
+Benchmarks do PrevInad (rodar com python -m benchmarks.<nome> na raiz do repositório;
+benchmarks.suite roda os principais casos e compara com a linha de base).
+"""
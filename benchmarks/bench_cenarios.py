@@ -0,0 +1,65 @@
+"""
+Micro-benchmark: cenários "e se" pontuados um a um x expandidos de uma vez.
+
+Compara, para um perfil do formulário e alternativas em alguns campos:
+    um_a_um     inferencia.pontuar_colunas para cada cenário (como reenviar o formulário);
+    colunas     todos os cenários como colunas de rótulos, codificados e pontuados juntos;
+    expandido   cenarios.avaliar (o perfil base é codificado uma vez e o produto
+                cartesiano é montado direto na forma compacta).
+
+Uso (na raiz do repositório):
+    python -m benchmarks.bench_cenarios
+    python -m benchmarks.bench_cenarios --campos BOLSAS_DESCONTO TURNO CAMPUS FAIXA_ETARIA
+"""
+import argparse
+import os
+import timeit
+
+import numpy as np
+
+from benchmarks.bench_codificacao import REGISTRO
+from previnad import cenarios, inferencia, registro
+from previnad.dominios import MAPAS_FORMULARIO, VALORES_FORMULARIO
+
+
+def medir(funcao, repeticoes):
+    "Melhor tempo de uma chamada, em segundos."
+    return min(timeit.repeat(funcao, number=1, repeat=repeticoes))
+
+
+def main(argv=None):
+    opcoes = {**MAPAS_FORMULARIO, **VALORES_FORMULARIO}
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--modelo', default=os.path.join('data', 'modelo_final.pkl'))
+    parser.add_argument('--campos', nargs='+', choices=list(opcoes),
+                        default=['BOLSAS_DESCONTO', 'TURNO', 'CAMPUS', 'CURSO_EM_RISCO'])
+    parser.add_argument('--repeticoes', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    modelo = registro.carregar_modelo(args.modelo)
+    codificador = modelo['codificadores']['formulario']
+    alternativas = {campo: list(opcoes[campo]) for campo in args.campos}
+    ranking = cenarios.avaliar(modelo, REGISTRO, alternativas)
+    grade = ranking.sort_index()[args.campos]
+
+    colunas = {nome: [valor] * len(grade) for nome, valor in REGISTRO.items()}
+    colunas.update({campo: grade[campo].tolist() for campo in args.campos})
+    linhas = [{nome: [valores[i]] for nome, valores in colunas.items()} for i in range(len(grade))]
+
+    # Conferência: as três formas dão as mesmas probabilidades
+    _, prob, _ = inferencia.pontuar_colunas(modelo, codificador, colunas)
+    assert np.allclose(prob, ranking.sort_index()[cenarios.COLUNA_ADIMPLENCIA]), "Probabilidades diferentes"
+
+    tempos = {
+        'um_a_um': medir(lambda: [inferencia.pontuar_colunas(modelo, codificador, linha) for linha in linhas],
+                         args.repeticoes),
+        'colunas': medir(lambda: inferencia.pontuar_colunas(modelo, codificador, colunas), args.repeticoes),
+        'expandido': medir(lambda: cenarios.avaliar(modelo, REGISTRO, alternativas), args.repeticoes)
+    }
+    print(f"{len(grade)} cenários ({' x '.join(args.campos)}):")
+    for nome, segundos in tempos.items():
+        print(f"  {nome:10} {segundos * 1e3:10.2f} ms  ({tempos['um_a_um'] / segundos:.0f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""
+Micro-benchmark: codificação antiga (dicts + DataFrame por envio) x Codificador.
+
+Uso (na raiz do repositório):
+    python -m benchmarks.bench_codificacao
+"""
+import timeit
+
+import numpy as np
+
+from benchmarks import legado
+from previnad.codificacao import CODIFICADOR_FORMULARIO
+from previnad.dominios import MODELO_VARS
+
+EXEMPLO = {
+    'genero': 'Feminino',
+    'pgto_anuidade_2022': 'Sim',
+    'curso_em_risco_original': 0,
+    'num_disciplinas_original': 6,
+    'departamento': 'LIMA',
+    'deficiencia': 'Não',
+    'modalidade_ensino': 'Presencial',
+    'turno': 'Manhã',
+    'matricula': 'Novo',
+    'classificacao': 'Graduação',
+    'campus': 'Lima Centro',
+    'faculdade': 'Saude',
+    'faixa_etaria': '19-20',
+    'bolsas_desconto': 'Convenios'
+}
+
+REGISTRO = {
+    'PGTO_ANUIDADE_2022': 'Sim',
+    'DEFICIENCIA': 'Não',
+    'NUMERO_DISCIPLINAS_MATRICULADAS': 6,
+    'CURSO_EM_RISCO': 0,
+    'MATRICULA': 'Novo',
+    'GENERO': 'Feminino',
+    'DEPARTAMENTO': 'LIMA',
+    'CLASSIFICACAO': 'Graduação',
+    'CAMPUS': 'Lima Centro',
+    'FACULDADE': 'Saude',
+    'TURNO': 'Manhã',
+    'BOLSAS_DESCONTO': 'Convenios',
+    'FAIXA_ETARIA': '19-20'
+}
+
+
+def medir(funcao, repeticoes):
+    "Melhor tempo médio por chamada, em segundos."
+    return min(timeit.repeat(funcao, number=repeticoes, repeat=5)) / repeticoes
+
+
+def main():
+    # Conferência: mesmo vetor para um exemplo sem as variáveis afetadas pelos mapas invertidos do app antigo
+    # (os sliders ficam nos extremos, onde as tabelas do app antigo coincidem com a escala min-max)
+    antigo = legado.codificar_formulario(**EXEMPLO)[MODELO_VARS].to_numpy(dtype=float)
+    novo = CODIFICADOR_FORMULARIO.codificar_linha(REGISTRO)
+    assert np.array_equal(antigo, novo), "Codificações diferentes para o exemplo"
+
+    t_antigo = medir(lambda: legado.codificar_formulario(**EXEMPLO), 200)
+    t_novo = medir(lambda: CODIFICADOR_FORMULARIO.codificar_linha(REGISTRO), 2000)
+    saida = np.zeros((1, len(MODELO_VARS)))
+    t_reuso = medir(lambda: CODIFICADOR_FORMULARIO.codificar_linha(REGISTRO, saida), 2000)
+
+    print("Uma linha (formulário):")
+    print(f"  caminho antigo:             {t_antigo * 1e6:10.1f} us")
+    print(f"  Codificador:                {t_novo * 1e6:10.1f} us  ({t_antigo / t_novo:.0f}x)")
+    print(f"  Codificador (saída reusada): {t_reuso * 1e6:9.1f} us  ({t_antigo / t_reuso:.0f}x)")
+
+    print("Muitas linhas (Codificador, por linha):")
+    for n in [10_000, 100_000, 1_000_000]:
+        colunas = {nome: np.repeat(valor, n) for nome, valor in REGISTRO.items()}
+        t = medir(lambda: CODIFICADOR_FORMULARIO.codificar(colunas), 1)
+        print(f"  {n:>9} linhas: {t:8.3f} s  ({t / n * 1e6:.3f} us/linha; antigo ~{t_antigo * 1e6:.0f} us/linha)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""
+Micro-benchmark: vários modelos pontuados um a um (cada um codifica) x Conjunto.
+
+Compara, em n linhas sorteadas nos domínios reais:
+    separados   inferencia.pontuar_colunas para cada modelo (uma codificação por modelo);
+    media       Conjunto no modo 'media' (uma codificação, modelos no pool de threads);
+    ab          Conjunto no modo 'ab' (uma codificação, cada linha num só modelo).
+
+Sem argumentos, usa o modelo_final.pkl três vezes, o que isola o custo da
+codificação. Os artefatos precisam do mesmo esquema (por exemplo, os de
+python -m previnad.treino --candidatos).
+
+Uso (na raiz do repositório):
+    python -m benchmarks.bench_conjunto
+    python -m benchmarks.bench_conjunto --modelos data/candidatos/modelo_Logit.pkl data/candidatos/modelo_Tree.pkl
+"""
+import argparse
+import os
+import timeit
+
+from benchmarks.suite import matriculas_aleatorias
+from previnad import inferencia, registro
+from previnad.conjunto import Conjunto
+from previnad.dominios import COLUNAS_ORIGEM
+
+
+def medir(funcao, repeticoes):
+    "Melhor tempo de uma chamada, em segundos."
+    return min(timeit.repeat(funcao, number=1, repeat=repeticoes))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--modelos', nargs='+', default=[os.path.join('data', 'modelo_final.pkl')] * 3)
+    parser.add_argument('--linhas', type=int, default=100_000)
+    parser.add_argument('--repeticoes', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    modelos = {f'{i}_{os.path.basename(caminho)}': registro.carregar_modelo(caminho)
+               for i, caminho in enumerate(args.modelos)}
+    referencia = next(iter(modelos.values()))
+    codificador = referencia['codificadores']['arquivo']
+    colunas = matriculas_aleatorias(args.linhas).rename(columns=COLUNAS_ORIGEM)
+
+    tempos = {'separados': medir(lambda: [inferencia.pontuar_colunas(modelo, codificador, colunas)
+                                          for modelo in modelos.values()], args.repeticoes)}
+    for modo in ['media', 'ab']:
+        conjunto = Conjunto(modelos, modo=modo, cache=False)
+        tempos[modo] = medir(lambda: conjunto.pontuar_colunas(codificador, colunas), args.repeticoes)
+        conjunto.fechar()
+    tempos['codificar'] = medir(lambda: codificador.codificar_ativos(colunas), args.repeticoes)
+
+    print(f"{len(modelos)} modelos, {args.linhas} linhas:")
+    for nome, segundos in tempos.items():
+        print(f"  {nome:10} {segundos * 1e3:10.1f} ms  ({tempos['separados'] / segundos:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""
+Matriz densa x esparsa (CSR): memória, codificação, treino e pontuação.
+
+Uso (na raiz do repositório):
+    python -m benchmarks.bench_esparsa
+    python -m benchmarks.bench_esparsa --linhas 10000 100000
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+from sklearn.linear_model import LogisticRegression
+
+from benchmarks.bench_inferencia import colunas_aleatorias, medir
+from previnad import registro
+from previnad.codificacao import CODIFICADOR_FORMULARIO
+
+
+def bytes_matriz(X):
+    if hasattr(X, 'tocsr'):
+        return X.data.nbytes + X.indices.nbytes + X.indptr.nbytes
+    return X.nbytes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--linhas', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+
+    motor = registro.carregar_modelo(os.path.join('data', 'modelo_final.pkl'))['motor']
+    codificador = CODIFICADOR_FORMULARIO
+    rng = np.random.default_rng(0)
+
+    for n in args.linhas:
+        colunas = colunas_aleatorias(n)
+        ativos, densas, _ = codificador.codificar_ativos(colunas)
+        # Alvo sorteado a partir do modelo atual, para o treino ter sinal
+        y = (rng.random(n) < motor.pontuar_ativos(ativos, densas, codificador.colunas_densas)[1]).astype(int)
+
+        matrizes = {
+            'densa': lambda: codificador.densificar(ativos, densas),
+            'esparsa': lambda: codificador.esparsa(ativos, densas)
+        }
+        print(f"{n} linhas:")
+        for nome, montar in matrizes.items():
+            t_montar = medir(montar)
+            X = montar()
+            inicio = time.perf_counter()
+            modelo = LogisticRegression().fit(X, y)
+            t_treino = time.perf_counter() - inicio
+            t_proba = medir(lambda: modelo.predict_proba(X))
+            print(f"  {nome:8} {bytes_matriz(X) / 1e6:8.1f} MB | montar {t_montar * 1e3:8.1f} ms | "
+                  f"fit {t_treino:7.2f} s | predict_proba {t_proba * 1e3:8.1f} ms")
+
+        t_ativos = medir(lambda: motor.pontuar_ativos(ativos, densas, codificador.colunas_densas))
+        print(f"  forma compacta + motor NumPy: {(ativos.nbytes + densas.nbytes) / 1e6:.1f} MB | "
+              f"pontuar {t_ativos * 1e3:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""
+Motor NumPy x scikit-learn: paridade numérica e tempo de pontuação.
+
+Uso (na raiz do repositório):
+    python -m benchmarks.bench_inferencia
+"""
+import os
+import timeit
+
+import numpy as np
+import pandas as pd
+
+from previnad import registro
+from previnad.codificacao import CODIFICADOR_FORMULARIO
+from previnad.dominios import MAPAS_FORMULARIO, MODELO_VARS, VALORES_FORMULARIO
+from previnad.inferencia import ModeloLogistico, verificar_paridade
+
+
+def colunas_aleatorias(n, semente=0):
+    "Respostas de formulário sorteadas nos domínios do app."
+    rng = np.random.default_rng(semente)
+    dominios = {**MAPAS_FORMULARIO, **VALORES_FORMULARIO}
+    return {nome: rng.choice(list(tabela), n) for nome, tabela in dominios.items()}
+
+
+def medir(funcao, repeticoes=3):
+    "Melhor tempo de uma chamada, em segundos."
+    return min(timeit.repeat(funcao, number=1, repeat=repeticoes))
+
+
+def main():
+    params = registro.carregar_modelo(os.path.join('data', 'modelo_final.pkl'))['resultados']
+    motor = ModeloLogistico.de_sklearn(params)
+    codificador = CODIFICADOR_FORMULARIO
+
+    colunas = colunas_aleatorias(100_000)
+    X, _ = codificador.codificar(colunas)
+    print(f"Paridade com predict_proba (100k linhas): diferença máxima {verificar_paridade(params, X):.2e}")
+
+    ativos, densas, _ = codificador.codificar_ativos(colunas)
+    _, prob_ativos = motor.pontuar_ativos(ativos, densas, codificador.colunas_densas)
+    print(f"Paridade forma compacta x densa: diferença máxima {np.max(np.abs(prob_ativos - motor.pontuar(X)[1])):.2e}")
+
+    for n in [1, 10_000, 100_000, 1_000_000]:
+        colunas = colunas_aleatorias(n)
+        X, _ = codificador.codificar(colunas)
+        ativos, densas, _ = codificador.codificar_ativos(colunas)
+        entrada = pd.DataFrame(X, columns=MODELO_VARS)
+
+        t_sklearn = medir(lambda: (params.predict(entrada), params.predict_proba(entrada)))
+        t_denso = medir(lambda: motor.pontuar(X))
+        t_ativos = medir(lambda: motor.pontuar_ativos(ativos, densas, codificador.colunas_densas))
+        print(f"{n:>9} linhas: sklearn predict+predict_proba {t_sklearn * 1e3:9.3f} ms | "
+              f"motor denso {t_denso * 1e3:8.3f} ms | motor ativos {t_ativos * 1e3:8.3f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""
+Teste de carga do serviço de pontuação (previnad.api).
+
+Por padrão chama a aplicação ASGI no próprio processo, sem rede. Com --url,
+envia as requisições a um servidor já em execução (uvicorn previnad.api:app).
+
+Uso (na raiz do repositório):
+    python -m benchmarks.carga_api --clientes 64 --requisicoes 50
+    python -m benchmarks.carga_api --url http://127.0.0.1:8000 --clientes 16
+"""
+import argparse
+import asyncio
+import json
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from previnad.api import ServicoPontuacao
+from previnad.dominios import MAPAS_FORMULARIO, VALORES_FORMULARIO
+
+
+def registros_aleatorios(n, rng):
+    "Registros de formulário sorteados nos domínios do app."
+    dominios = {**MAPAS_FORMULARIO, **VALORES_FORMULARIO}
+    return [{nome: rng.choice(list(tabela)).item() for nome, tabela in dominios.items()}
+            for _ in range(n)]
+
+
+async def chamar_asgi(app, metodo, caminho, corpo=b''):
+    "Faz uma requisição HTTP direto na aplicação ASGI e devolve (status, JSON)."
+    scope = {'type': 'http', 'method': metodo, 'path': caminho, 'query_string': b'', 'headers': []}
+    enviado = False
+    resposta = {}
+
+    async def receive():
+        nonlocal enviado
+        if enviado:
+            await asyncio.sleep(3600)
+        enviado = True
+        return {'type': 'http.request', 'body': corpo, 'more_body': False}
+
+    async def send(mensagem):
+        if mensagem['type'] == 'http.response.start':
+            resposta['status'] = mensagem['status']
+        else:
+            resposta['corpo'] = mensagem['body']
+
+    await app(scope, receive, send)
+    return resposta['status'], json.loads(resposta['corpo'])
+
+
+async def carga_local(clientes, requisicoes, registros_por_requisicao, rng):
+    app = ServicoPontuacao()
+    app.loteador  # carrega o modelo fora da medição
+    corpos = [json.dumps(registros_aleatorios(registros_por_requisicao, rng)).encode()
+              for _ in range(32)]
+    latencias = []
+
+    async def cliente(i):
+        for j in range(requisicoes):
+            inicio = time.perf_counter()
+            status, _ = await chamar_asgi(app, 'POST', '/pontuar', corpos[(i + j) % len(corpos)])
+            assert status == 200
+            latencias.append(time.perf_counter() - inicio)
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(cliente(i) for i in range(clientes)))
+    duracao = time.perf_counter() - inicio
+    _, servidor = await chamar_asgi(app, 'GET', '/latencias')
+    return latencias, duracao, servidor
+
+
+def carga_remota(url, clientes, requisicoes, registros_por_requisicao, rng):
+    corpos = [json.dumps(registros_aleatorios(registros_por_requisicao, rng)).encode()
+              for _ in range(32)]
+
+    def cliente(i):
+        medidas = []
+        for j in range(requisicoes):
+            pedido = urllib.request.Request(f'{url}/pontuar', data=corpos[(i + j) % len(corpos)],
+                                            headers={'Content-Type': 'application/json'})
+            inicio = time.perf_counter()
+            with urllib.request.urlopen(pedido) as resposta:
+                resposta.read()
+            medidas.append(time.perf_counter() - inicio)
+        return medidas
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(clientes) as executor:
+        latencias = [m for medidas in executor.map(cliente, range(clientes)) for m in medidas]
+    duracao = time.perf_counter() - inicio
+    with urllib.request.urlopen(f'{url}/latencias') as resposta:
+        servidor = json.loads(resposta.read())
+    return latencias, duracao, servidor
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--url', help='Servidor já em execução (padrão: aplicação no próprio processo)')
+    parser.add_argument('--clientes', type=int, default=64)
+    parser.add_argument('--requisicoes', type=int, default=50, help='Requisições por cliente')
+    parser.add_argument('--registros', type=int, default=1, help='Registros por requisição')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    if args.url:
+        latencias, duracao, servidor = carga_remota(args.url, args.clientes, args.requisicoes,
+                                                    args.registros, rng)
+    else:
+        latencias, duracao, servidor = asyncio.run(
+            carga_local(args.clientes, args.requisicoes, args.registros, rng))
+
+    p50, p99 = np.percentile(latencias, [50, 99]) * 1e3
+    total = len(latencias)
+    print(f"{total} requisições em {duracao:.2f} s ({total / duracao:.0f} req/s, "
+          f"{total * args.registros / duracao:.0f} registros/s)")
+    print(f"Cliente:  p50 {p50:.2f} ms | p99 {p99:.2f} ms")
+    print(f"Servidor: {servidor}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""
+Tempo de import (python -X importtime) dos pontos de entrada do PrevInad.
+
+Para cada alvo, roda um processo Python novo com -X importtime e soma o
+tempo acumulado de cada pacote importado no nível de cima. Mostra os
+pacotes mais caros e se o scikit-learn e o Altair entraram na partida.
+
+Uso (na raiz do repositório):
+    python -m benchmarks.importacao
+    python -m benchmarks.importacao --saida importacao.json --pacotes 15
+"""
+import argparse
+import json
+import subprocess
+import sys
+
+ALVOS = {
+    # Imports do app.py e a carga do modelo, como na abertura do app
+    'app': ("import os, contextlib; import pandas, numpy, streamlit; "
+            "from previnad import explicacao, inferencia, metricas, registro, tabela_risco; "
+            "from previnad.cache import CachePredicoes; "
+            "registro.carregar_modelo('data/modelo_final.pkl')"),
+    'api': "import previnad.api; previnad.api.app.loteador",
+    'registro': "from previnad import registro; registro.carregar_modelo('data/modelo_final.pkl')",
+    'registro_pkl': ("from previnad import registro; "
+                     "registro.carregar_modelo('data/modelo_final.pkl', usar_npz=False)")
+}
+
+# Dependências que a partida deveria evitar quando há o artefato NumPy
+PESADOS = ['sklearn', 'scipy', 'altair', 'pyarrow']
+
+
+def medir_importacao(codigo):
+    """
+    Roda o código num processo novo com -X importtime.
+
+    Returns:
+        dict: {'total_s', 'pacotes': {pacote: segundos acumulados}}. Um pacote
+        conta o tempo de cada vez que é importado por outro pacote (ou pelo
+        próprio código), incluindo o que ele importa; os pacotes vêm do mais
+        caro ao mais barato e podem se sobrepor (pandas dentro de previnad, por exemplo).
+    """
+    resultado = subprocess.run([sys.executable, '-X', 'importtime', '-c', codigo],
+                               capture_output=True, text=True, check=True)
+    entradas = []
+    for linha in resultado.stderr.splitlines():
+        if not linha.startswith('import time:') or 'cumulative' in linha:
+            continue
+        _, acumulado, nome = linha[len('import time:'):].split('|')
+        recuo = len(nome) - len(nome.lstrip())
+        entradas.append((recuo, nome.strip().split('.')[0], int(acumulado) / 1e6))
+
+    # O -X importtime escreve cada módulo depois dos que ele importa, com recuo
+    # maior: lendo de trás para a frente, o pai é o último de recuo menor
+    pacotes, total, pilha = {}, 0.0, []
+    for recuo, pacote, segundos in reversed(entradas):
+        while pilha and pilha[-1][0] >= recuo:
+            pilha.pop()
+        pai = pilha[-1][1] if pilha else None
+        if pai is None:
+            total += segundos
+        if pacote != pai:
+            pacotes[pacote] = pacotes.get(pacote, 0.0) + segundos
+        pilha.append((recuo, pacote))
+    ordenados = dict(sorted(pacotes.items(), key=lambda item: item[1], reverse=True))
+    return {'total_s': total, 'pacotes': ordenados}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--alvos', nargs='+', choices=list(ALVOS), default=list(ALVOS))
+    parser.add_argument('--pacotes', type=int, default=8, help='Quantos pacotes listar por alvo')
+    parser.add_argument('--saida', help='Grava o relatório completo neste arquivo JSON')
+    args = parser.parse_args(argv)
+
+    relatorio = {}
+    for alvo in args.alvos:
+        medida = medir_importacao(ALVOS[alvo])
+        relatorio[alvo] = medida
+        presentes = [nome for nome in PESADOS if nome in medida['pacotes']]
+        print(f"{alvo}: {medida['total_s'] * 1e3:.0f} ms de import"
+              f" (pesados: {', '.join(presentes) or 'nenhum'})")
+        for pacote, segundos in list(medida['pacotes'].items())[:args.pacotes]:
+            print(f"  {pacote:24} {segundos * 1e3:9.1f} ms")
+
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as arquivo:
+            json.dump(relatorio, arquivo, indent=2)
+        print(f"Relatório gravado em {args.saida}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,307 @@
+"""
+Suíte de benchmarks com resultados em JSON e comparação com uma linha de base.
+
+Mede, com dados sintéticos sorteados nos domínios reais (os 25
+departamentos, 14 campi, 8 faculdades... de previnad.dominios):
+
+    codificar_legado_1    Codificação antiga do app (dicts + DataFrame), um envio.
+    codificar_1           Codificador.codificar_linha, um envio.
+    predict_sklearn_1     Caminho antigo do app: predict + predict_proba num DataFrame de uma linha.
+    classificar_1         Caminho atual do app (inferencia.pontuar_colunas), um envio.
+    classificar_cache_1   O mesmo, com o perfil já no cache de predições.
+    carregar_pkl/npz      Import do pacote e carga do artefato, num processo novo
+                          (carregar_pkl sem o .npz ao lado, isto é, com o unpickle).
+    carregar_pkl_npz      Carga do .pkl pelo .npz gravado ao lado, como na abertura do app.
+    lote_<n>              lote.pontuar_dataframe em n linhas no formato do arquivo original.
+    arquivo_<n>           lote.pontuar_arquivo de CSV para CSV em n linhas (leitura e gravação incluídas).
+
+Cada caso guarda o melhor tempo entre as repetições. Com uma linha de
+base, casos que ficaram mais lentos que a tolerância são apontados como
+regressão e o processo termina com código 1. A linha de base só vale para
+a máquina em que foi gravada: regrave-a (--gravar-linha-base) ao trocar de máquina.
+Em máquinas compartilhadas (VMs, CI), em que o tempo varia bastante entre
+execuções, aumente --repeticoes e --tolerancia.
+
+Uso (na raiz do repositório):
+    python -m benchmarks.suite
+    python -m benchmarks.suite --tamanhos 10000 --tolerancia 0.5
+    python -m benchmarks.suite --gravar-linha-base
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+
+import numpy as np
+import pandas as pd
+
+from benchmarks import legado
+from benchmarks.bench_codificacao import EXEMPLO, REGISTRO
+from previnad import inferencia, lote, registro
+from previnad.cache import CachePredicoes
+from previnad.codificacao import CODIFICADOR_FORMULARIO
+from previnad.dominios import COLUNAS_ORIGEM, MAPAS_ORIGEM, MODELO_VARS
+
+CAMINHO_MODELO = os.path.join('data', 'modelo_final.pkl')
+LINHA_BASE = os.path.join('benchmarks', 'linha_base.json')
+DIRETORIO_RESULTADOS = os.path.join('benchmarks', 'resultados')
+TAMANHOS = [10_000, 100_000]
+
+# Domínios das colunas numéricas do arquivo original
+_NUMERICAS = {
+    'TUITION PAYMENT MARCH 2022': [0, 1],
+    'TUITION PAYMENT MARCH 2023': [0, 1],
+    'NUMBER OF ENROLLED COURSES': list(range(7)),
+    'AT-RISK COURSE': list(range(6))
+}
+
+
+def matriculas_aleatorias(n, semente=0):
+    """
+    Matrículas sorteadas nos domínios do arquivo original.
+
+    Returns:
+        pd.DataFrame: n linhas com as colunas (e os rótulos) de
+        peru_student_enrollment_data_2023.csv. Colunas que o modelo não usa
+        recebem um valor fixo.
+    """
+    rng = np.random.default_rng(semente)
+    dados = {}
+    for original, nome in COLUNAS_ORIGEM.items():
+        if original in _NUMERICAS:
+            dados[original] = rng.choice(_NUMERICAS[original], n)
+        elif nome in MAPAS_ORIGEM:
+            dados[original] = rng.choice(list(MAPAS_ORIGEM[nome]), n)
+        else:
+            dados[original] = np.repeat('-', n)
+    return pd.DataFrame(dados)
+
+
+def por_chamada(funcao, repeticoes=5):
+    "Melhor tempo médio por chamada, em segundos, com o número de chamadas escolhido pelo timeit."
+    cronometro = timeit.Timer(funcao)
+    numero, _ = cronometro.autorange()
+    return min(cronometro.repeat(repeat=repeticoes, number=numero)) / numero
+
+
+def uma_vez(funcao, repeticoes=3):
+    "Melhor tempo de uma chamada, em segundos."
+    return min(timeit.repeat(funcao, number=1, repeat=repeticoes))
+
+
+def carga_em_processo(caminho, repeticoes=3, usar_npz=True):
+    "Melhor tempo de import do pacote + carga do artefato, num processo Python novo."
+    codigo = ("import time; inicio = time.perf_counter(); from previnad import registro; "
+              f"registro.carregar_modelo({caminho!r}, usar_npz={usar_npz!r}); "
+              "print(time.perf_counter() - inicio)")
+    return min(float(subprocess.run([sys.executable, '-c', codigo], check=True, capture_output=True,
+                                    text=True).stdout) for _ in range(repeticoes))
+
+
+def casos(tamanhos, repeticoes=5):
+    """
+    Casos da suíte, na ordem em que rodam.
+
+    Returns:
+        dict: {nome: função sem argumentos que devolve {'segundos', 'linhas'}}.
+    """
+    modelo = registro.carregar_modelo(CAMINHO_MODELO)
+    params = modelo['resultados']
+    colunas_1 = {nome: [valor] for nome, valor in REGISTRO.items()}
+    cache = CachePredicoes()
+    entrada = pd.DataFrame(CODIFICADOR_FORMULARIO.codificar_linha(REGISTRO), columns=MODELO_VARS)
+
+    resultado = {
+        'codificar_legado_1': lambda: {
+            'segundos': por_chamada(lambda: legado.codificar_formulario(**EXEMPLO), repeticoes), 'linhas': 1},
+        'codificar_1': lambda: {
+            'segundos': por_chamada(lambda: CODIFICADOR_FORMULARIO.codificar_linha(REGISTRO), repeticoes),
+            'linhas': 1},
+        'predict_sklearn_1': lambda: {'segundos': por_chamada(lambda: (params.predict(entrada),
+                                                                       params.predict_proba(entrada)),
+                                                                  repeticoes),
+                                      'linhas': 1},
+        'classificar_1': lambda: {'segundos': por_chamada(
+            lambda: inferencia.pontuar_colunas(modelo, CODIFICADOR_FORMULARIO, colunas_1), repeticoes),
+            'linhas': 1},
+        'classificar_cache_1': lambda: {'segundos': por_chamada(
+            lambda: inferencia.pontuar_colunas(modelo, CODIFICADOR_FORMULARIO, colunas_1, cache=cache),
+            repeticoes),
+            'linhas': 1},
+        'carregar_pkl': lambda: {'segundos': carga_em_processo(CAMINHO_MODELO, repeticoes, usar_npz=False),
+                                 'linhas': None},
+        'carregar_pkl_npz': _carregar_pkl_npz(modelo, repeticoes),
+        'carregar_npz': _carregar_npz(modelo, repeticoes),
+    }
+    for n in tamanhos:
+        resultado[f'lote_{n}'] = _lote(modelo, n, repeticoes)
+        resultado[f'arquivo_{n}'] = _arquivo(modelo, n, repeticoes)
+    return resultado
+
+
+def _carregar_npz(modelo, repeticoes):
+    def medir():
+        with tempfile.TemporaryDirectory() as diretorio:
+            caminho = registro.exportar_modelo(modelo, diretorio)
+            return {'segundos': carga_em_processo(caminho, repeticoes), 'linhas': None}
+    return medir
+
+
+def _carregar_pkl_npz(modelo, repeticoes):
+    def medir():
+        with tempfile.TemporaryDirectory() as diretorio:
+            caminho = os.path.join(diretorio, os.path.basename(CAMINHO_MODELO))
+            shutil.copyfile(CAMINHO_MODELO, caminho)
+            registro.exportar_ao_lado(modelo, caminho)
+            return {'segundos': carga_em_processo(caminho, repeticoes), 'linhas': None}
+    return medir
+
+
+def _lote(modelo, n, repeticoes):
+    def medir():
+        df = matriculas_aleatorias(n)
+        return {'segundos': uma_vez(lambda: lote.pontuar_dataframe(df, modelo), repeticoes), 'linhas': n}
+    return medir
+
+
+def _arquivo(modelo, n, repeticoes):
+    def medir():
+        with tempfile.TemporaryDirectory() as diretorio:
+            entrada, saida = os.path.join(diretorio, 'entrada.csv'), os.path.join(diretorio, 'saida.csv')
+            matriculas_aleatorias(n).to_csv(entrada, sep=';', index=False)
+            segundos = uma_vez(lambda: lote.pontuar_arquivo(entrada, 'entrada.csv', saida, 'CSV', modelo),
+                               repeticoes)
+        return {'segundos': segundos, 'linhas': n}
+    return medir
+
+
+def ambiente():
+    "Versões e máquina em que os resultados foram medidos."
+    import sklearn
+
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'scikit-learn': sklearn.__version__,
+        'plataforma': platform.platform(),
+        'cpus': os.cpu_count(),
+        'commit': commit
+    }
+
+
+def executar(tamanhos=TAMANHOS, filtro=None, progresso=None, repeticoes=5):
+    """
+    Roda os casos da suíte.
+
+    Args:
+        tamanhos (list): Tamanhos dos casos lote_<n> e arquivo_<n>.
+        filtro (str, opcional): Só roda os casos cujo nome contém este texto.
+        progresso (callable, opcional): Chamado com (nome, resultado) após cada caso.
+        repeticoes (int): Repetições de cada caso (vale a melhor).
+
+    Returns:
+        dict: {'data', 'ambiente', 'resultados': {nome: {'segundos', 'linhas', 'linhas_por_segundo'}}}.
+    """
+    resultados = {}
+    for nome, medir in casos(tamanhos, repeticoes).items():
+        if filtro and filtro not in nome:
+            continue
+        resultado = medir()
+        if resultado['linhas']:
+            resultado['linhas_por_segundo'] = resultado['linhas'] / resultado['segundos']
+        resultados[nome] = resultado
+        if progresso is not None:
+            progresso(nome, resultado)
+    return {'data': time.strftime('%Y-%m-%dT%H:%M:%S'), 'ambiente': ambiente(), 'resultados': resultados}
+
+
+def comparar(atual, base, tolerancia=0.25):
+    """
+    Compara os tempos com a linha de base.
+
+    Args:
+        atual (dict): Saída de executar.
+        base (dict): Linha de base (também uma saída de executar).
+        tolerancia (float): Aumento relativo de tempo aceito (0.25 = 25% mais lento).
+
+    Returns:
+        list: (nome, segundos na base, segundos agora, razão, regressão?) para
+        cada caso presente nos dois.
+    """
+    linhas = []
+    for nome, resultado in atual['resultados'].items():
+        if nome not in base['resultados']:
+            continue
+        anterior = base['resultados'][nome]['segundos']
+        razao = resultado['segundos'] / anterior
+        linhas.append((nome, anterior, resultado['segundos'], razao, razao > 1 + tolerancia))
+    return linhas
+
+
+def _formatar(segundos):
+    if segundos < 1e-3:
+        return f'{segundos * 1e6:9.1f} us'
+    if segundos < 1:
+        return f'{segundos * 1e3:9.2f} ms'
+    return f'{segundos:9.3f} s '
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--tamanhos', type=int, nargs='+', default=TAMANHOS)
+    parser.add_argument('--casos', help='Só roda os casos cujo nome contém este texto')
+    parser.add_argument('--saida', help=f'Arquivo JSON de resultados (padrão: em {DIRETORIO_RESULTADOS}/)')
+    parser.add_argument('--repeticoes', type=int, default=5, help='Repetições de cada caso (vale a melhor)')
+    parser.add_argument('--linha-base', default=LINHA_BASE)
+    parser.add_argument('--tolerancia', type=float, default=0.25,
+                        help='Aumento relativo de tempo aceito antes de apontar regressão')
+    parser.add_argument('--gravar-linha-base', action='store_true',
+                        help='Grava os resultados como a nova linha de base')
+    args = parser.parse_args(argv)
+
+    def progresso(nome, resultado):
+        vazao = (f"  {resultado['linhas_por_segundo']:12,.0f} linhas/s"
+                 if resultado.get('linhas_por_segundo') and resultado['linhas'] > 1 else '')
+        print(f"{nome:22} {_formatar(resultado['segundos'])}{vazao}")
+
+    atual = executar(args.tamanhos, args.casos, progresso, args.repeticoes)
+
+    saida = args.linha_base if args.gravar_linha_base else args.saida
+    if saida is None:
+        os.makedirs(DIRETORIO_RESULTADOS, exist_ok=True)
+        saida = os.path.join(DIRETORIO_RESULTADOS, f"suite_{time.strftime('%Y%m%d_%H%M%S')}.json")
+    with open(saida, 'w', encoding='utf-8') as arquivo:
+        json.dump(atual, arquivo, ensure_ascii=False, indent=2)
+    print(f"Resultados gravados em {saida}")
+
+    if args.gravar_linha_base or not os.path.exists(args.linha_base):
+        return 0
+    with open(args.linha_base, encoding='utf-8') as arquivo:
+        base = json.load(arquivo)
+    linhas = comparar(atual, base, args.tolerancia)
+    print(f"\nComparação com {args.linha_base} (commit {base['ambiente'].get('commit')}, "
+          f"tolerância {args.tolerancia:.0%}):")
+    for nome, anterior, agora, razao, regressao in linhas:
+        print(f"{nome:22} {_formatar(anterior)} -> {_formatar(agora)}  {razao:5.2f}x"
+              f"{'  REGRESSÃO' if regressao else ''}")
+    regressoes = [linha[0] for linha in linhas if linha[4]]
+    if regressoes:
+        print(f"\n{len(regressoes)} caso(s) mais lentos que a linha de base: {', '.join(regressoes)}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,143 @@
+import os
+
+import streamlit as st
+
+from previnad import lote, registro
+from previnad.carteira import METRICAS_SEGMENTO, Carteira
+from previnad.dominios import COLUNAS_ORIGEM
+
+
+# Mesmo modelo do app (o registro o guarda pelo hash do arquivo)
+CAMINHO_MODELO = os.environ.get('PREVINAD_MODELO', os.path.join('data', 'modelo_final.pkl'))
+
+POSICAO = '(posição da linha)'
+
+NOMES_METRICAS = {
+    'alunos': 'Alunos',
+    'pontuados': 'Pontuados',
+    'inadimplentes_esperados': 'Inadimplentes esperados',
+    'risco_medio': 'Risco médio',
+    'participacao': 'Participação'
+}
+
+
+def ler_base(arquivo, identificador):
+    "Lê a base e usa a coluna identificador como índice (a posição da linha, se não houver)."
+    arquivo.seek(0)
+    df = lote.ler_arquivo(arquivo, arquivo.name)
+    if identificador != POSICAO:
+        df = df.set_index(identificador)
+    return df
+
+
+def grafico_segmentos(rotulos, valores, titulo):
+    "Especificação Vega-Lite das barras dos segmentos, do maior para o menor valor."
+    return {
+        'data': {'values': [{'Segmento': rotulo, 'Valor': float(valor)} for rotulo, valor in zip(rotulos, valores)]},
+        'mark': 'bar',
+        'encoding': {
+            'x': {'field': 'Valor', 'type': 'quantitative', 'title': titulo},
+            'y': {'field': 'Segmento', 'type': 'nominal', 'sort': '-x', 'title': None},
+            'tooltip': [{'field': 'Segmento', 'type': 'nominal'},
+                        {'field': 'Valor', 'type': 'quantitative', 'format': '.3f'}]
+        }
+    }
+
+
+# Configuração da página:
+
+st.set_page_config("PrevInad: carteira", "📊")
+
+st.title("Risco da carteira")
+
+st.markdown("""
+Envie a base de alunos no mesmo formato de `peru_student_enrollment_data_2023.csv` (CSV separado por `;`
+ou Parquet). A base é pontuada uma única vez; os inadimplentes esperados de cada segmento são a soma das
+probabilidades de inadimplência dos seus alunos.
+""")
+
+modelo = registro.carregar_modelo(CAMINHO_MODELO)
+
+arquivo_base = st.file_uploader('Base de alunos:', type=['csv', 'parquet'])
+if arquivo_base is None:
+    st.stop()
+
+# Colunas fora do formato original podem identificar os alunos nas atualizações
+if st.session_state.get('arquivo_carteira') != arquivo_base.file_id:
+    st.session_state.update(arquivo_carteira=arquivo_base.file_id, extras=[
+        coluna for coluna in lote.ler_arquivo(arquivo_base, arquivo_base.name).columns
+        if coluna not in COLUNAS_ORIGEM])
+identificador = st.selectbox('Coluna que identifica o aluno:', [POSICAO] + st.session_state['extras'])
+
+# A carteira fica na sessão: só é pontuada de novo quando a base ou o identificador mudam
+chave = (arquivo_base.file_id, identificador)
+if st.session_state.get('chave_carteira') != chave:
+    with st.spinner('Pontuando a base...'):
+        carteira = Carteira(modelo)
+        carteira.atualizar(ler_base(arquivo_base, identificador))
+    st.session_state.update(carteira=carteira, chave_carteira=chave, atualizacoes=set())
+carteira = st.session_state['carteira']
+if carteira.sincronizar(modelo):
+    st.info('O modelo mudou: a carteira foi pontuada de novo.')
+
+# Atualização incremental (na barra lateral, antes das consultas, para elas já mostrarem os alunos novos):
+
+st.sidebar.header('Atualizar alunos')
+st.sidebar.caption('Envie só os alunos que mudaram, no mesmo formato e com a mesma coluna de identificação '
+                   'da base. Apenas eles são pontuados de novo; alunos com identificação nova entram na carteira.')
+arquivo_alteracoes = st.sidebar.file_uploader('Alunos alterados:', type=['csv', 'parquet'])
+if arquivo_alteracoes is not None and arquivo_alteracoes.file_id not in st.session_state['atualizacoes']:
+    try:
+        contagem = carteira.atualizar(ler_base(arquivo_alteracoes, identificador))
+    except (KeyError, ValueError) as erro:
+        st.sidebar.error(f"Não foi possível atualizar a carteira: {erro}")
+    else:
+        st.session_state['atualizacoes'].add(arquivo_alteracoes.file_id)
+        st.sidebar.success(f"{contagem['alterados']} alunos atualizados e {contagem['novos']} novos.")
+
+resumo = carteira.resumo()
+coluna_alunos, coluna_esperados, coluna_risco = st.columns(3)
+coluna_alunos.metric('Alunos pontuados', f"{resumo['pontuados']:,}".replace(',', '.'))
+coluna_esperados.metric('Inadimplentes esperados', f"{resumo['inadimplentes_esperados']:,.0f}".replace(',', '.'))
+coluna_risco.metric('Risco médio', f"{resumo['risco_medio']:.1%}" if resumo['risco_medio'] is not None else '-')
+if resumo['pontuados'] < resumo['alunos']:
+    st.warning(f"{resumo['alunos'] - resumo['pontuados']} alunos têm valores ausentes ou desconhecidos "
+               "e ficaram fora das somas.")
+
+
+# Segmentos:
+
+st.header('Segmentos')
+
+atributos = st.multiselect('Agrupar por:', carteira.atributos,
+                           default=['CAMPUS'] if 'CAMPUS' in carteira.atributos else carteira.atributos[:1])
+if atributos:
+    criterio = st.selectbox('Ordenar por:', METRICAS_SEGMENTO[2:], format_func=NOMES_METRICAS.get)
+    coluna_n, coluna_minimo = st.columns(2)
+    n = coluna_n.slider('Segmentos de maior risco:', 1, 50, 10)
+    minimo_alunos = coluna_minimo.number_input('Mínimo de alunos pontuados por segmento:', 1, value=30)
+
+    principais = carteira.principais_segmentos(atributos, n, criterio, minimo_alunos)
+    rotulos = principais.index.map(lambda valores: ' / '.join(map(str, valores))
+                                   if isinstance(valores, tuple) else str(valores))
+    st.vega_lite_chart(spec=grafico_segmentos(rotulos, principais[criterio], NOMES_METRICAS[criterio]),
+                       use_container_width=True)
+
+    with st.expander('Todos os segmentos'):
+        st.dataframe(carteira.agregar(atributos).rename(columns=NOMES_METRICAS), column_config={
+            'Inadimplentes esperados': st.column_config.NumberColumn(format='%.1f'),
+            'Risco médio': st.column_config.NumberColumn(format='%.3f'),
+            'Participação': st.column_config.NumberColumn(format='%.3f')
+        })
+
+
+# Tabela cruzada:
+
+st.header('Tabela cruzada')
+
+coluna_linhas, coluna_colunas, coluna_valor = st.columns(3)
+linhas = coluna_linhas.selectbox('Linhas:', carteira.atributos,
+                                 index=carteira.atributos.index('FACULDADE') if 'FACULDADE' in carteira.atributos else 0)
+colunas = coluna_colunas.selectbox('Colunas:', [a for a in carteira.atributos if a != linhas])
+valor = coluna_valor.selectbox('Valor:', METRICAS_SEGMENTO[:4], index=2, format_func=NOMES_METRICAS.get)
+st.dataframe(carteira.pivo(linhas, colunas, valor).round(3))
@@ -0,0 +1,3 @@
+"""
+PrevInad: funções de apoio ao app de predição de inadimplência estudantil.
+"""
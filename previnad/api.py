@@ -0,0 +1,520 @@
+"""
+Serviço HTTP/JSON de pontuação (ASGI), ao lado do app Streamlit.
+
+Rotas:
+    POST /pontuar           Um registro (objeto JSON) ou uma lista de registros.
+                            Por padrão os registros usam os nomes das variáveis do
+                            modelo e as opções do formulário do app, por exemplo
+                            {"GENERO": "Feminino", "CURSO_EM_RISCO": 1, ...}.
+                            Com ?origem=arquivo, usam as colunas e os valores de
+                            peru_student_enrollment_data_2023.csv.
+    POST /cenarios          Cenários "e se" de um aluno (ver previnad.cenarios):
+                            {"base": {registro}, "alternativas": {"TURNO": ["Noite", ...], ...},
+                             "principais": 20, "max_mudancas": 1}. Responde os cenários
+                            ranqueados do que mais reduz ao que menos reduz a
+                            probabilidade de inadimplência, pontuados de uma só vez.
+    POST /desfechos         Desfechos observados de alunos já pontuados, para a
+                            calibração do monitoramento: uma lista de
+                            {"prob_adimplencia": 0.93, "adimplente": 1}, com o
+                            'modelo' (A/B) ou o 'por_modelo' (média) que /pontuar devolveu.
+    GET  /monitoramento     Deriva das entradas e das probabilidades (PSI e KL contra
+                            o treino), calibração e alertas (ver previnad.monitoramento;
+                            um relatório por modelo do conjunto).
+    GET  /saude             Versão do modelo carregado (ou modo, pesos e versões do conjunto).
+    GET  /latencias         Percentis p50/p99 do tempo de resposta de /pontuar.
+    GET  /cache             Acertos e falhas do cache de predições (um por modelo do conjunto).
+    GET  /metricas          Tempo de cada etapa, contadores e estado do cache, no
+                            formato do Prometheus (ou em JSON, com ?formato=json).
+
+Com ?perfil=1, POST /pontuar grava um cProfile e um snapshot do tracemalloc
+da requisição em data/perfis/ (ver metricas.perfil); o relatório sai no
+cabeçalho x-perfil da resposta. Como os pedidos concorrentes são pontuados
+juntos, o perfil inclui o trabalho dos outros pedidos do mesmo micro-lote.
+
+Requisições que chegam ao mesmo tempo são agrupadas (micro-lotes) e pontuadas
+com uma única codificação e uma única chamada ao modelo; perfis já vistos
+saem do cache de predições sem passar pelo modelo. A codificação e a
+pontuação de cada micro-lote rodam numa thread, e o laço de eventos segue
+atendendo as demais rotas (/saude, inclusive) e juntando o próximo
+micro-lote; só um micro-lote com ?perfil=1 é pontuado no próprio laço,
+para entrar no cProfile.
+
+Com a variável de ambiente PREVINAD_CONJUNTO apontando para uma configuração
+de previnad.conjunto, o serviço atende com vários modelos (teste A/B ou média
+das probabilidades), ainda com uma única codificação por micro-lote. Cada
+resultado diz o modelo que o pontuou ('modelo', no A/B) ou a probabilidade
+de cada modelo ('por_modelo', na média).
+
+Uso (na raiz do repositório):
+    uvicorn previnad.api:app
+"""
+import asyncio
+import collections
+import contextlib
+import json
+import os
+import re
+import time
+from urllib.parse import parse_qs
+
+import numpy as np
+
+from previnad import inferencia, metricas, monitoramento, registro
+from previnad.cache import CachePredicoes
+from previnad.dominios import COLUNAS_ORIGEM, ROTULOS_CLASSE
+
+CAMINHO_MODELO = os.environ.get('PREVINAD_MODELO', os.path.join('data', 'modelo_final.pkl'))
+CAMINHO_CONJUNTO = os.environ.get('PREVINAD_CONJUNTO')
+
+_ROTAS = {'/pontuar', '/cenarios', '/desfechos', '/monitoramento', '/saude', '/latencias', '/cache', '/metricas'}
+
+# Nome no modelo -> nome da coluna no arquivo original
+_COLUNAS_ARQUIVO = {nome: original for original, nome in COLUNAS_ORIGEM.items()}
+
+
+class Latencias:
+    """
+    Guarda os tempos de resposta mais recentes para calcular percentis.
+
+    Args:
+        tamanho (int): Quantas medidas recentes manter.
+    """
+
+    def __init__(self, tamanho=10_000):
+        self.medidas = collections.deque(maxlen=tamanho)
+        self.total = 0
+
+    def registrar(self, segundos):
+        self.medidas.append(segundos)
+        self.total += 1
+
+    def resumo(self):
+        "Total de requisições e percentis p50/p99 (em ms) das medidas recentes."
+        if not self.medidas:
+            return {'requisicoes': self.total, 'p50_ms': None, 'p99_ms': None}
+        p50, p99 = np.percentile(np.fromiter(self.medidas, dtype=float), [50, 99]) * 1e3
+        return {'requisicoes': self.total, 'p50_ms': round(p50, 3), 'p99_ms': round(p99, 3)}
+
+
+class Loteador:
+    """
+    Agrupa pedidos concorrentes em micro-lotes pontuados de uma só vez.
+
+    Cada micro-lote fecha quando atinge max_registros ou quando passa
+    espera_maxima segundos desde o primeiro pedido.
+
+    Args:
+        modelo (dict): Modelo carregado pelo registro.
+        max_registros (int): Tamanho máximo de um micro-lote.
+        espera_maxima (float): Espera máxima, em segundos, para juntar pedidos.
+        cache (CachePredicoes, opcional): Cache de predições; por padrão um novo.
+        conjunto (Conjunto, opcional): Vários modelos no lugar de modelo (que
+            pode ser None); cada modelo do conjunto tem o seu cache.
+    """
+
+    def __init__(self, modelo, max_registros=4096, espera_maxima=0.002, cache=None, conjunto=None):
+        self.conjunto = conjunto
+        self.modelo = conjunto.modelo if conjunto is not None else modelo
+        self.cache = cache if cache is not None else CachePredicoes()
+        self.max_registros = max_registros
+        self.espera_maxima = espera_maxima
+        # Montados pelo registro a partir do esquema do modelo (os do conjunto valem para todos)
+        self.codificadores = self.modelo['codificadores']
+        self.tamanhos_lote = collections.deque(maxlen=10_000)
+        self._fila = None
+        self._tarefa = None
+
+    async def pontuar(self, registros, origem='formulario', perfilar=False):
+        """
+        Pontua uma lista de registros, possivelmente junto com outros pedidos.
+
+        Args:
+            registros (list): Registros (dicionários) a pontuar.
+            origem (str): Chave de self.codificadores.
+            perfilar (bool): Pontua o micro-lote no laço de eventos, e não numa
+                thread, para o trabalho entrar no perfil (metricas.perfil) do pedido.
+
+        Returns:
+            list: Um dicionário {'classe', 'prob_adimplencia'} por registro
+            (ambos None para registros com valores ausentes ou desconhecidos),
+            mais 'modelo' ou 'por_modelo' quando há um conjunto de modelos.
+        """
+        if origem not in self.codificadores:
+            raise ValueError(f"Origem desconhecida: {origem}")
+        if self._tarefa is None:
+            self._fila = asyncio.Queue()
+            self._tarefa = asyncio.get_running_loop().create_task(self._processar())
+
+        futuro = asyncio.get_running_loop().create_future()
+        await self._fila.put((registros, origem, futuro, perfilar))
+        return await futuro
+
+    async def _processar(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            pedidos = [await self._fila.get()]
+            total = len(pedidos[0][0])
+            prazo = loop.time() + self.espera_maxima
+
+            while total < self.max_registros:
+                restante = prazo - loop.time()
+                if restante <= 0:
+                    break
+                try:
+                    pedido = await asyncio.wait_for(self._fila.get(), restante)
+                except asyncio.TimeoutError:
+                    break
+                pedidos.append(pedido)
+                total += len(pedido[0])
+
+            self.tamanhos_lote.append(total)
+            for origem in self.codificadores:
+                grupo = [p for p in pedidos if p[1] == origem]
+                if not grupo:
+                    continue
+                argumentos = (grupo, self.codificadores[origem], origem)
+                if any(p[3] for p in grupo):
+                    respostas = self._executar(*argumentos)
+                else:
+                    respostas = await asyncio.to_thread(self._executar, *argumentos)
+                # Os futuros são do laço de eventos: só são resolvidos aqui, fora da thread
+                for futuro, resultado, erro in respostas:
+                    if futuro.done():
+                        continue
+                    if erro is not None:
+                        futuro.set_exception(erro)
+                    else:
+                        futuro.set_result(resultado)
+
+    def _executar(self, pedidos, codificador, origem):
+        """
+        Codifica e pontua todos os registros dos pedidos de uma vez.
+
+        Se o micro-lote falha, cada pedido é pontuado de novo sozinho: o erro
+        de um pedido não chega aos outros que vieram junto.
+
+        Returns:
+            list: (futuro, resultados, erro) de cada pedido; erro é None quando deu certo.
+        """
+        registros = [r for regs, _, _, _ in pedidos for r in regs]
+        if origem == 'arquivo':
+            chaves = {nome: _COLUNAS_ARQUIVO[nome] for nome in codificador.variaveis}
+        else:
+            chaves = {nome: nome for nome in codificador.variaveis}
+        colunas = {nome: [r.get(chave) for r in registros] for nome, chave in chaves.items()}
+
+        try:
+            if self.conjunto is not None:
+                classe, prob, validos, por_modelo = self.conjunto.pontuar_colunas(codificador, colunas)
+            else:
+                classe, prob, validos = inferencia.pontuar_colunas(self.modelo, codificador, colunas,
+                                                                   cache=self.cache)
+        except Exception as erro:
+            if len(pedidos) > 1:
+                return [resposta for pedido in pedidos for resposta in self._executar([pedido], codificador, origem)]
+            return [(pedidos[0][2], None, erro)]
+
+        resultados = [
+            {'classe': ROTULOS_CLASSE[int(c)], 'prob_adimplencia': float(p)} if v
+            else {'classe': None, 'prob_adimplencia': None}
+            for c, p, v in zip(classe, prob, validos)
+        ]
+        if self.conjunto is not None:
+            _detalhar(resultados, self.conjunto, validos, por_modelo)
+        respostas, inicio = [], 0
+        for regs, _, futuro, _ in pedidos:
+            respostas.append((futuro, resultados[inicio:inicio + len(regs)], None))
+            inicio += len(regs)
+        return respostas
+
+
+def _detalhar(resultados, conjunto, validos, por_modelo):
+    "Acrescenta aos resultados o modelo sorteado (A/B) ou a probabilidade de cada modelo (média)."
+    if conjunto.modo == 'ab':
+        escolhido = np.argmax(~np.isnan(por_modelo), axis=1)
+        for resultado, m, v in zip(resultados, escolhido, validos):
+            resultado['modelo'] = conjunto.nomes[m] if v else None
+    else:
+        for resultado, probs, v in zip(resultados, por_modelo, validos):
+            resultado['por_modelo'] = dict(zip(conjunto.nomes, probs.tolist())) if v else None
+
+
+class ServicoPontuacao:
+    """
+    Aplicação ASGI do serviço de pontuação.
+
+    Args:
+        caminho_modelo (str): Artefato carregado pelo registro.
+        caminho_conjunto (str, opcional): Configuração de previnad.conjunto;
+            quando informada, substitui caminho_modelo.
+    """
+
+    def __init__(self, caminho_modelo=CAMINHO_MODELO, caminho_conjunto=CAMINHO_CONJUNTO):
+        self.caminho_modelo = caminho_modelo
+        self.caminho_conjunto = caminho_conjunto
+        self._loteador = None
+        self.latencias = Latencias()
+
+    @property
+    def loteador(self):
+        if self._loteador is None:
+            if self.caminho_conjunto:
+                from previnad.conjunto import carregar_conjunto
+
+                self._loteador = Loteador(None, conjunto=carregar_conjunto(self.caminho_conjunto))
+            else:
+                self._loteador = Loteador(registro.carregar_modelo(self.caminho_modelo))
+            metricas.METRICAS.coletor(self._estado_cache)
+            metricas.METRICAS.coletor(self._estado_monitoramento)
+        return self._loteador
+
+    def _modelos(self):
+        "{nome do modelo: modelo}, ou {None: modelo} com um único modelo."
+        conjunto = self.loteador.conjunto
+        if conjunto is not None:
+            return conjunto.modelos
+        return {None: self.loteador.modelo}
+
+    def _caches(self):
+        "{nome do modelo: CachePredicoes}, ou {None: cache} com um único modelo."
+        conjunto = self.loteador.conjunto
+        if conjunto is not None and conjunto.caches is not None:
+            return conjunto.caches
+        return {None: self.loteador.cache}
+
+    def _estado_cache(self):
+        estado = {}
+        for modelo, cache in self._caches().items():
+            prefixo = 'cache_' if modelo is None else 'cache_' + re.sub(r'\W', '_', modelo) + '_'
+            estado.update({prefixo + nome: valor for nome, valor in cache.estatisticas().items()})
+        return estado
+
+    def _relatorios(self):
+        "{nome do modelo: relatório do monitor}, ou {None: relatório} com um único modelo."
+        return {nome: monitoramento.monitor(modelo).relatorio() for nome, modelo in self._modelos().items()}
+
+    def _estado_monitoramento(self):
+        estado = {}
+        for modelo, relatorio in self._relatorios().items():
+            prefixo = 'monitoramento_' + ('' if modelo is None else re.sub(r'\W', '_', modelo) + '_')
+            estado[prefixo + 'linhas'] = relatorio['linhas']
+            estado[prefixo + 'alertas'] = len(relatorio['alertas'])
+            if relatorio['variaveis']:
+                estado[prefixo + 'psi_maximo'] = relatorio['variaveis'][0]['psi']
+            if relatorio['calibracao']['ece'] is not None:
+                estado[prefixo + 'ece'] = relatorio['calibracao']['ece']
+        return estado
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._ciclo_de_vida(receive, send)
+            return
+        if scope['type'] != 'http':
+            return
+
+        metodo, caminho = scope['method'], scope['path']
+        metricas.contar('requisicoes', rota=caminho if caminho in _ROTAS else 'outra')
+        if metodo == 'POST' and caminho == '/pontuar':
+            await self._pontuar(scope, receive, send)
+        elif metodo == 'POST' and caminho == '/cenarios':
+            await self._cenarios(scope, receive, send)
+        elif metodo == 'POST' and caminho == '/desfechos':
+            await self._desfechos(receive, send)
+        elif metodo == 'GET' and caminho == '/monitoramento':
+            relatorios = self._relatorios()
+            await _responder(send, 200, relatorios[None] if None in relatorios else relatorios)
+        elif metodo == 'GET' and caminho == '/saude':
+            conjunto = self.loteador.conjunto
+            if conjunto is not None:
+                await _responder(send, 200, {'status': 'ok', **conjunto.descricao()})
+            else:
+                modelo = self.loteador.modelo
+                await _responder(send, 200, {'status': 'ok', 'versao': modelo['versao'],
+                                             'metodo': modelo['metodo']})
+        elif metodo == 'GET' and caminho == '/latencias':
+            resumo = self.latencias.resumo()
+            tamanhos = self.loteador.tamanhos_lote
+            resumo['registros_por_lote'] = round(float(np.mean(tamanhos)), 1) if tamanhos else None
+            await _responder(send, 200, resumo)
+        elif metodo == 'GET' and caminho == '/cache':
+            caches = self._caches()
+            if None in caches:
+                await _responder(send, 200, caches[None].estatisticas())
+            else:
+                await _responder(send, 200, {nome: cache.estatisticas() for nome, cache in caches.items()})
+        elif metodo == 'GET' and caminho == '/metricas':
+            self.loteador
+            if _parametro(scope, 'formato') == 'json':
+                await _responder(send, 200, metricas.METRICAS.resumo())
+            else:
+                await _enviar(send, 200, metricas.METRICAS.prometheus().encode('utf-8'),
+                              b'text/plain; version=0.0.4; charset=utf-8')
+        else:
+            await _responder(send, 404, {'erro': 'Rota não encontrada'})
+
+    async def _ciclo_de_vida(self, receive, send):
+        while True:
+            mensagem = await receive()
+            if mensagem['type'] == 'lifespan.startup':
+                # Carrega o modelo antes da primeira requisição
+                self.loteador
+                await send({'type': 'lifespan.startup.complete'})
+            elif mensagem['type'] == 'lifespan.shutdown':
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _pontuar(self, scope, receive, send):
+        inicio = time.perf_counter()
+        perfilar = _parametro(scope, 'perfil') == '1'
+        with metricas.perfil('pontuar') if perfilar else contextlib.nullcontext({}) as perfil:
+            try:
+                corpo = json.loads(await _ler_corpo(receive) or b'null')
+            except ValueError:
+                await _responder(send, 400, {'erro': 'JSON inválido'})
+                return
+
+            registros = corpo if isinstance(corpo, list) else [corpo]
+            if not all(isinstance(r, dict) for r in registros):
+                await _responder(send, 400, {'erro': 'Envie um objeto ou uma lista de objetos'})
+                return
+
+            origem = _parametro(scope, 'origem') or 'formulario'
+            try:
+                resultados = await self.loteador.pontuar(registros, origem, perfilar)
+            except (TypeError, ValueError) as erro:
+                await _responder(send, 400, {'erro': str(erro)})
+                return
+
+        cabecalhos = [(b'x-perfil', perfil['relatorio'].encode())] if 'relatorio' in perfil else []
+        await _responder(send, 200, resultados if isinstance(corpo, list) else resultados[0], cabecalhos)
+        duracao = time.perf_counter() - inicio
+        self.latencias.registrar(duracao)
+        metricas.observar('requisicao_segundos', duracao, rota='/pontuar')
+        metricas.observar('registros_por_requisicao', len(registros))
+
+    async def _cenarios(self, scope, receive, send):
+        from previnad import cenarios
+
+        try:
+            corpo = json.loads(await _ler_corpo(receive) or b'null')
+        except ValueError:
+            await _responder(send, 400, {'erro': 'JSON inválido'})
+            return
+        if not (isinstance(corpo, dict) and isinstance(corpo.get('base'), dict)
+                and isinstance(corpo.get('alternativas'), dict)
+                and all(isinstance(v, list) for v in corpo['alternativas'].values())):
+            await _responder(send, 400, {'erro': 'Envie {"base": {...}, "alternativas": {campo: [valores]}}'})
+            return
+        limites = {'max_mudancas': corpo.get('max_mudancas'), 'principais': corpo.get('principais', 20)}
+        invalidos = [nome for nome, valor in limites.items()
+                     if valor is not None and (type(valor) is not int or valor < 0)]
+        if invalidos:
+            await _responder(send, 400, {'erro': f"Devem ser inteiros não negativos: {invalidos}"})
+            return
+
+        loteador = self.loteador
+        origem = _parametro(scope, 'origem') or 'formulario'
+        if origem not in loteador.codificadores:
+            await _responder(send, 400, {'erro': f"Origem desconhecida: {origem}"})
+            return
+        base, alternativas = corpo['base'], corpo['alternativas']
+        if origem == 'arquivo':
+            base = {COLUNAS_ORIGEM.get(nome, nome): valor for nome, valor in base.items()}
+            alternativas = {COLUNAS_ORIGEM.get(nome, nome): valores for nome, valores in alternativas.items()}
+
+        # A expansão e a pontuação rodam numa thread: os pedidos de /pontuar seguem sendo atendidos
+        try:
+            tabela = await asyncio.to_thread(cenarios.avaliar, loteador.modelo, base, alternativas,
+                                             loteador.codificadores[origem], conjunto=loteador.conjunto)
+        except ValueError as erro:
+            await _responder(send, 400, {'erro': str(erro)})
+            return
+
+        total = len(tabela)
+        base_prob = float(tabela.loc[0, cenarios.COLUNA_INADIMPLENCIA])
+        if limites['max_mudancas'] is not None:
+            tabela = tabela[tabela[cenarios.COLUNA_MUDANCAS] <= limites['max_mudancas']]
+        tabela = tabela.head(limites['principais'] if limites['principais'] is not None else 20)
+        # Os campos voltam com os nomes usados no pedido
+        campos = dict(zip(corpo['alternativas'], alternativas))
+        await _responder(send, 200, {
+            'cenarios': total,
+            'prob_inadimplencia_base': base_prob,
+            'ranking': [{'campos': {pedido: linha[nome] for pedido, nome in campos.items()},
+                         'mudancas': int(linha[cenarios.COLUNA_MUDANCAS]),
+                         'prob_inadimplencia': float(linha[cenarios.COLUNA_INADIMPLENCIA]),
+                         'variacao_inadimplencia': float(linha[cenarios.COLUNA_VARIACAO])}
+                        for linha in tabela.to_dict('records')]
+        })
+
+    async def _desfechos(self, receive, send):
+        try:
+            corpo = json.loads(await _ler_corpo(receive) or b'null')
+        except ValueError:
+            await _responder(send, 400, {'erro': 'JSON inválido'})
+            return
+        itens = corpo if isinstance(corpo, list) else [corpo]
+
+        modelos = self._modelos()
+        # {nome do modelo: (probabilidades, desfechos)}
+        desfechos = collections.defaultdict(lambda: ([], []))
+        try:
+            for item in itens:
+                if item['adimplente'] not in (0, 1):
+                    raise ValueError(f"adimplente={item['adimplente']!r}")
+                adimplente = int(item['adimplente'])
+                if None in modelos:
+                    probs = {None: item['prob_adimplencia']}
+                elif item.get('por_modelo') is not None:
+                    probs = item['por_modelo']
+                else:
+                    probs = {item['modelo']: item['prob_adimplencia']}
+                for nome, prob in probs.items():
+                    if nome not in modelos:
+                        raise KeyError(nome)
+                    if not 0 <= float(prob) <= 1:
+                        raise ValueError(f"prob_adimplencia={prob!r}")
+                    desfechos[nome][0].append(float(prob))
+                    desfechos[nome][1].append(adimplente)
+        except (KeyError, TypeError, ValueError) as erro:
+            await _responder(send, 400, {'erro': f"Desfecho inválido ({erro!r}): envie "
+                                                 '[{"prob_adimplencia": ..., "adimplente": 0 ou 1, '
+                                                 '"modelo" ou "por_modelo" com um conjunto}]'})
+            return
+
+        for nome, (probs, ys) in desfechos.items():
+            monitoramento.monitor(modelos[nome]).registrar_desfechos(np.array(probs), np.array(ys))
+        metricas.contar('desfechos', len(itens))
+        await _responder(send, 200, {'desfechos': len(itens)})
+
+
+async def _ler_corpo(receive):
+    partes = []
+    while True:
+        mensagem = await receive()
+        partes.append(mensagem.get('body', b''))
+        if not mensagem.get('more_body'):
+            return b''.join(partes)
+
+
+def _parametro(scope, nome):
+    "Primeiro valor do parâmetro nome na query string, ou None."
+    return parse_qs(scope.get('query_string', b'').decode()).get(nome, [None])[0]
+
+
+async def _responder(send, status, conteudo, cabecalhos=()):
+    corpo = json.dumps(conteudo, ensure_ascii=False).encode('utf-8')
+    await _enviar(send, status, corpo, b'application/json; charset=utf-8', cabecalhos)
+
+
+async def _enviar(send, status, corpo, tipo, cabecalhos=()):
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', tipo), (b'content-length', str(len(corpo)).encode()),
+                    *cabecalhos]
+    })
+    await send({'type': 'http.response.body', 'body': corpo})
+
+
+app = ServicoPontuacao()
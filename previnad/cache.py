@@ -0,0 +1,114 @@
+"""
+Cache de predições para perfis de aluno repetidos.
+
+Todas as variáveis do modelo têm domínio finito, então o mesmo perfil
+aparece muitas vezes (envios repetidos do formulário, arquivos com alunos
+de perfil idêntico). O cache guarda a classe e a probabilidade de cada
+perfil, usando como chave o vetor codificado na forma compacta canônica do
+Codificador, e é esvaziado sempre que a versão do modelo muda.
+"""
+import collections
+import threading
+import time
+
+import numpy as np
+
+
+class CachePredicoes:
+    """
+    Cache LRU (com validade opcional) de classe e probabilidade por perfil codificado.
+
+    Args:
+        capacidade (int): Número máximo de perfis guardados.
+        validade (float, opcional): Segundos que cada perfil continua válido.
+            None mantém os perfis até saírem pelo LRU ou a versão mudar.
+    """
+
+    def __init__(self, capacidade=100_000, validade=None):
+        self.capacidade = capacidade
+        self.validade = validade
+        self.versao = None
+        self.acertos = 0
+        self.falhas = 0
+        self.invalidacoes = 0
+        self._itens = collections.OrderedDict()
+        self._trava = threading.Lock()
+
+    def __len__(self):
+        return len(self._itens)
+
+    def sincronizar(self, versao):
+        "Esvazia o cache quando a versão (hash) do modelo muda."
+        with self._trava:
+            if versao != self.versao:
+                if self.versao is not None:
+                    self.invalidacoes += 1
+                self._itens.clear()
+                self.versao = versao
+
+    def estatisticas(self):
+        """
+        Contadores do cache.
+
+        'acertos' conta as linhas atendidas sem chamar o modelo (perfil já
+        guardado ou repetido no mesmo lote); 'falhas' conta os perfis que
+        precisaram ser pontuados.
+        """
+        total = self.acertos + self.falhas
+        return {
+            'acertos': self.acertos,
+            'falhas': self.falhas,
+            'taxa_acerto': self.acertos / total if total else None,
+            'perfis': len(self._itens),
+            'invalidacoes': self.invalidacoes
+        }
+
+    def consultar(self, versao, ativos, densas, pontuar):
+        """
+        Devolve classe e probabilidade de cada linha, pontuando só os perfis novos.
+
+        Args:
+            versao (str): Versão do modelo que vai pontuar.
+            ativos, densas: Forma compacta de Codificador.codificar_ativos.
+            pontuar (callable): pontuar(ativos, densas) -> (classes, probabilidades)
+                para os perfis que não estão no cache.
+
+        Returns:
+            tuple: (classes, probabilidades), uma por linha.
+        """
+        self.sincronizar(versao)
+
+        # Uma chave de bytes por linha: índices ativos + bits dos valores numéricos
+        chaves = np.concatenate([ativos.astype(np.int64), densas.view(np.int64)], axis=1)
+        chaves = np.ascontiguousarray(chaves).view(np.dtype((np.void, chaves.shape[1] * 8))).ravel()
+        unicas, primeira, inversa = np.unique(chaves, return_index=True, return_inverse=True)
+
+        classes = np.empty(len(unicas), dtype=np.int64)
+        probs = np.empty(len(unicas))
+        faltando = []
+        agora = time.monotonic()
+
+        bytes_unicas = unicas.tolist()
+        with self._trava:
+            for i, chave in enumerate(bytes_unicas):
+                item = self._itens.get(chave)
+                if item is not None and (self.validade is None or agora - item[2] <= self.validade):
+                    self._itens.move_to_end(chave)
+                    classes[i], probs[i] = item[0], item[1]
+                else:
+                    faltando.append(i)
+
+        if faltando:
+            linhas = primeira[faltando]
+            classes[faltando], probs[faltando] = pontuar(ativos[linhas], densas[linhas])
+
+        with self._trava:
+            for i in faltando:
+                self._itens[bytes_unicas[i]] = (classes[i], probs[i], agora)
+                self._itens.move_to_end(bytes_unicas[i])
+            while len(self._itens) > self.capacidade:
+                self._itens.popitem(last=False)
+            self.falhas += len(faltando)
+            self.acertos += len(inversa) - len(faltando)
+
+        return classes[inversa], probs[inversa]
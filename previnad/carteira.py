@@ -0,0 +1,281 @@
+"""
+Agregação do risco de inadimplência por segmento da base de alunos.
+
+A Carteira pontua a base inteira uma única vez e guarda, numa tabela
+colunar (DataFrame com as colunas de texto como categóricas), os atributos
+de cada aluno e a probabilidade de inadimplência. As consultas são groupby
+vetorizados sobre essa tabela:
+
+- agregar: alunos, inadimplentes esperados (soma das probabilidades) e
+  risco médio por segmento (CAMPUS, FACULDADE, BOLSAS_DESCONTO, TURNO...);
+- pivo: uma métrica cruzando dois atributos;
+- principais_segmentos: os n segmentos de maior risco.
+
+Quando só alguns alunos mudam, atualizar pontua apenas as linhas
+recebidas; as demais probabilidades continuam as guardadas. A tabela pode
+ser gravada em Parquet com a versão do modelo e reaberta sem pontuar de novo.
+
+Uso (na raiz do repositório):
+    python -m previnad.carteira matriculas.csv CAMPUS BOLSAS_DESCONTO
+    python -m previnad.carteira matriculas.csv FACULDADE --principais 5 --criterio risco_medio
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from previnad import inferencia, metricas
+from previnad.dominios import COLUNAS_ORIGEM
+
+COLUNA_RISCO = 'PROB_INADIMPLENCIA'
+
+# Métricas de cada segmento, na ordem das colunas de agregar
+METRICAS_SEGMENTO = ['alunos', 'pontuados', 'inadimplentes_esperados', 'risco_medio', 'participacao']
+
+
+class Carteira:
+    """
+    Base de alunos pontuada, pronta para consultas por segmento.
+
+    O índice do DataFrame recebido identifica cada aluno: atualizar substitui
+    os alunos com o mesmo índice e acrescenta os novos.
+
+    Args:
+        modelo (dict): Modelo carregado pelo registro.
+        cache (CachePredicoes, opcional): Cache de predições por perfil.
+    """
+
+    def __init__(self, modelo, cache=None):
+        self.modelo = modelo
+        self.cache = cache
+        self.codificador = modelo['codificadores']['arquivo']
+        self.dados = pd.DataFrame({COLUNA_RISCO: pd.Series(dtype=float)})
+        self._agregados = {}   # tupla de atributos -> DataFrame de agregar
+
+    def __len__(self):
+        return len(self.dados)
+
+    @property
+    def versao(self):
+        return self.modelo['versao']
+
+    @property
+    def atributos(self):
+        "Colunas pelas quais é possível agrupar."
+        return [coluna for coluna in self.dados.columns if coluna != COLUNA_RISCO]
+
+    def _pontuar(self, df):
+        "Tabela colunar das linhas de df (nomes em português) com a probabilidade de inadimplência."
+        tabela = df.rename(columns=COLUNAS_ORIGEM)
+        tabela = tabela[[coluna for coluna in COLUNAS_ORIGEM.values() if coluna in tabela.columns]]
+        tabela = tabela.astype({coluna: 'category' for coluna in tabela.columns
+                                if not pd.api.types.is_numeric_dtype(tabela[coluna])})
+        _, prob, _ = inferencia.pontuar_colunas(self.modelo, self.codificador, tabela, cache=self.cache)
+        tabela[COLUNA_RISCO] = 1.0 - prob
+        return tabela
+
+    def atualizar(self, df):
+        """
+        Pontua as linhas recebidas e as grava na carteira.
+
+        Só as linhas de df vão ao modelo: alunos já guardados com o mesmo
+        índice são substituídos e os demais, acrescentados.
+
+        Args:
+            df (pd.DataFrame): Alunos no formato de peru_student_enrollment_data_2023.csv.
+
+        Returns:
+            dict: {'novos', 'alterados'}: quantos alunos entraram e quantos foram substituídos.
+
+        Raises:
+            ValueError: Se o índice de df tem valores repetidos.
+        """
+        if not df.index.is_unique:
+            raise ValueError("O índice identifica os alunos e não pode ter valores repetidos")
+        novos = self._pontuar(df)
+        metricas.contar('carteira_linhas', len(novos))
+
+        with metricas.etapa('atualizar_carteira'):
+            alterados = novos.index.isin(self.dados.index)
+            restantes = self.dados.drop(index=novos.index[alterados]) if alterados.any() else self.dados
+            if len(restantes):
+                restantes, novos = _alinhar_categorias(restantes, novos)
+                self.dados = pd.concat([restantes, novos])
+            else:
+                self.dados = novos
+            self._agregados.clear()
+        return {'novos': int((~alterados).sum()), 'alterados': int(alterados.sum())}
+
+    def remover(self, indices):
+        "Retira os alunos com estes índices (os ausentes são ignorados)."
+        self.dados = self.dados.drop(index=indices, errors='ignore')
+        self._agregados.clear()
+
+    def sincronizar(self, modelo):
+        """
+        Troca o modelo e, se a versão mudou, pontua a carteira inteira de novo.
+
+        A codificação parte dos atributos guardados: nas colunas categóricas,
+        cada categoria é traduzida uma única vez.
+
+        Returns:
+            bool: Se a carteira foi pontuada de novo.
+        """
+        mudou = modelo['versao'] != self.versao
+        self.modelo = modelo
+        if not mudou:
+            return False
+        self.codificador = modelo['codificadores']['arquivo']
+        if len(self.dados):
+            _, prob, _ = inferencia.pontuar_colunas(modelo, self.codificador, self.dados, cache=self.cache)
+            self.dados[COLUNA_RISCO] = 1.0 - prob
+        self._agregados.clear()
+        return True
+
+    def agregar(self, por):
+        """
+        Métricas de risco por segmento.
+
+        Args:
+            por (str ou list): Atributo(s) que definem os segmentos.
+
+        Returns:
+            pd.DataFrame: Um segmento por linha (só os que têm alunos), com as colunas:
+                alunos: total de alunos;
+                pontuados: alunos com todos os valores conhecidos;
+                inadimplentes_esperados: soma das probabilidades de inadimplência;
+                risco_medio: inadimplentes_esperados / pontuados;
+                participacao: fração dos inadimplentes esperados da carteira.
+            O resultado é guardado até a próxima alteração da carteira; não o modifique.
+        """
+        por = [por] if isinstance(por, str) else list(por)
+        chave = tuple(por)
+        if chave not in self._agregados:
+            with metricas.etapa('agregar'):
+                risco = self.dados[COLUNA_RISCO]
+                grupos = risco.groupby([self.dados[coluna] for coluna in por], observed=True, sort=True)
+                resultado = grupos.agg(['size', 'count', 'sum'])
+                resultado.columns = ['alunos', 'pontuados', 'inadimplentes_esperados']
+                with np.errstate(invalid='ignore', divide='ignore'):
+                    resultado['risco_medio'] = resultado['inadimplentes_esperados'] / resultado['pontuados']
+                total = resultado['inadimplentes_esperados'].sum()
+                resultado['participacao'] = resultado['inadimplentes_esperados'] / total if total else np.nan
+            self._agregados[chave] = resultado
+        return self._agregados[chave]
+
+    def pivo(self, linhas, colunas, valor='inadimplentes_esperados'):
+        """
+        Uma métrica de agregar cruzando dois atributos.
+
+        Returns:
+            pd.DataFrame: Valores de linhas no índice e de colunas nas colunas;
+            combinações sem alunos ficam NaN.
+        """
+        tabela = self.agregar([linhas, colunas])[valor].unstack(colunas)
+        # Colunas como Index comum (e não categórico), que o Arrow e o Streamlit exibem sem conversão
+        tabela.columns = tabela.columns.astype(object)
+        return tabela
+
+    def principais_segmentos(self, por, n=10, criterio='inadimplentes_esperados', minimo_alunos=1):
+        """
+        Os n segmentos de maior risco.
+
+        Args:
+            por (str ou list): Atributo(s) que definem os segmentos.
+            n (int): Quantos segmentos devolver.
+            criterio (str): Métrica de agregar usada na ordenação (decrescente).
+            minimo_alunos (int): Ignora segmentos com menos alunos pontuados,
+                cujo risco médio varia muito.
+
+        Returns:
+            pd.DataFrame: As linhas de agregar dos n segmentos.
+        """
+        agregados = self.agregar(por)
+        agregados = agregados[agregados['pontuados'] >= minimo_alunos]
+        return agregados.nlargest(n, criterio)
+
+    def resumo(self):
+        "Totais da carteira: alunos, pontuados, inadimplentes esperados e risco médio."
+        risco = self.dados[COLUNA_RISCO]
+        pontuados = int(risco.count())
+        esperados = float(risco.sum())
+        return {'alunos': len(risco), 'pontuados': pontuados, 'inadimplentes_esperados': esperados,
+                'risco_medio': esperados / pontuados if pontuados else None}
+
+    def salvar(self, caminho):
+        """
+        Grava a tabela colunar em Parquet, com a versão do modelo nos metadados.
+
+        Returns:
+            str: caminho.
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        tabela = pa.Table.from_pandas(self.dados)
+        tabela = tabela.replace_schema_metadata({**tabela.schema.metadata,
+                                                 b'previnad_versao': self.versao.encode()})
+        pq.write_table(tabela, caminho)
+        return caminho
+
+    @classmethod
+    def abrir(cls, caminho, modelo, cache=None):
+        """
+        Reabre uma carteira gravada por salvar.
+
+        Se ela foi pontuada por outra versão do modelo, é pontuada de novo
+        (ver sincronizar).
+        """
+        import pyarrow.parquet as pq
+
+        tabela = pq.read_table(caminho)
+        carteira = cls(dict(modelo, versao=tabela.schema.metadata[b'previnad_versao'].decode()), cache)
+        carteira.dados = tabela.to_pandas()
+        carteira.sincronizar(modelo)
+        return carteira
+
+
+def _alinhar_categorias(a, b):
+    "Dá às colunas categóricas de a e b as mesmas categorias, para o concat mantê-las categóricas."
+    uniao = {}
+    for coluna in a.columns.intersection(b.columns):
+        if isinstance(a[coluna].dtype, pd.CategoricalDtype) and isinstance(b[coluna].dtype, pd.CategoricalDtype):
+            categorias = a[coluna].cat.categories.union(b[coluna].cat.categories)
+            if not (categorias.equals(a[coluna].cat.categories) and categorias.equals(b[coluna].cat.categories)):
+                uniao[coluna] = pd.CategoricalDtype(categorias)
+    if not uniao:
+        return a, b
+    return a.astype(uniao), b.astype(uniao)
+
+
+def main(argv=None):
+    from previnad import lote, registro
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('entrada', help='Base de alunos (CSV separado por ; ou Parquet)')
+    parser.add_argument('por', nargs='+', help='Atributo(s) que definem os segmentos (nomes em português)')
+    parser.add_argument('--modelo', default=os.path.join('data', 'modelo_final.pkl'))
+    parser.add_argument('--principais', type=int, help='Mostra só os n segmentos de maior risco')
+    parser.add_argument('--criterio', choices=METRICAS_SEGMENTO, default='inadimplentes_esperados')
+    parser.add_argument('--saida', help='Grava a agregação neste arquivo CSV')
+    args = parser.parse_args(argv)
+
+    carteira = Carteira(registro.carregar_modelo(args.modelo))
+    carteira.atualizar(lote.ler_arquivo(args.entrada, os.path.basename(args.entrada)))
+    if args.principais:
+        resultado = carteira.principais_segmentos(args.por, args.principais, args.criterio)
+    else:
+        resultado = carteira.agregar(args.por)
+
+    resumo = carteira.resumo()
+    print(f"{resumo['pontuados']} de {resumo['alunos']} alunos pontuados; "
+          f"{resumo['inadimplentes_esperados']:.1f} inadimplentes esperados")
+    with pd.option_context('display.max_rows', None, 'display.max_columns', None, 'display.width', 200):
+        print(resultado)
+    if args.saida:
+        resultado.to_csv(args.saida, sep=';')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,159 @@
+"""
+Cenários "e se": o risco de um aluno com outros valores em alguns campos.
+
+A partir de um perfil base e de alternativas para alguns campos (por
+exemplo, outras BOLSAS_DESCONTO, TURNO ou CAMPUS), expandir monta o produto
+cartesiano das alternativas direto na forma compacta do Codificador: o
+perfil base é codificado uma única vez e cada campo variado só troca a sua
+coluna. Todos os cenários são pontuados numa única chamada vetorizada e
+ranquear ordena as intervenções da que mais reduz a probabilidade de
+inadimplência para a que menos reduz.
+
+Uso:
+    from previnad import cenarios, registro
+
+    modelo = registro.carregar_modelo('data/modelo_final.pkl')
+    tabela = cenarios.avaliar(modelo, perfil, {'BOLSAS_DESCONTO': ['Convenios', 'Bolsa Talento'],
+                                               'TURNO': ['Manhã', 'Noite']})
+"""
+import json
+
+import numpy as np
+import pandas as pd
+
+from previnad import inferencia, metricas
+
+# Máximo de cenários de uma consulta (produto dos tamanhos das alternativas)
+LIMITE_CENARIOS = 1_000_000
+
+COLUNA_MUDANCAS = 'MUDANCAS'
+COLUNA_ADIMPLENCIA = 'PROB_ADIMPLENCIA'
+COLUNA_INADIMPLENCIA = 'PROB_INADIMPLENCIA'
+COLUNA_VARIACAO = 'VARIACAO_INADIMPLENCIA'
+
+
+def expandir(codificador, base, alternativas, limite=LIMITE_CENARIOS):
+    """
+    Monta todos os cenários na forma compacta (Codificador.codificar_ativos).
+
+    O valor do perfil base entra sempre como a primeira opção de cada campo
+    variado, de modo que a primeira linha é o próprio perfil base.
+
+    Args:
+        codificador (Codificador): Codificador das opções de base e alternativas.
+        base (dict): {variável: valor} com todas as variáveis do codificador.
+        alternativas (dict): {variável: lista de valores} dos campos variados.
+        limite (int): Máximo de cenários.
+
+    Returns:
+        tuple: Grade (pd.DataFrame com os valores dos campos variados em cada
+        cenário), índices ativos, valores das colunas densas e máscara de
+        linhas válidas (todas, pois os valores são conferidos antes).
+
+    Raises:
+        ValueError: Se um campo não existe, um valor é desconhecido ou não é
+            um valor simples (lista, dicionário) ou há cenários demais.
+    """
+    faltando = [nome for nome in codificador.variaveis if nome not in base]
+    desconhecidos = [nome for nome in alternativas if nome not in codificador.variaveis]
+    if faltando or desconhecidos:
+        raise ValueError(f"Campos ausentes no perfil base: {faltando}; campos desconhecidos: {desconhecidos}")
+
+    compostos = [nome for nome, valores in alternativas.items()
+                 if any(isinstance(valor, (list, dict)) for valor in [base[nome], *valores])]
+    if compostos:
+        raise ValueError(f"Valores devem ser números ou textos, não listas ou objetos, em: {compostos}")
+
+    opcoes = {nome: list(dict.fromkeys([base[nome], *valores])) for nome, valores in alternativas.items()}
+    tamanhos = [len(valores) for valores in opcoes.values()]
+    total = int(np.prod(tamanhos, dtype=np.int64))
+    if total > limite:
+        raise ValueError(f"{total} cenários passam do limite de {limite}; reduza as alternativas")
+
+    with metricas.etapa('codificar'):
+        ativos_base, densas_base, validos_base = codificador.codificar_ativos(
+            {nome: [valor] for nome, valor in base.items()})
+        codificadas = {}
+        for nome, valores in opcoes.items():
+            colunas, numeros, encontrados = codificador.codificar_variavel(nome, valores)
+            if not encontrados.all():
+                raise ValueError(f"Valores desconhecidos em {nome}: "
+                                 f"{[v for v, ok in zip(valores, encontrados) if not ok]}")
+            codificadas[nome] = (colunas, numeros)
+        if not validos_base[0]:
+            raise ValueError(f"Valor desconhecido no perfil base: {base}")
+
+    with metricas.etapa('cenarios'):
+        # Uma linha de índices por campo variado: o cenário i usa a opção indices[k, i] do campo k
+        indices = np.indices(tamanhos).reshape(len(tamanhos), total)
+        ativos = np.empty((total, ativos_base.shape[1]), dtype=np.intp, order='F')
+        ativos[:] = ativos_base
+        densas = np.repeat(densas_base, total, axis=0)
+
+        posicao_categorica = {nome: k for k, nome in enumerate(codificador.categoricas)}
+        posicao_densa = {nome: j for j, (_, nome, _, _) in enumerate(codificador.densas)}
+        grade = {}
+        for k, (nome, (colunas, numeros)) in enumerate(codificadas.items()):
+            if nome in posicao_categorica:
+                ativos[:, posicao_categorica[nome]] = colunas[indices[k]]
+            else:
+                densas[:, posicao_densa[nome]] = numeros[indices[k]]
+            rotulos = np.empty(len(opcoes[nome]), dtype=object)
+            rotulos[:] = opcoes[nome]
+            grade[nome] = rotulos[indices[k]]
+        metricas.contar('cenarios', total)
+    return pd.DataFrame(grade), ativos, densas, np.ones(total, dtype=bool)
+
+
+def ranquear(grade, prob):
+    """
+    Ordena os cenários da menor para a maior probabilidade de inadimplência.
+
+    Args:
+        grade (pd.DataFrame): Grade de expandir (a primeira linha é o perfil base).
+        prob (np.ndarray): Probabilidade de adimplência de cada cenário.
+
+    Returns:
+        pd.DataFrame: A grade com as colunas MUDANCAS (campos diferentes do
+        perfil base), PROB_ADIMPLENCIA, PROB_INADIMPLENCIA e
+        VARIACAO_INADIMPLENCIA (diferença para o perfil base; negativa quando
+        o cenário reduz o risco). Empates ficam com o cenário de menos mudanças
+        primeiro; o índice é a posição do cenário na grade (0 é o perfil base).
+    """
+    tabela = grade.copy()
+    tabela[COLUNA_MUDANCAS] = (grade != grade.iloc[0]).sum(axis=1) if len(grade.columns) else 0
+    tabela[COLUNA_ADIMPLENCIA] = prob
+    tabela[COLUNA_INADIMPLENCIA] = 1.0 - prob
+    tabela[COLUNA_VARIACAO] = tabela[COLUNA_INADIMPLENCIA] - tabela[COLUNA_INADIMPLENCIA].iloc[0]
+    return tabela.sort_values([COLUNA_INADIMPLENCIA, COLUNA_MUDANCAS], kind='stable')
+
+
+def avaliar(modelo, base, alternativas, codificador=None, cache=None, conjunto=None, limite=LIMITE_CENARIOS):
+    """
+    Pontua todos os cenários de um perfil numa única chamada e os ranqueia.
+
+    Args:
+        modelo (dict): Modelo carregado pelo registro (ignorado com conjunto).
+        base, alternativas, limite: Ver expandir.
+        codificador (Codificador, opcional): Por padrão, o do formulário do modelo
+            (modelo['codificadores']['formulario']).
+        cache (CachePredicoes, opcional): Cache de predições por perfil.
+        conjunto (Conjunto, opcional): Vários modelos no lugar de modelo. No
+            modo 'ab', todos os cenários de um perfil base vão para o mesmo
+            modelo, para as probabilidades serem comparáveis.
+
+    Returns:
+        pd.DataFrame: Ver ranquear.
+    """
+    if codificador is None:
+        codificador = (conjunto.modelo if conjunto is not None else modelo)['codificadores']['formulario']
+    grade, ativos, densas, validos = expandir(codificador, base, alternativas, limite)
+    if conjunto is not None:
+        chave = json.dumps(base, sort_keys=True, default=str)
+        _, prob, _, _ = conjunto.pontuar_codificadas(codificador, ativos, densas, validos,
+                                                     chaves=[chave] * len(validos), monitorar=False)
+    else:
+        # Os cenários não são alunos reais: ficam fora do monitoramento de deriva
+        _, prob, _ = inferencia.pontuar_codificadas(modelo, codificador, ativos, densas, validos, cache=cache,
+                                                    monitorar=False)
+    return ranquear(grade, prob)
@@ -0,0 +1,346 @@
+"""
+Codificação das respostas do formulário e dos arquivos de matrícula.
+
+O Codificador é montado uma única vez: para cada variável ele guarda uma
+tabela ordenada com os rótulos aceitos e, para cada rótulo, a coluna (ou o
+valor) que deve ser escrita na matriz de entrada do modelo. A mesma função
+serve para uma linha (formulário) ou para milhões de linhas (arquivos).
+
+Os codificadores de um modelo saem do seu esquema compilado (ver
+previnad.esquema): colunas, vocabulário de cada variável e escala min-max.
+"""
+import numpy as np
+
+from previnad.dominios import (ESCALA_PADRAO, MAPAS_FORMULARIO, MAPAS_ORIGEM,
+                               MODELO_VARS, VALORES_FORMULARIO)
+from previnad.esquema import compilar_esquema
+
+
+def _compilar(tabela):
+    """
+    Ordena os rótulos de uma tabela {rótulo: destino} para busca binária.
+
+    Returns:
+        tuple: Rótulos ordenados (np.str_) e destinos na mesma ordem.
+    """
+    rotulos = np.array(sorted(str(r) for r in tabela))
+    por_texto = {str(r): d for r, d in tabela.items()}
+    destinos = np.array([por_texto[r] for r in rotulos])
+    return rotulos, destinos
+
+
+def _consultar(compilada, valores):
+    """
+    Procura cada valor na tabela compilada.
+
+    Colunas categóricas do pandas são consultadas só pelas categorias e
+    depois expandidas pelos códigos.
+
+    Returns:
+        tuple: Destino de cada valor e máscara dos valores encontrados.
+    """
+    rotulos, destinos = compilada
+
+    if hasattr(valores, 'cat'):
+        codigos = valores.cat.codes.to_numpy()
+        destino_cat, encontrado_cat = _consultar(compilada, valores.cat.categories.to_numpy())
+        presentes = codigos >= 0
+        return destino_cat[codigos], encontrado_cat[codigos] & presentes
+
+    valores = np.atleast_1d(np.asarray(valores))
+    if valores.dtype.kind != 'U':
+        valores = valores.astype(str)
+
+    posicoes = np.searchsorted(rotulos, valores)
+    np.minimum(posicoes, len(rotulos) - 1, out=posicoes)
+    encontrados = rotulos[posicoes] == valores
+    return destinos[posicoes], encontrados
+
+
+def _numeros(compilada, escala, valores):
+    "Valor numérico de uma variável densa: pela tabela compilada ou pela normalização min-max."
+    if compilada is not None:
+        return _consultar(compilada, valores)
+    minimo, amplitude = escala
+    numeros = _como_numeros(valores)
+    return (numeros - minimo) / amplitude, ~np.isnan(numeros)
+
+
+def _como_numeros(valores):
+    "Valores como float; os que não são números viram NaN (linha inválida) em vez de abortar o lote."
+    try:
+        return np.atleast_1d(np.asarray(valores, dtype=float))
+    except (TypeError, ValueError):
+        import pandas as pd
+
+        objetos = np.atleast_1d(np.asarray(valores, dtype=object))
+        return pd.to_numeric(pd.Series(objetos), errors='coerce').to_numpy(dtype=float)
+
+
+class Codificador:
+    """
+    Codificador pré-compilado das variáveis do modelo.
+
+    Além da matriz densa, o codificador gera uma forma compacta da entrada
+    (ver codificar_ativos): para cada variável categórica, apenas o índice da
+    dummy ativa, e para as demais o valor numérico. A forma compacta segue a
+    ordem das colunas em modelo_vars, então dois codificadores com o mesmo
+    modelo_vars geram a mesma forma compacta para o mesmo vetor de entrada.
+
+    Args:
+        categoricas (dict): {variável: {rótulo: categoria do modelo}} das variáveis
+            que viram dummies. A categoria base (sem coluna em modelo_vars) zera todas.
+        valores (dict): {variável: {rótulo: número}} das variáveis que entram
+            diretamente como número (binárias e sliders do formulário).
+        escala (dict): {variável: (mínimo, máximo)} das variáveis normalizadas por min-max.
+        modelo_vars (list): Ordem das colunas esperada pelo modelo.
+    """
+
+    def __init__(self, categoricas, valores=None, escala=None, modelo_vars=MODELO_VARS):
+        self.modelo_vars = list(modelo_vars)
+        posicao = {nome: i for i, nome in enumerate(self.modelo_vars)}
+
+        # Índice usado no lugar da dummy quando a categoria é a base (nenhuma coluna ativa)
+        self.sentinela = len(self.modelo_vars)
+
+        # rótulo -> índice da coluna da dummy (sentinela para a categoria base),
+        # na ordem da primeira coluna de cada variável
+        compiladas = {
+            nome: _compilar({rotulo: posicao.get(f'{nome}_{categoria}', self.sentinela)
+                             for rotulo, categoria in tabela.items()})
+            for nome, tabela in categoricas.items()
+        }
+        self.categoricas = dict(sorted(compiladas.items(), key=lambda item: item[1][1].min()))
+
+        # Variáveis numéricas, na ordem das colunas: (coluna, nome, tabela compilada ou None,
+        # (mínimo, amplitude) da normalização min-max ou None)
+        densas = [(posicao[nome], nome, _compilar(tabela), None)
+                  for nome, tabela in (valores or {}).items()]
+        densas += [(posicao[nome], nome, None, (minimo, maximo - minimo))
+                   for nome, (minimo, maximo) in (escala or {}).items()]
+        self.densas = sorted(densas, key=lambda item: item[0])
+
+        # Nomes das variáveis de entrada que o codificador espera
+        self.variaveis = [nome for _, nome, _, _ in self.densas] + list(self.categoricas)
+        # Colunas da matriz que recebem valores numéricos, na ordem de codificar_ativos
+        self.colunas_densas = np.array([coluna for coluna, _, _, _ in self.densas], dtype=np.intp)
+
+        cobertas = set(self.colunas_densas.tolist())
+        for rotulos, destinos in self.categoricas.values():
+            cobertas |= set(destinos.tolist())
+        faltando = [nome for i, nome in enumerate(self.modelo_vars) if i not in cobertas]
+        if faltando:
+            raise ValueError(f"Variáveis do modelo sem regra de codificação: {faltando}")
+
+    def codificar_ativos(self, colunas):
+        """
+        Codifica as colunas na forma compacta (índices das dummies ativas + valores numéricos).
+
+        Args:
+            colunas: Qualquer objeto indexável por nome de variável (dict de
+                listas/arrays, DataFrame...), com o mesmo número de linhas em todas.
+                Valores escalares são tratados como uma única linha.
+
+        Returns:
+            tuple: Índices ativos (n_linhas x n_categoricas, com a sentinela
+            para a categoria base), valores das colunas_densas
+            (n_linhas x len(colunas_densas)) e máscara booleana das linhas em
+            que todos os valores eram conhecidos. Linhas inválidas ficam só com
+            a sentinela e zeros.
+        """
+        primeira = colunas[self.variaveis[0]]
+        n = 1 if np.ndim(primeira) == 0 else len(primeira)
+        # Ordem de coluna (Fortran): cada variável fica contígua para a soma no motor de inferência
+        ativos = np.empty((n, len(self.categoricas)), dtype=np.intp, order='F')
+        densas = np.empty((n, len(self.densas)))
+        validos = np.ones(n, dtype=bool)
+
+        for j, (_, nome, compilada, escala) in enumerate(self.densas):
+            numeros, encontrados = _numeros(compilada, escala, colunas[nome])
+            densas[:, j] = numeros
+            validos &= encontrados
+
+        for k, (nome, compilada) in enumerate(self.categoricas.items()):
+            destinos, encontrados = _consultar(compilada, colunas[nome])
+            ativos[:, k] = destinos
+            validos &= encontrados
+
+        ativos[~validos] = self.sentinela
+        densas[~validos] = 0.0
+        return ativos, densas, validos
+
+    def codificar_variavel(self, nome, valores):
+        """
+        Codifica os valores de uma única variável.
+
+        Args:
+            nome (str): Variável de entrada (uma de self.variaveis).
+            valores: Valores da variável.
+
+        Returns:
+            tuple: Coluna da matriz escrita por cada valor (a sentinela para a
+            categoria base), valor escrito nela (1.0 para as dummies) e máscara
+            dos valores encontrados.
+        """
+        if nome in self.categoricas:
+            colunas, encontrados = _consultar(self.categoricas[nome], valores)
+            return colunas, np.ones(len(colunas)), encontrados
+        for coluna, nome_densa, compilada, escala in self.densas:
+            if nome_densa == nome:
+                numeros, encontrados = _numeros(compilada, escala, valores)
+                return np.full(len(numeros), coluna, dtype=np.intp), numeros, encontrados
+        raise KeyError(nome)
+
+    def densificar(self, ativos, densas, saida=None):
+        """
+        Monta a matriz densa (n_linhas x len(modelo_vars)) a partir da forma compacta.
+
+        Args:
+            ativos, densas: Saída de codificar_ativos.
+            saida (np.ndarray, opcional): Matriz float64 pré-alocada com
+                len(modelo_vars) colunas, reaproveitada entre chamadas.
+        """
+        n = len(ativos)
+        if saida is None:
+            saida = np.zeros((n, len(self.modelo_vars)))
+        else:
+            saida = saida[:n]
+            saida.fill(0.0)
+
+        saida[:, self.colunas_densas] = densas
+        linhas, k = np.nonzero(ativos != self.sentinela)
+        saida[linhas, ativos[linhas, k]] = 1.0
+        return saida
+
+    def esparsa(self, ativos, densas):
+        """
+        Monta a matriz CSR (n_linhas x len(modelo_vars)) a partir da forma compacta.
+
+        Cada linha guarda só as dummies ativas e as colunas numéricas não
+        nulas, em vez das len(modelo_vars) colunas da matriz densa.
+
+        Args:
+            ativos, densas: Saída de codificar_ativos.
+
+        Returns:
+            scipy.sparse.csr_matrix: Matriz de entrada do modelo.
+        """
+        from scipy import sparse
+
+        n = len(ativos)
+        colunas = np.concatenate([np.broadcast_to(self.colunas_densas, densas.shape), ativos], axis=1)
+        valores = np.concatenate([densas, np.ones(ativos.shape)], axis=1)
+        presentes = (colunas != self.sentinela) & (valores != 0.0)
+
+        contagens = presentes.sum(axis=1)
+        tipo_indice = np.int32 if contagens.sum() < np.iinfo(np.int32).max else np.int64
+        indptr = np.zeros(n + 1, dtype=tipo_indice)
+        np.cumsum(contagens, out=indptr[1:])
+        return sparse.csr_matrix((valores[presentes], colunas[presentes].astype(tipo_indice), indptr),
+                                 shape=(n, len(self.modelo_vars)))
+
+    def codificar_esparsa(self, colunas):
+        """
+        Mesmo que codificar, mas devolvendo a matriz em formato CSR (ver esparsa).
+
+        Returns:
+            tuple: Matriz CSR e máscara booleana das linhas válidas (linhas inválidas ficam vazias).
+        """
+        ativos, densas, validos = self.codificar_ativos(colunas)
+        return self.esparsa(ativos, densas), validos
+
+    def codificar(self, colunas, saida=None):
+        """
+        Escreve a matriz de entrada do modelo a partir de colunas de valores.
+
+        Args:
+            colunas: Mesmo formato de codificar_ativos.
+            saida (np.ndarray, opcional): Matriz float64 pré-alocada com
+                len(modelo_vars) colunas, reaproveitada entre chamadas.
+
+        Returns:
+            tuple: Matriz (n_linhas x len(modelo_vars)) e máscara booleana das
+            linhas em que todos os valores eram conhecidos. Linhas inválidas
+            ficam zeradas.
+        """
+        ativos, densas, validos = self.codificar_ativos(colunas)
+        return self.densificar(ativos, densas, saida), validos
+
+    def codificar_linha(self, registro, saida=None):
+        """
+        Codifica um único aluno (por exemplo, as respostas do formulário).
+
+        Args:
+            registro (dict): {variável: valor}.
+            saida (np.ndarray, opcional): Matriz 1 x len(modelo_vars) pré-alocada.
+
+        Returns:
+            np.ndarray: Matriz 1 x len(modelo_vars).
+
+        Raises:
+            ValueError: Se algum valor não pertence ao domínio da variável.
+        """
+        X, validos = self.codificar(registro, saida)
+        if not validos[0]:
+            raise ValueError(f"Valor desconhecido em: {registro}")
+        return X
+
+
+def codificador_esquema(esquema, mapas, numeros):
+    """
+    Cria um codificador a partir do esquema compilado de um modelo.
+
+    Os rótulos cujas categorias não estão no vocabulário do esquema ficam de
+    fora das tabelas: as linhas com eles são inválidas.
+
+    Args:
+        esquema (dict): Esquema de previnad.esquema.compilar_esquema.
+        mapas (dict): {variável categórica: {rótulo: categoria do modelo}}.
+        numeros (dict): {variável densa: {rótulo: valor bruto}}. As variáveis
+            densas que não estão aqui são lidas como número.
+
+    Returns:
+        Codificador: Com a normalização min-max do esquema nas variáveis densas.
+    """
+    categoricas = {}
+    for nome, info in esquema['categoricas'].items():
+        vocabulario = set(info['base']) | set(info['categorias'])
+        categoricas[nome] = {rotulo: categoria for rotulo, categoria in mapas[nome].items()
+                             if categoria in vocabulario}
+
+    valores, escala = {}, {}
+    for nome, (minimo, maximo) in esquema['densas'].items():
+        if nome in numeros:
+            valores[nome] = {rotulo: (bruto - minimo) / (maximo - minimo)
+                             for rotulo, bruto in numeros[nome].items()}
+        else:
+            escala[nome] = (minimo, maximo)
+    return Codificador(categoricas, valores, escala, esquema['colunas'])
+
+
+def codificador_arquivo(esquema):
+    "Codificador para arquivos no formato de peru_student_enrollment_data_2023.csv."
+    return codificador_esquema(esquema, MAPAS_ORIGEM, {'DEFICIENCIA': MAPAS_ORIGEM['DEFICIENCIA']})
+
+
+def codificador_formulario(esquema):
+    "Codificador para as respostas do formulário do app."
+    return codificador_esquema(esquema, MAPAS_FORMULARIO, VALORES_FORMULARIO)
+
+
+def codificador_origem(escala, modelo_vars=MODELO_VARS):
+    """
+    Cria o codificador para arquivos no formato de peru_student_enrollment_data_2023.csv.
+
+    Para um modelo carregado pelo registro, prefira modelo['codificadores']['arquivo'],
+    montado uma única vez a partir do esquema gravado com o artefato.
+
+    Args:
+        escala (list): Limites min-max salvos em modelo['escala'].
+        modelo_vars (list): Ordem das colunas do modelo (a do modelo treinado, por padrão).
+    """
+    return codificador_arquivo(compilar_esquema(modelo_vars, escala))
+
+
+# Codificador das respostas do formulário para o modelo_final.pkl (montado na importação)
+CODIFICADOR_FORMULARIO = codificador_formulario(compilar_esquema(MODELO_VARS, ESCALA_PADRAO))
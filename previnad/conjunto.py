@@ -0,0 +1,265 @@
+"""
+Vários modelos servidos ao mesmo tempo: teste A/B ou média das probabilidades.
+
+O Conjunto recebe modelos já carregados pelo registro (por exemplo, os
+candidatos gravados por python -m previnad.treino --candidatos) e pontua
+de dois modos:
+
+- 'ab': cada linha vai para um único modelo, sorteado pelos pesos (fração do
+  tráfego de cada um). O sorteio é um hash do perfil codificado (ou da chave
+  informada, por exemplo a identificação do aluno), então o mesmo aluno cai
+  sempre no mesmo modelo e cada linha é pontuada uma vez só;
+- 'media': todos os modelos pontuam todas as linhas e a probabilidade é a
+  média ponderada pelos pesos.
+
+A codificação (Codificador.codificar_ativos) roda uma única vez por chamada
+e a forma compacta é compartilhada por todos os modelos. Os modelos rodam em
+paralelo num pool de threads, com um cache de predições para cada um. Sem
+cache, os modelos que não têm o motor NumPy também compartilham a matriz
+densa (ou esparsa) montada uma única vez.
+
+O arquivo de configuração é um JSON como:
+    {"modo": "ab", "modelos": {"atual": {"caminho": "data/modelo_final.pkl", "peso": 0.9},
+                               "floresta": {"caminho": "data/candidatos/modelo_Forest.pkl", "peso": 0.1}}}
+"""
+import hashlib
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from previnad import inferencia, metricas, monitoramento
+from previnad.cache import CachePredicoes
+
+MODOS = ('ab', 'media')
+
+# Multiplicadores ímpares fixos do hash das linhas: o sorteio é o mesmo em qualquer processo
+_MULTIPLICADORES = np.random.default_rng(20230301).integers(1, 2**63, size=256, dtype=np.uint64) | np.uint64(1)
+
+
+def _misturar(h):
+    "Finalizador do splitmix64: espalha os bits de cada hash (uint64)."
+    h = h ^ (h >> np.uint64(30))
+    h = h * np.uint64(0xBF58476D1CE4E5B9)
+    h = h ^ (h >> np.uint64(27))
+    h = h * np.uint64(0x94D049BB133111EB)
+    return h ^ (h >> np.uint64(31))
+
+
+def sorteio_linhas(ativos, densas, chaves=None):
+    """
+    Número em [0, 1) fixo para cada linha, usado no roteamento A/B.
+
+    Args:
+        ativos, densas: Forma compacta de Codificador.codificar_ativos.
+        chaves (array-like, opcional): Identificação de cada linha; sem ela,
+            o sorteio depende só do perfil codificado.
+
+    Returns:
+        np.ndarray: Um float por linha.
+    """
+    with np.errstate(over='ignore'):
+        if chaves is not None:
+            import pandas as pd
+
+            h = pd.util.hash_array(np.asarray(chaves, dtype=object))
+        else:
+            colunas = np.concatenate([ativos.astype(np.uint64),
+                                      np.ascontiguousarray(densas).view(np.uint64)], axis=1)
+            if colunas.shape[1] > len(_MULTIPLICADORES):
+                raise ValueError("Colunas demais para o hash das linhas")
+            h = (colunas * _MULTIPLICADORES[:colunas.shape[1]]).sum(axis=1, dtype=np.uint64)
+        return (_misturar(h) >> np.uint64(11)) * (1.0 / 2**53)
+
+
+class Conjunto:
+    """
+    Serve vários modelos compatíveis com uma única codificação.
+
+    Os modelos precisam do mesmo esquema (mesmas colunas, vocabulário e
+    escala min-max; ver previnad.esquema), para a forma compacta de um
+    codificador valer para todos.
+
+    Args:
+        modelos (dict): {nome: modelo carregado pelo registro}.
+        pesos (dict, opcional): {nome: peso}; padrão: pesos iguais. No modo
+            'ab' é a fração do tráfego de cada modelo; no modo 'media', o peso
+            na média das probabilidades. São normalizados para somar 1.
+        modo (str): 'ab' ou 'media'.
+        threads (int, opcional): Tamanho do pool; padrão: um por modelo.
+        cache (bool): Mantém um cache de predições para cada modelo.
+
+    Raises:
+        ValueError: Se os modelos não são compatíveis ou os pesos e o modo são inválidos.
+    """
+
+    def __init__(self, modelos, pesos=None, modo='ab', threads=None, cache=True):
+        if not modelos:
+            raise ValueError("Informe ao menos um modelo")
+        if modo not in MODOS:
+            raise ValueError(f"Modo desconhecido: {modo} (use um de {MODOS})")
+        self.modelos = dict(modelos)
+        self.nomes = list(self.modelos)
+        self.modo = modo
+
+        referencia = self.modelos[self.nomes[0]]
+        for nome, modelo in self.modelos.items():
+            if modelo['esquema']['hash'] != referencia['esquema']['hash']:
+                raise ValueError(f"O modelo {nome} tem outro esquema (variáveis, categorias ou escala) "
+                                 f"que {self.nomes[0]}")
+        # Referência dos codificadores (o esquema é o de todos)
+        self.modelo = referencia
+
+        pesos = pesos or {}
+        desconhecidos = set(pesos) - set(self.nomes)
+        if desconhecidos:
+            raise ValueError(f"Pesos de modelos que não estão no conjunto: {sorted(desconhecidos)}")
+        valores = np.array([float(pesos.get(nome, 1.0)) for nome in self.nomes])
+        if (valores < 0).any() or valores.sum() <= 0:
+            raise ValueError("Os pesos precisam ser não negativos e com soma positiva")
+        self.pesos = valores / valores.sum()
+        self._limites = np.cumsum(self.pesos)
+
+        self.caches = {nome: CachePredicoes() for nome in self.nomes} if cache else None
+        self._pool = ThreadPoolExecutor(threads or len(self.nomes), thread_name_prefix='previnad-conjunto')
+
+        # Versão do conjunto: muda com os modelos, os pesos ou o modo
+        texto = json.dumps([modo, [(nome, self.modelos[nome]['versao'], float(peso))
+                                   for nome, peso in zip(self.nomes, self.pesos)]])
+        self.versao = hashlib.sha256(texto.encode()).hexdigest()[:12]
+
+    def descricao(self):
+        "Modo, pesos, método e versão de cada modelo."
+        return {
+            'modo': self.modo,
+            'versao': self.versao,
+            'modelos': {nome: {'peso': float(peso), 'metodo': self.modelos[nome]['metodo'],
+                               'versao': self.modelos[nome]['versao']}
+                        for nome, peso in zip(self.nomes, self.pesos)}
+        }
+
+    def rotear(self, ativos, densas, chaves=None):
+        "Índice (em self.nomes) do modelo que atende cada linha no modo 'ab'."
+        posicoes = np.searchsorted(self._limites, sorteio_linhas(ativos, densas, chaves), side='right')
+        return np.minimum(posicoes, len(self.nomes) - 1)
+
+    def pontuar_colunas(self, codificador, colunas, chaves=None):
+        """
+        Codifica as colunas uma única vez e pontua com os modelos do conjunto.
+
+        Ver pontuar_codificadas.
+        """
+        with metricas.etapa('codificar'):
+            ativos, densas, validos = codificador.codificar_ativos(colunas)
+        return self.pontuar_codificadas(codificador, ativos, densas, validos, chaves)
+
+    def pontuar_codificadas(self, codificador, ativos, densas, validos, chaves=None, monitorar=True):
+        """
+        Pontua linhas já na forma compacta (Codificador.codificar_ativos).
+
+        Args:
+            codificador (Codificador): Codificador que gerou a forma compacta.
+            ativos, densas, validos: Saída de codificar_ativos.
+            chaves (array-like, opcional): Identificação de cada linha, para o roteamento A/B.
+            monitorar (bool): Registra as linhas de cada modelo no seu monitor
+                de deriva (ver inferencia.pontuar_codificadas).
+
+        Returns:
+            tuple: Classe prevista, probabilidade de adimplência, máscara das
+            linhas válidas e matriz n_linhas x len(self.nomes) com a
+            probabilidade dada por cada modelo (NaN onde o modelo não pontuou:
+            no modo 'ab', só o modelo sorteado pontua cada linha).
+        """
+        n = len(validos)
+        por_modelo = np.full((n, len(self.nomes)), np.nan)
+        if self.modo == 'ab':
+            rota = self.rotear(ativos, densas, chaves)
+            linhas = {m: np.flatnonzero(rota == m) for m in range(len(self.nomes))}
+        else:
+            todas = np.arange(n)
+            linhas = {m: todas for m in range(len(self.nomes))}
+        linhas = {m: indices for m, indices in linhas.items() if len(indices)}
+
+        matrizes = self._matrizes(codificador, ativos, densas, linhas)
+        with metricas.etapa('conjunto'):
+            tarefas = {m: self._pool.submit(self._pontuar_modelo, m, codificador, ativos, densas,
+                                            validos, indices, matrizes)
+                       for m, indices in linhas.items()}
+            classe = np.zeros(n, dtype=int)
+            prob = np.full(n, np.nan)
+            for m, tarefa in tarefas.items():
+                classe_m, prob_m = tarefa.result()
+                por_modelo[linhas[m], m] = prob_m
+                if self.modo == 'ab':
+                    classe[linhas[m]], prob[linhas[m]] = classe_m, prob_m
+                if monitorar:
+                    indices = linhas[m]
+                    monitoramento.registrar(self.modelos[self.nomes[m]], codificador, ativos[indices],
+                                            densas[indices], validos[indices], prob_m)
+                metricas.contar('linhas_modelo', len(linhas[m]), modelo=self.nomes[m])
+
+        if self.modo == 'media':
+            prob = por_modelo @ self.pesos
+            classe = (prob > 0.5).astype(int)
+        return classe, prob, validos, por_modelo
+
+    def _matrizes(self, codificador, ativos, densas, linhas):
+        """
+        Matriz densa e/ou esparsa de todas as linhas, montada uma única vez para
+        os modelos sem motor NumPy, quando não há cache (com cache, cada modelo
+        só monta a matriz dos perfis que não estão no seu cache).
+        """
+        if self.caches is not None:
+            return {}
+        formas = {'esparsa' if inferencia.usa_esparsa(self.modelos[self.nomes[m]]['resultados']) else 'densa'
+                  for m in linhas if self.modelos[self.nomes[m]]['motor'] is None}
+        matrizes = {}
+        if 'densa' in formas:
+            matrizes['densa'] = codificador.densificar(ativos, densas)
+        if 'esparsa' in formas:
+            matrizes['esparsa'] = codificador.esparsa(ativos, densas)
+        return matrizes
+
+    def _pontuar_modelo(self, m, codificador, ativos, densas, validos, indices, matrizes):
+        "Classe e probabilidade do modelo m nas linhas indices (linhas inválidas ficam NaN)."
+        nome = self.nomes[m]
+        modelo = self.modelos[nome]
+        if modelo['motor'] is not None or not matrizes:
+            classe, prob, _ = inferencia.pontuar_codificadas(
+                modelo, codificador, ativos[indices], densas[indices], validos[indices],
+                cache=self.caches[nome] if self.caches is not None else None, monitorar=False)
+            return classe, prob
+
+        X = matrizes['esparsa' if inferencia.usa_esparsa(modelo['resultados']) else 'densa']
+        classe = np.zeros(len(indices), dtype=int)
+        prob = np.full(len(indices), np.nan)
+        validas = validos[indices]
+        with metricas.etapa('modelo'):
+            classe[validas], prob[validas] = inferencia.pontuar(modelo, X[indices[validas]])
+        return classe, prob
+
+    def fechar(self):
+        "Encerra o pool de threads."
+        self._pool.shutdown(wait=True)
+
+
+def carregar_conjunto(caminho, **opcoes):
+    """
+    Carrega os modelos de um arquivo de configuração JSON (ver o início do módulo).
+
+    Args:
+        caminho (str): Arquivo de configuração.
+        **opcoes: Repassadas ao Conjunto (threads, cache); o modo vem do arquivo.
+
+    Returns:
+        Conjunto: Conjunto com os modelos carregados pelo registro.
+    """
+    from previnad import registro
+
+    with open(caminho, encoding='utf-8') as arquivo:
+        configuracao = json.load(arquivo)
+    modelos, pesos = {}, {}
+    for nome, item in configuracao['modelos'].items():
+        modelos[nome] = registro.carregar_modelo(item['caminho'])
+        pesos[nome] = item.get('peso', 1.0)
+    return Conjunto(modelos, pesos, configuracao.get('modo', 'ab'), **opcoes)
@@ -0,0 +1,308 @@
+"""
+Domínios das variáveis usadas pelo modelo.
+
+Reúne, em um único lugar, as tabelas de tradução que estavam espalhadas entre
+o notebook de treino (PrevInad.ipynb) e o app:
+
+- nomes das colunas do arquivo original (inglês) -> nomes usados no modelo;
+- valores do arquivo original (espanhol) -> valores usados no modelo;
+- ordem das variáveis esperada pelo modelo treinado (modelo_vars).
+"""
+
+# Nomes das colunas do arquivo peru_student_enrollment_data_2023.csv -> nomes em português
+COLUNAS_ORIGEM = {
+    'ENROLLMENT': 'MATRICULA',
+    'TUITION PAYMENT MARCH 2022': 'PGTO_ANUIDADE_2022',
+    'TUITION PAYMENT MARCH 2023': 'PGTO_ANUIDADE_2023',
+    'GENDER': 'GENERO',
+    'TYPE OF EDUCATIONAL INSTITUTION': 'TIPO_INSTITUIÇAO_ENSINO_ORIGEM',
+    'EDUCATIONAL INSTITUTION': 'INSTITUIÇAO_ENSINO_ORIGEM',
+    'INSTITUTION STATUS': 'STATUS_INSTITUIÇAO_ORIGEM',
+    'DEPARTMENT': 'DEPARTAMENTO',
+    'PROVINCE': 'PROVINCIA',
+    'DISTRICT': 'DISTRITO',
+    'CLASSIFICATION': 'CLASSIFICACAO',
+    'CAMPUS': 'CAMPUS',
+    'FACULTY': 'FACULDADE',
+    'PROGRAM/MAJOR': 'PROGRAMA_CURSO',
+    'SHIFT/SCHEDULE': 'TURNO',
+    'BENEFIT DISCOUNTS': 'BOLSAS_DESCONTO',
+    'STUDY MODE': 'MODALIDADE_ENSINO',
+    'AGE RANGE OF ENROLLED STUDENT': 'FAIXA_ETARIA',
+    'DISABILITY': 'DEFICIENCIA',
+    'NUMBER OF ENROLLED COURSES': 'NUMERO_DISCIPLINAS_MATRICULADAS',
+    'AT-RISK COURSE': 'CURSO_EM_RISCO'
+}
+
+# Valores do arquivo original -> valores usados no modelo (mesmos mapas do notebook)
+MAPAS_ORIGEM = {
+    'GENERO': {
+        '1': 'H',
+        '2': 'M',
+        'M': 'H',
+        'F': 'M',
+        'U': 'I'
+    },
+    'CLASSIFICACAO': {
+        'Carreras Pregrado': 'Graduacao',
+        'Carreras Pregrado 50-50': 'Graduacao_Semipresencial_50_50',
+        'Carreras Pregrado 80-20': 'Graduacao_Semipresencial_80_20',
+        'Carreras PPE': 'Curso_para_Trabalhadores',
+        'Carreras Pregrado Virtual': 'Graduacao_Virtual'
+    },
+    'MATRICULA': {
+        'Nuevo': 'Novo',
+        'Reincorporado': 'Reincorporado',
+        'Reinscrito': 'Reinscrito'
+    },
+    'DEPARTAMENTO': {
+        'SAN MARTIN': 'SAN_MARTIN',
+        'LA LIBERTAD': 'LA_LIBERTAD',
+        'MADRE DE DIOS': 'MADRE_DE_DIOS',
+        'LIMA': 'LIMA',
+        'CALLAO': 'CALLAO',
+        'AMAZONAS': 'AMAZONAS',
+        'ICA': 'ICA',
+        'AREQUIPA': 'AREQUIPA',
+        'JUNIN': 'JUNIN',
+        'HUANUCO': 'HUANUCO',
+        'AYACUCHO': 'AYACUCHO',
+        'ANCASH': 'ANCASH',
+        'PASCO': 'PASCO',
+        'CUSCO': 'CUSCO',
+        'LAMBAYEQUE': 'LAMBAYEQUE',
+        'HUANCAVELICA': 'HUANCAVELICA',
+        'PIURA': 'PIURA',
+        'CAJAMARCA': 'CAJAMARCA',
+        'APURIMAC': 'APURIMAC',
+        'PUNO': 'PUNO',
+        'UCAYALI': 'UCAYALI',
+        'LORETO': 'LORETO',
+        'TACNA': 'TACNA',
+        'MOQUEGUA': 'MOQUEGUA',
+        'TUMBES': 'TUMBES'
+    },
+    'FAIXA_ETARIA': {
+        '1. <=18': 'Menor_que_18',
+        '2. 19-20': 'De_19_a_20',
+        '3. 21-23': 'De_21_a_23',
+        '4. 24-29': 'De_24_a_29',
+        '5. >=30': 'Maior_que_30'
+    },
+    'BOLSAS_DESCONTO': {
+        'SIN BENEFICIO': 'Sem_Beneficio',
+        'CONVENIOS': 'Convenios',
+        'SOCIOECONOMICA ESPECIAL - UTP': 'Bolsa_Socioecon_Especial',
+        'SOCIOECONOMICA - UTP': 'Bolsa_Socioeconomica',
+        'MADREDIOSENSE - UTP': 'Bolsa_MadreDeDios',
+        'BECA ALTO POTENCIAL': 'Bolsa_Alto_Potencial',
+        'BECA TALENTO UTP': 'Bolsa_Talento'
+    },
+    'TURNO': {
+        'MAÑANA': 'Manha',
+        'TARDE': 'Tarde',
+        'NOCHE': 'Noite',
+        'MIXTO': 'Misto'
+    },
+    'CAMPUS': {
+        'UTP Lima Centro': 'Lima_Centro',
+        'UTP Lima Norte': 'Lima_Norte',
+        'UTP SJL': 'Lima_SJL',
+        'UTP Lima Este': 'Lima_Este',
+        'UTP Lima Sur': 'Lima_Sur',
+        'UTP Arequipa': 'Arequipa',
+        'UTP Chiclayo': 'Chiclayo',
+        'UTP Piura': 'Piura',
+        'UTP Chimbote': 'Chimbote',
+        'UTP Huancayo': 'Huancayo',
+        'UTP Ica': 'Ica',
+        'UTP Beca 18': 'Beca_18',
+        'UTP Trujillo': 'Trujillo',
+        'UTP Virtual': 'Virtual'
+    },
+    'FACULDADE': {
+        'Fac. Ing. Sist. Y Elect.': 'Engenharia_Sistemas_Eletrica',
+        'Fac. Der. Cienc. Polit. Y RRII': 'Direito_Ciencias_Politicas',
+        'Fac. Adm. Y Neg.': 'Administracao_Negocios',
+        'Fac. Cienc. Com.': 'Ciencias_Comunicacao',
+        'Fac. Ing. Ind. Y Mec.': 'Engenharia_Industrial_Mecanica',
+        'Fac. Hum y CC Soc': 'Humanas_Ciencias_Sociais',
+        'Fac. Contabilidad': 'Contabilidade',
+        'Fac. Salud': 'Saude'
+    },
+    'DEFICIENCIA': {
+        'Si': 1,
+        'No': 0
+    }
+}
+
+# Opções do formulário do app -> valores usados no modelo
+MAPAS_FORMULARIO = {
+    'GENERO': {
+        'Feminino': 'M',
+        'Masculino': 'H',
+        'Indeterminado': 'I'
+    },
+    'DEPARTAMENTO': {
+        'LIMA': 'LIMA',
+        'CALLAO': 'CALLAO',
+        'AMAZONAS': 'AMAZONAS',
+        'ICA': 'ICA',
+        'AREQUIPA': 'AREQUIPA',
+        'SAN MARTIN': 'SAN_MARTIN',
+        'JUNIN': 'JUNIN',
+        'LA LIBERTAD': 'LA_LIBERTAD',
+        'HUANUCO': 'HUANUCO',
+        'AYACUCHO': 'AYACUCHO',
+        'ANCASH': 'ANCASH',
+        'PASCO': 'PASCO',
+        'CUSCO': 'CUSCO',
+        'LAMBAYEQUE': 'LAMBAYEQUE',
+        'HUANCAVELICA': 'HUANCAVELICA',
+        'PIURA': 'PIURA',
+        'CAJAMARCA': 'CAJAMARCA',
+        'APURIMAC': 'APURIMAC',
+        'PUNO': 'PUNO',
+        'UCAYALI': 'UCAYALI',
+        'MADRE DE DIOS': 'MADRE_DE_DIOS',
+        'LORETO': 'LORETO',
+        'TACNA': 'TACNA',
+        'MOQUEGUA': 'MOQUEGUA',
+        'TUMBES': 'TUMBES'
+    },
+    'TURNO': {
+        'Manhã': 'Manha',
+        'Tarde': 'Tarde',
+        'Noite': 'Noite',
+        'Misto': 'Misto'
+    },
+    'MATRICULA': {
+        'Novo': 'Novo',
+        'Reincorporado': 'Reincorporado',
+        'Reinscrito': 'Reinscrito'
+    },
+    'CLASSIFICACAO': {
+        'Graduação': 'Graduacao',
+        'Graduação Semipresencial(50-50)': 'Graduacao_Semipresencial_50_50',
+        'Graduação Semipresencial (80-20)': 'Graduacao_Semipresencial_80_20',
+        'Curso para Trabalhadores': 'Curso_para_Trabalhadores',
+        'Graduação Virtual': 'Graduacao_Virtual'
+    },
+    'CAMPUS': {
+        'Lima Centro': 'Lima_Centro',
+        'Lima Norte': 'Lima_Norte',
+        'Lima SJL': 'Lima_SJL',
+        'Lima Este': 'Lima_Este',
+        'Lima Sur': 'Lima_Sur',
+        'Arequipa': 'Arequipa',
+        'Chiclayo': 'Chiclayo',
+        'Piura': 'Piura',
+        'Chimbote': 'Chimbote',
+        'Huancayo': 'Huancayo',
+        'Ica': 'Ica',
+        'Beca 18': 'Beca_18',
+        'Trujillo': 'Trujillo',
+        'Virtual': 'Virtual'
+    },
+    'FACULDADE': {
+        'Engenharia Sistemas Eletrica': 'Engenharia_Sistemas_Eletrica',
+        'Direito Ciencias Politicas': 'Direito_Ciencias_Politicas',
+        'Administracao Negocios': 'Administracao_Negocios',
+        'Ciencias Comunicacao': 'Ciencias_Comunicacao',
+        'Engenharia Industrial Mecanica': 'Engenharia_Industrial_Mecanica',
+        'Humanas Ciencias Sociais': 'Humanas_Ciencias_Sociais',
+        'Contabilidade': 'Contabilidade',
+        'Saude': 'Saude'
+    },
+    'FAIXA_ETARIA': {
+        'Menor que 18': 'Menor_que_18',
+        '19-20': 'De_19_a_20',
+        '21-23': 'De_21_a_23',
+        '24-29': 'De_24_a_29',
+        'Maior que 30': 'Maior_que_30'
+    },
+    'BOLSAS_DESCONTO': {
+        'Sem Benefício': 'Sem_Beneficio',
+        'Convenios': 'Convenios',
+        'Bolsa Socioeconômica Especial': 'Bolsa_Socioecon_Especial',
+        'Bolsa Socioeconomica': 'Bolsa_Socioeconomica',
+        'Bolsa Madre De Dios': 'Bolsa_MadreDeDios',
+        'Bolsa Alto Potencial': 'Bolsa_Alto_Potencial',
+        'Bolsa Talento': 'Bolsa_Talento'
+    }
+}
+
+# Respostas do formulário que entram como número: opção -> valor bruto.
+# A normalização min-max (sliders) vem do esquema do modelo (ver previnad.esquema).
+VALORES_FORMULARIO = {
+    'PGTO_ANUIDADE_2022': {'Não': 0, 'Sim': 1},
+    'DEFICIENCIA': {'Não': 0, 'Sim': 1},
+    'CURSO_EM_RISCO': {i: i for i in range(6)},
+    'NUMERO_DISCIPLINAS_MATRICULADAS': {i: i for i in range(7)}
+}
+
+# Variáveis que viraram dummies no treino (pd.get_dummies(..., drop_first=True))
+VARIAVEIS_DUMMY = ['MATRICULA', 'GENERO', 'DEPARTAMENTO', 'CLASSIFICACAO',
+                   'CAMPUS', 'FACULDADE', 'TURNO', 'BOLSAS_DESCONTO',
+                   'FAIXA_ETARIA']
+
+# Variáveis numéricas normalizadas por min-max (os limites ficam em modelo['escala'])
+VARIAVEIS_ESCALA = ['CURSO_EM_RISCO', 'NUMERO_DISCIPLINAS_MATRICULADAS']
+
+# Variáveis que já eram 0/1 no arquivo original
+VARIAVEIS_BINARIAS = ['PGTO_ANUIDADE_2022', 'DEFICIENCIA']
+
+# Colunas do arquivo original necessárias para pontuar um aluno
+COLUNAS_ENTRADA = VARIAVEIS_BINARIAS + VARIAVEIS_ESCALA + VARIAVEIS_DUMMY
+
+# Ordem das variáveis usada no treino do modelo
+MODELO_VARS = ['PGTO_ANUIDADE_2022', 'DEFICIENCIA',
+               'NUMERO_DISCIPLINAS_MATRICULADAS', 'CURSO_EM_RISCO',
+               'MATRICULA_Reincorporado', 'MATRICULA_Reinscrito', 'GENERO_I',
+               'GENERO_M', 'DEPARTAMENTO_ANCASH', 'DEPARTAMENTO_APURIMAC',
+               'DEPARTAMENTO_AREQUIPA', 'DEPARTAMENTO_AYACUCHO',
+               'DEPARTAMENTO_CAJAMARCA', 'DEPARTAMENTO_CALLAO', 'DEPARTAMENTO_CUSCO',
+               'DEPARTAMENTO_HUANCAVELICA', 'DEPARTAMENTO_HUANUCO', 'DEPARTAMENTO_ICA',
+               'DEPARTAMENTO_JUNIN', 'DEPARTAMENTO_LAMBAYEQUE',
+               'DEPARTAMENTO_LA_LIBERTAD', 'DEPARTAMENTO_LIMA', 'DEPARTAMENTO_LORETO',
+               'DEPARTAMENTO_MADRE_DE_DIOS', 'DEPARTAMENTO_MOQUEGUA',
+               'DEPARTAMENTO_PASCO', 'DEPARTAMENTO_PIURA', 'DEPARTAMENTO_PUNO',
+               'DEPARTAMENTO_SAN_MARTIN', 'DEPARTAMENTO_TACNA', 'DEPARTAMENTO_TUMBES',
+               'DEPARTAMENTO_UCAYALI', 'CLASSIFICACAO_Graduacao',
+               'CLASSIFICACAO_Graduacao_Semipresencial_50_50',
+               'CLASSIFICACAO_Graduacao_Semipresencial_80_20',
+               'CLASSIFICACAO_Graduacao_Virtual', 'CAMPUS_Beca_18', 'CAMPUS_Chiclayo',
+               'CAMPUS_Chimbote', 'CAMPUS_Huancayo', 'CAMPUS_Ica',
+               'CAMPUS_Lima_Centro', 'CAMPUS_Lima_Este', 'CAMPUS_Lima_Norte',
+               'CAMPUS_Lima_SJL', 'CAMPUS_Lima_Sur', 'CAMPUS_Piura', 'CAMPUS_Trujillo',
+               'CAMPUS_Virtual', 'FACULDADE_Ciencias_Comunicacao',
+               'FACULDADE_Contabilidade', 'FACULDADE_Direito_Ciencias_Politicas',
+               'FACULDADE_Engenharia_Industrial_Mecanica',
+               'FACULDADE_Engenharia_Sistemas_Eletrica',
+               'FACULDADE_Humanas_Ciencias_Sociais', 'FACULDADE_Saude', 'TURNO_Misto',
+               'TURNO_Noite', 'TURNO_Tarde', 'BOLSAS_DESCONTO_Bolsa_MadreDeDios',
+               'BOLSAS_DESCONTO_Bolsa_Socioecon_Especial',
+               'BOLSAS_DESCONTO_Bolsa_Socioeconomica', 'BOLSAS_DESCONTO_Bolsa_Talento',
+               'BOLSAS_DESCONTO_Convenios', 'BOLSAS_DESCONTO_Sem_Beneficio',
+               'FAIXA_ETARIA_De_21_a_23', 'FAIXA_ETARIA_De_24_a_29',
+               'FAIXA_ETARIA_Maior_que_30', 'FAIXA_ETARIA_Menor_que_18']
+
+# Escala min-max do modelo_final.pkl, usada pelo codificador do formulário montado sem modelo
+ESCALA_PADRAO = [{'CURSO_EM_RISCO': [0.0, 5.0]}, {'NUMERO_DISCIPLINAS_MATRICULADAS': [0.0, 6.0]}]
+
+# Rótulos das classes previstas pelo modelo
+ROTULOS_CLASSE = {0: "Inadimplente", 1: "Adimplente"}
+
+
+def ler_escala(escala):
+    """
+    Converte a lista de estatísticas salva no pkl em um dicionário.
+
+    Exemplo:
+    [{'CURSO_EM_RISCO': [0, 5]}, ...] -> {'CURSO_EM_RISCO': (0.0, 5.0), ...}
+    """
+    limites = {}
+    for item in escala:
+        for nome, (minimo, maximo) in item.items():
+            limites[nome] = (float(minimo), float(maximo))
+    return limites
@@ -0,0 +1,145 @@
+"""
+Esquema compilado das variáveis de um modelo.
+
+O esquema é gravado junto com o artefato pelo treino e descreve tudo o que
+o codificador precisa saber sobre o modelo:
+
+- colunas: ordem das colunas da matriz de entrada (a dos coeficientes);
+- densas: {variável: [mínimo, máximo]} da normalização min-max das
+  variáveis numéricas (as binárias ficam com [0, 1]);
+- categoricas: {variável: {'base': [...], 'categorias': [...]}}: as
+  categorias com dummy, na ordem das colunas, e as que zeram todas as
+  dummies (a primeira em ordem alfabética, descartada pelo drop_first);
+- hash: SHA-256 (12 caracteres) do restante, para conferir o esquema e
+  identificar as tabelas derivadas dele.
+
+Categorias fora do vocabulário (base + categorias) deixam a linha inválida,
+em vez de caírem na categoria base. O registro valida o esquema uma única
+vez, na carga do modelo, e monta os codificadores a partir dele.
+
+Para artefatos antigos, sem esquema, compilar_esquema o reconstrói a partir
+das colunas e da escala guardadas no modelo.
+"""
+import hashlib
+import json
+
+from previnad.dominios import (MAPAS_ORIGEM, VARIAVEIS_BINARIAS, VARIAVEIS_DUMMY,
+                               VARIAVEIS_ESCALA, ler_escala)
+
+VERSAO_ESQUEMA = 1
+
+
+def hash_esquema(esquema):
+    "Hash do esquema (sem o próprio campo 'hash'), estável entre processos."
+    conteudo = {chave: valor for chave, valor in esquema.items() if chave != 'hash'}
+    texto = json.dumps(conteudo, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(texto.encode()).hexdigest()[:12]
+
+
+def compilar_esquema(modelo_vars, escala, bases=None):
+    """
+    Monta o esquema de um modelo a partir das suas colunas e da escala min-max.
+
+    Args:
+        modelo_vars (list): Colunas do modelo, na ordem dos coeficientes.
+        escala (list): Limites min-max, no formato de modelo['escala'].
+        bases (dict, opcional): {variável: categoria base} conhecida no treino.
+            Sem ela, a base são as categorias do domínio (MAPAS_ORIGEM) que
+            não têm coluna e vêm, em ordem alfabética, antes da primeira que
+            tem: as que o drop_first poderia ter descartado.
+
+    Returns:
+        dict: Esquema no formato descrito no início do módulo.
+    """
+    modelo_vars = [str(coluna) for coluna in modelo_vars]
+    limites = ler_escala(escala)
+    bases = bases or {}
+
+    densas = {}
+    for nome in modelo_vars:
+        if nome in VARIAVEIS_BINARIAS:
+            densas[nome] = [0.0, 1.0]
+        elif nome in VARIAVEIS_ESCALA:
+            densas[nome] = list(limites[nome])
+
+    categoricas = {}
+    for nome in VARIAVEIS_DUMMY:
+        prefixo = f'{nome}_'
+        categorias = [coluna[len(prefixo):] for coluna in modelo_vars if coluna.startswith(prefixo)]
+        if nome in bases:
+            base = [bases[nome]]
+        else:
+            dominio = sorted(set(MAPAS_ORIGEM[nome].values()) - set(categorias))
+            base = [categoria for categoria in dominio if not categorias or categoria < min(categorias)]
+        categoricas[nome] = {'base': base, 'categorias': categorias}
+
+    esquema = {
+        'versao': VERSAO_ESQUEMA,
+        'colunas': modelo_vars,
+        'densas': densas,
+        'categoricas': categoricas
+    }
+    esquema['hash'] = hash_esquema(esquema)
+    return esquema
+
+
+def escala_esquema(esquema):
+    "Limites min-max das variáveis de VARIAVEIS_ESCALA, no formato de modelo['escala']."
+    return [{nome: list(esquema['densas'][nome])} for nome in VARIAVEIS_ESCALA if nome in esquema['densas']]
+
+
+def validar_esquema(esquema, params=None, escala=None):
+    """
+    Confere o esquema e, se informados, o modelo e a escala que ele descreve.
+
+    Args:
+        esquema (dict): Esquema de compilar_esquema.
+        params (opcional): Modelo treinado (precisa de feature_names_in_).
+        escala (list, opcional): Limites min-max, no formato de modelo['escala'].
+
+    Raises:
+        ValueError: Com todos os problemas encontrados.
+    """
+    problemas = []
+    if esquema.get('versao') != VERSAO_ESQUEMA:
+        problemas.append(f"versão {esquema.get('versao')} (esperada {VERSAO_ESQUEMA})")
+    if esquema.get('hash') != hash_esquema(esquema):
+        problemas.append("hash não confere com o conteúdo")
+
+    colunas = esquema['colunas']
+    if len(set(colunas)) < len(colunas):
+        problemas.append("colunas repetidas")
+    esperadas = set(esquema['densas'])
+    for nome, info in esquema['categoricas'].items():
+        if not info['base']:
+            problemas.append(f"{nome} sem categoria base")
+        if set(info['base']) & set(info['categorias']):
+            problemas.append(f"{nome} tem categorias na base e com coluna ao mesmo tempo")
+        esperadas |= {f'{nome}_{categoria}' for categoria in info['categorias']}
+    if esperadas != set(colunas):
+        sobrando = sorted(set(colunas) - esperadas)
+        faltando = sorted(esperadas - set(colunas))
+        problemas.append(f"colunas sem variável: {sobrando}; variáveis sem coluna: {faltando}")
+    for nome, (minimo, maximo) in esquema['densas'].items():
+        if not maximo > minimo:
+            problemas.append(f"escala de {nome} vazia: [{minimo}, {maximo}]")
+
+    if params is not None and [str(c) for c in params.feature_names_in_] != colunas:
+        problemas.append("colunas diferentes das do modelo treinado (feature_names_in_)")
+    if escala is not None:
+        for nome, limites in ler_escala(escala).items():
+            if nome in esquema['densas'] and tuple(esquema['densas'][nome]) != limites:
+                problemas.append(f"escala de {nome} diferente da do modelo")
+
+    if problemas:
+        raise ValueError("Esquema inválido: " + '; '.join(problemas))
+
+
+def serializar(esquema):
+    "Esquema em JSON, para gravar no artefato .npz."
+    return json.dumps(esquema, sort_keys=True, ensure_ascii=False)
+
+
+def desserializar(texto):
+    "Esquema gravado por serializar."
+    return json.loads(texto)
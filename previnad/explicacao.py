@@ -0,0 +1,145 @@
+"""
+Explicações do modelo logístico.
+
+- Importância global: os coeficientes de maior magnitude e a especificação
+  Vega-Lite do gráfico do app, calculadas uma única vez por versão do modelo.
+- Contribuições por aluno: quanto cada variável soma ao logito
+  (coeficiente × valor), calculadas em bloco a partir da forma compacta do
+  Codificador. Nas variáveis categóricas, a contribuição é a da dummy ativa,
+  ou zero na categoria base; as contribuições mais o intercepto somam o logito.
+- Principais fatores: as k variáveis com maior contribuição absoluta de cada
+  aluno, para acompanhar o arquivo pontuado em lote.
+"""
+import numpy as np
+import pandas as pd
+
+_importancias = {}   # (versão, n) -> DataFrame
+_graficos = {}       # (versão, n) -> especificação Vega-Lite
+
+
+def importancia_global(modelo, n=10):
+    """
+    Variáveis com os coeficientes de maior magnitude.
+
+    Args:
+        modelo (dict): Modelo carregado pelo registro.
+        n (int): Quantas variáveis listar.
+
+    Returns:
+        pd.DataFrame ou None: Colunas Feature, Coefficient e Magnitude, da
+        maior para a menor magnitude; None se o modelo não tem coeficientes.
+    """
+    params = modelo['resultados']
+    if not hasattr(params, 'coef_'):
+        return None
+    chave = (modelo['versao'], n)
+    if chave not in _importancias:
+        coef = np.asarray(params.coef_[0], dtype=float)
+        ordem = np.argsort(-np.abs(coef), kind='stable')[:n]
+        _importancias[chave] = pd.DataFrame({
+            'Feature': np.asarray(params.feature_names_in_, dtype=object)[ordem],
+            'Coefficient': coef[ordem],
+            'Magnitude': np.abs(coef[ordem])
+        })
+    return _importancias[chave]
+
+
+def grafico_importancia(modelo, n=10):
+    """
+    Especificação Vega-Lite do gráfico de barras da importância global.
+
+    Equivale ao alt.Chart que o app montava a cada envio do formulário, mas é
+    montada uma única vez por versão e não depende do Altair (use
+    st.vega_lite_chart).
+
+    Returns:
+        dict ou None: Especificação com os dados embutidos; None se o modelo não tem coeficientes.
+    """
+    chave = (modelo['versao'], n)
+    if chave not in _graficos:
+        importancia = importancia_global(modelo, n)
+        if importancia is None:
+            return None
+        _graficos[chave] = {
+            '$schema': 'https://vega.github.io/schema/vega-lite/v5.json',
+            'title': f'Top {n} Variáveis Mais Influentes (Magnitude dos Coeficientes)',
+            'data': {'values': [{'Feature': str(nome), 'Coefficient': float(valor)}
+                                for nome, valor in zip(importancia['Feature'], importancia['Coefficient'])]},
+            'mark': 'bar',
+            'encoding': {
+                'x': {'field': 'Coefficient', 'type': 'quantitative'},
+                'y': {'field': 'Feature', 'type': 'nominal', 'sort': '-x'},
+                'color': {'field': 'Coefficient', 'type': 'quantitative', 'scale': {'scheme': 'viridis'}},
+                'tooltip': [{'field': 'Feature', 'type': 'nominal'},
+                            {'field': 'Coefficient', 'type': 'quantitative'}]
+            }
+        }
+    return _graficos[chave]
+
+
+def contribuicoes_linhas(modelo, codificador, ativos, densas):
+    """
+    Contribuição de cada variável para o logito de cada linha.
+
+    Args:
+        modelo (dict): Modelo carregado pelo registro (precisa do motor NumPy).
+        codificador (Codificador): Codificador que gerou a forma compacta.
+        ativos (np.ndarray): Índices das dummies ativas (Codificador.codificar_ativos).
+        densas (np.ndarray): Valores das colunas numéricas.
+
+    Returns:
+        np.ndarray: Matriz n_linhas x len(codificador.variaveis), na ordem de codificador.variaveis.
+
+    Raises:
+        ValueError: Se o modelo não é logístico.
+    """
+    motor = modelo.get('motor')
+    if motor is None:
+        raise ValueError("As contribuições exigem um modelo logístico (logito aditivo)")
+    # Peso zero no fim para a sentinela (categoria base)
+    coef = np.append(motor.coef_[0], 0.0)
+
+    contribuicoes = np.empty((len(ativos), len(codificador.variaveis)))
+    n_densas = densas.shape[1]
+    contribuicoes[:, :n_densas] = densas * coef[codificador.colunas_densas]
+    contribuicoes[:, n_densas:] = coef[ativos]
+    return contribuicoes
+
+
+def principais_fatores(contribuicoes, variaveis, k=3):
+    """
+    As k variáveis com maior contribuição absoluta de cada linha.
+
+    Args:
+        contribuicoes (np.ndarray): Saída de contribuicoes_linhas.
+        variaveis (list): Nomes das colunas de contribuicoes.
+        k (int): Quantos fatores por linha.
+
+    Returns:
+        tuple: Nomes (n_linhas x k) e contribuições (n_linhas x k), da maior
+        para a menor em valor absoluto.
+    """
+    k = min(k, contribuicoes.shape[1])
+    ordem = np.argsort(-np.abs(contribuicoes), axis=1, kind='stable')[:, :k]
+    nomes = np.asarray(variaveis, dtype=object)[ordem]
+    return nomes, np.take_along_axis(contribuicoes, ordem, axis=1)
+
+
+def colunas_fatores(modelo, codificador, ativos, densas, validos, k=3):
+    """
+    Colunas FATOR_i e CONTRIBUICAO_i (i de 1 a k) para acrescentar ao resultado em lote.
+
+    Linhas inválidas ficam com fator None e contribuição NaN.
+
+    Returns:
+        dict: {nome da coluna: array}, na ordem FATOR_1, CONTRIBUICAO_1, FATOR_2...
+    """
+    nomes, valores = principais_fatores(contribuicoes_linhas(modelo, codificador, ativos, densas),
+                                        codificador.variaveis, k)
+    nomes[~validos] = None
+    valores[~validos] = np.nan
+    colunas = {}
+    for i in range(nomes.shape[1]):
+        colunas[f'FATOR_{i + 1}'] = nomes[:, i]
+        colunas[f'CONTRIBUICAO_{i + 1}'] = valores[:, i]
+    return colunas
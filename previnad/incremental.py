@@ -0,0 +1,246 @@
+"""
+Retreino incremental da regressão logística com novos lotes de matrículas.
+
+Em vez de reajustar o modelo em todo o histórico, cada lote novo (por
+exemplo, os pagamentos de um novo mês) atualiza os coeficientes a partir
+de estatísticas guardadas no próprio artefato:
+
+- 'hessiana': hessiana da função objetivo do LogisticRegression
+  (0.5 * ||w||² + C * log-verossimilhança negativa) nos coeficientes
+  ajustados, com o intercepto na última linha/coluna;
+- 'C': inverso da regularização do modelo;
+- 'n_treino': número de linhas já usadas no ajuste.
+
+A hessiana resume o histórico como uma priori gaussiana em torno dos
+coeficientes atuais (aproximação de Laplace). A atualização minimiza
+0.5 * (θ - θ0)' H0 (θ - θ0) + C * log-verossimilhança negativa do lote novo
+pelo método de Newton, e custa apenas uma passada pelo lote por iteração.
+Com o fator de esquecimento, o histórico pesa menos a cada atualização.
+
+Antes de atualizar, o modelo atual pontua o lote novo: o F1 e o erro de
+calibração (ECE, ver previnad.monitoramento) nesses dados, que o modelo
+ainda não viu, mostram se ele já estava se degradando. O lote também soma
+na referência do monitoramento, quando o modelo tem uma.
+
+Uso (na raiz do repositório):
+    python -m previnad.incremental pagamentos_2024_01.csv
+    python -m previnad.incremental novos.csv --modelo data/modelo_final.pkl --historico peru_student_enrollment_data_2023.csv
+"""
+import argparse
+import copy
+import os
+
+import numpy as np
+
+from previnad import monitoramento
+from previnad.inferencia import ModeloLogistico, _sigmoide
+
+
+def suporta(params):
+    "Se o modelo é uma regressão logística binária com penalidade l2 (a padrão do LogisticRegression)."
+    if not hasattr(params, 'coef_') or np.shape(params.coef_)[0] != 1:
+        return False
+    if hasattr(params, 'get_params'):
+        opcoes = params.get_params()
+        return (opcoes.get('penalty') == 'l2' and opcoes.get('fit_intercept', True)
+                and opcoes.get('class_weight') is None)
+    return True
+
+
+def _aumentada(X):
+    "Matriz CSR com uma coluna de uns no fim, para o intercepto."
+    import scipy.sparse as sp
+
+    return sp.hstack([X, np.ones((X.shape[0], 1))], format='csr')
+
+
+def _f1(y, previsto):
+    "F1 da classe 1 (adimplente), como o scoring='f1' da seleção."
+    verdadeiros = np.sum((previsto == 1) & (y == 1))
+    total = np.sum(previsto == 1) + np.sum(y == 1)
+    return float(2 * verdadeiros / total) if total else 0.0
+
+
+def _penalidade(n_variaveis):
+    "Hessiana da penalidade l2: identidade, sem o intercepto."
+    penalidade = np.eye(n_variaveis + 1)
+    penalidade[-1, -1] = 0.0
+    return penalidade
+
+
+def _curvatura(Xa, prob, C):
+    "C * X' diag(p (1 - p)) X, a parte da hessiana que vem dos dados."
+    pesos = prob * (1.0 - prob)
+    return C * np.asarray((Xa.T @ Xa.multiply(pesos[:, None])).todense())
+
+
+def estatisticas(params, X, C=None):
+    """
+    Estatísticas que permitem atualizar o modelo sem rever os dados de treino.
+
+    Args:
+        params: LogisticRegression (ou ModeloLogistico) já ajustado em X.
+        X (scipy.sparse.csr_matrix): Matriz de treino, nas colunas de params.feature_names_in_.
+        C (float, opcional): Inverso da regularização; padrão: o do LogisticRegression.
+
+    Returns:
+        dict: {'hessiana', 'C', 'n_treino'}.
+
+    Raises:
+        ValueError: Se C não foi informado e o modelo não o guarda (ModeloLogistico).
+    """
+    if C is None:
+        if not hasattr(params, 'get_params'):
+            raise ValueError("O modelo não guarda a regularização C; carregue o .pkl do LogisticRegression")
+        C = params.get_params()['C']
+    Xa = _aumentada(X)
+    theta = np.append(params.coef_[0], params.intercept_[0])
+    hessiana = _penalidade(X.shape[1]) + _curvatura(Xa, _sigmoide(Xa @ theta), C)
+    return {'hessiana': hessiana, 'C': float(C), 'n_treino': int(X.shape[0])}
+
+
+def atualizar(modelo, X, y, esquecimento=1.0, max_iter=50, tol=1e-10):
+    """
+    Atualiza os coeficientes com um lote novo.
+
+    Args:
+        modelo (dict): Modelo com 'hessiana', 'C' e 'n_treino' (ver estatisticas).
+        X (scipy.sparse.csr_matrix): Lote novo, nas colunas do modelo.
+        y (np.ndarray): Alvo do lote novo (0/1).
+        esquecimento (float): Peso do histórico, entre 0 e 1; 1 equivale a
+            ajustar o modelo em todos os dados de uma vez.
+        max_iter (int): Máximo de iterações de Newton.
+        tol (float): Para quando o maior passo nos coeficientes fica abaixo deste valor.
+
+    Returns:
+        dict: Novo modelo, no formato do modelo_final.pkl, com as estatísticas
+        atualizadas. 'f1' continua o da validação cruzada do treino; 'f1_lote'
+        e 'ece_lote' são o F1 e o erro de calibração do modelo anterior no
+        lote novo (não vão para o artefato). A referência do monitoramento,
+        se houver, inclui o lote.
+
+    Raises:
+        ValueError: Se o modelo não tem as estatísticas ou não é uma regressão logística l2.
+    """
+    params = modelo['resultados']
+    if not suporta(params):
+        raise ValueError("O retreino incremental só vale para a regressão logística binária com penalidade l2")
+    if 'hessiana' not in modelo:
+        raise ValueError("O modelo não tem as estatísticas do treino; informe o arquivo de treino "
+                         "(atualizar_arquivo(..., historico=...) ou --historico)")
+
+    C = modelo['C']
+    penalidade = _penalidade(X.shape[1])
+    # Só a parte dos dados é esquecida; a penalidade l2 continua inteira
+    priori = esquecimento * (modelo['hessiana'] - penalidade) + penalidade
+    theta0 = np.append(params.coef_[0], params.intercept_[0])
+    Xa = _aumentada(X)
+    y = np.asarray(y, dtype=float)
+    # Desempenho do modelo atual no lote, que ele ainda não viu
+    anterior = _sigmoide(Xa @ theta0)
+    faixas = monitoramento.referencia_matriz(modelo['esquema'], X, anterior, y)
+    ece = monitoramento.calibracao(faixas['prob'], faixas['soma_prob'], faixas['positivos'])
+
+    def objetivo(theta):
+        z = Xa @ theta
+        d = theta - theta0
+        return 0.5 * d @ priori @ d + C * np.sum(np.logaddexp(0.0, z) - y * z)
+
+    theta, valor = theta0.copy(), objetivo(theta0)
+    for _ in range(max_iter):
+        prob = _sigmoide(Xa @ theta)
+        gradiente = priori @ (theta - theta0) + C * (Xa.T @ (prob - y))
+        passo = np.linalg.solve(priori + _curvatura(Xa, prob, C), gradiente)
+        # Newton amortecido: reduz o passo enquanto o objetivo não diminuir
+        for _ in range(30):
+            novo = objetivo(theta - passo)
+            if novo <= valor:
+                break
+            passo = passo / 2
+        theta, valor = theta - passo, novo
+        if np.max(np.abs(passo)) < tol:
+            break
+
+    prob = _sigmoide(Xa @ theta)
+    if hasattr(params, 'get_params'):
+        # Cópia do LogisticRegression, para o .pkl continuar no formato do notebook
+        resultados = copy.deepcopy(params)
+        resultados.coef_ = theta[None, :-1].copy()
+        resultados.intercept_ = theta[-1:].copy()
+    else:
+        resultados = ModeloLogistico(theta[:-1], theta[-1:], params.classes_, params.feature_names_in_)
+
+    referencia = modelo.get('referencia')
+    if referencia is not None:
+        # O histograma das probabilidades do lote já é o do modelo novo
+        referencia = monitoramento.somar_referencias(
+            referencia, monitoramento.referencia_matriz(modelo['esquema'], X, prob, y))
+    return {
+        'metodo': modelo['metodo'],
+        'resultados': resultados,
+        'escala': modelo['escala'],
+        'esquema': modelo['esquema'],
+        'f1': modelo['f1'],
+        'f1_lote': _f1(y, (anterior > 0.5).astype(int)),
+        'ece_lote': ece,
+        'referencia': referencia,
+        'hessiana': priori + _curvatura(Xa, prob, C),
+        'C': C,
+        'n_treino': modelo['n_treino'] + int(X.shape[0])
+    }
+
+
+def atualizar_arquivo(modelo, caminho, historico=None, esquecimento=1.0):
+    """
+    Atualiza o modelo com um arquivo de matrículas novo.
+
+    Args:
+        modelo (dict): Modelo carregado pelo registro.
+        caminho (str): Lote novo, no formato de peru_student_enrollment_data_2023.csv.
+        historico (str, opcional): Arquivo com que o modelo foi treinado. Só é
+            necessário (e lido uma única vez) quando o modelo ainda não tem as
+            estatísticas, como o modelo_final.pkl do notebook; a referência do
+            monitoramento, se faltar, também é calculada a partir dele.
+        esquecimento (float): Ver atualizar.
+
+    Returns:
+        dict: Novo modelo (ver atualizar).
+    """
+    from previnad import treino
+
+    if 'hessiana' not in modelo and historico is not None:
+        df = treino.ler_dados(historico)
+        X, y = treino.matriz(df[df.notna().all(axis=1)], modelo['esquema'])
+        modelo = {**modelo, **estatisticas(modelo['resultados'], X, modelo.get('C'))}
+        if modelo.get('referencia') is None:
+            prob = _sigmoide(_aumentada(X) @ np.append(modelo['resultados'].coef_[0],
+                                                       modelo['resultados'].intercept_[0]))
+            modelo['referencia'] = monitoramento.referencia_matriz(modelo['esquema'], X, prob, y)
+
+    df = treino.ler_dados(caminho)
+    X, y = treino.matriz(df[df.notna().all(axis=1)], modelo['esquema'])
+    return atualizar(modelo, X, y, esquecimento)
+
+
+def main(argv=None):
+    from previnad import registro
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('dados', nargs='+', help='Lotes novos, aplicados na ordem (CSV separado por ; ou Parquet)')
+    parser.add_argument('--modelo', default=os.path.join('data', 'modelo_final.pkl'))
+    parser.add_argument('--historico', help='Arquivo de treino do modelo, se ele ainda não tem as estatísticas')
+    parser.add_argument('--esquecimento', type=float, default=1.0, help='Peso do histórico (0 a 1)')
+    parser.add_argument('--diretorio', default=registro.DIRETORIO_MODELOS)
+    args = parser.parse_args(argv)
+
+    # O .pkl é lido como LogisticRegression (não a cópia .npz), para conferir penalidade e C
+    modelo = registro.carregar_modelo(args.modelo, usar_npz=False)
+    for caminho in args.dados:
+        modelo = atualizar_arquivo(modelo, caminho, args.historico, args.esquecimento)
+        print(f"{caminho}: {modelo['n_treino']} linhas acumuladas; no lote, antes da atualização: "
+              f"F1 {modelo['f1_lote']:.2%}, ECE {modelo['ece_lote']:.3f}")
+    print(f"Artefato exportado: {registro.exportar_modelo(modelo, args.diretorio)}")
+
+
+if __name__ == '__main__':
+    main()
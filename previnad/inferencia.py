@@ -0,0 +1,255 @@
+"""
+Motor de inferência logística em NumPy puro.
+
+Calcula sigmoid(X @ coef_.T + intercept_) diretamente, sem a validação de
+entrada do scikit-learn, e devolve classe e probabilidade numa única
+passada. Para a forma compacta gerada por Codificador.codificar_ativos, o
+logito é a soma dos coeficientes das dummies ativas mais o produto das
+poucas colunas numéricas, sem o produto denso com as ~65 dummies zeradas.
+
+Também é o modelo usado quando o artefato vem de um .npz, sem depender do
+scikit-learn: expõe os mesmos atributos e métodos que o app usa do
+LogisticRegression (coef_, intercept_, classes_, predict, predict_proba).
+"""
+import numpy as np
+
+from previnad import metricas, monitoramento
+
+
+def _sigmoide(logito):
+    "Sigmoide; em logitos muito negativos exp estoura para inf e o resultado é 0, como esperado."
+    with np.errstate(over='ignore'):
+        return 1.0 / (1.0 + np.exp(-logito))
+
+
+class ModeloLogistico:
+    """
+    Regressão logística binária a partir dos coeficientes já estimados.
+
+    Args:
+        coef (np.ndarray): Coeficientes, com forma (1, n_variaveis).
+        intercept (np.ndarray): Intercepto, com forma (1,).
+        classes (np.ndarray): Classes do modelo, na ordem do scikit-learn.
+        variaveis (list): Nomes das variáveis, na ordem dos coeficientes.
+    """
+
+    def __init__(self, coef, intercept, classes, variaveis):
+        self.coef_ = np.asarray(coef, dtype=float).reshape(1, -1)
+        self.intercept_ = np.asarray(intercept, dtype=float).reshape(1)
+        self.classes_ = np.asarray(classes)
+        self.feature_names_in_ = np.asarray(variaveis, dtype=object)
+        self.n_features_in_ = self.coef_.shape[1]
+
+        # Coeficientes com um zero no fim: é o peso da sentinela do Codificador (categoria base)
+        self._coef_ativos = np.append(self.coef_[0], 0.0)
+
+    @classmethod
+    def de_sklearn(cls, params):
+        "Copia os coeficientes de um LogisticRegression já treinado."
+        return cls(params.coef_, params.intercept_, params.classes_, params.feature_names_in_)
+
+    def decision_function(self, X):
+        "Logito de cada linha (X densa ou esparsa do scipy)."
+        if hasattr(X, 'tocsr'):
+            return X @ self.coef_[0] + self.intercept_[0]
+        return np.asarray(X, dtype=float) @ self.coef_[0] + self.intercept_[0]
+
+    def logito_ativos(self, ativos, densas, colunas_densas):
+        """
+        Logito a partir da forma compacta do Codificador.
+
+        Args:
+            ativos (np.ndarray): Índices das dummies ativas (n x n_categoricas).
+            densas (np.ndarray): Valores das colunas numéricas (n x len(colunas_densas)).
+            colunas_densas (np.ndarray): Índices, em coef_, das colunas numéricas.
+        """
+        logito = densas @ self.coef_[0, colunas_densas]
+        logito += self.intercept_[0]
+        # Uma variável categórica por vez: cada coluna de ativos é contígua (ordem Fortran)
+        for k in range(ativos.shape[1]):
+            logito += self._coef_ativos.take(ativos[:, k])
+        return logito
+
+    def _classes_e_prob(self, logito):
+        return self.classes_[(logito > 0).astype(np.intp)], _sigmoide(logito)
+
+    def pontuar(self, X):
+        """
+        Classe prevista e probabilidade da segunda classe, numa única passada.
+
+        Returns:
+            tuple: (classes, probabilidades), um valor por linha.
+        """
+        return self._classes_e_prob(self.decision_function(X))
+
+    def pontuar_ativos(self, ativos, densas, colunas_densas):
+        "Mesmo que pontuar, a partir da forma compacta do Codificador."
+        return self._classes_e_prob(self.logito_ativos(ativos, densas, colunas_densas))
+
+    def predict_proba(self, X):
+        "Probabilidades das duas classes, como no scikit-learn."
+        prob = _sigmoide(self.decision_function(X))
+        return np.column_stack([1.0 - prob, prob])
+
+    def predict(self, X):
+        "Classe prevista (a segunda classe quando o logito é positivo)."
+        return self.pontuar(X)[0]
+
+
+def motor_inferencia(params):
+    """
+    Cria o motor NumPy para o modelo, quando ele é uma regressão logística binária.
+
+    Returns:
+        ModeloLogistico ou None, para modelos que não são lineares.
+    """
+    if isinstance(params, ModeloLogistico):
+        return params
+    if hasattr(params, 'coef_') and hasattr(params, 'intercept_') and len(params.classes_) == 2:
+        return ModeloLogistico.de_sklearn(params)
+    return None
+
+
+def usa_esparsa(params):
+    """
+    Se o estimador do scikit-learn deve receber a matriz esparsa (CSR).
+
+    Só os modelos lineares: eles treinam e pontuam mais rápido em CSR. Árvores
+    e KNN aceitam CSR mas ficam várias vezes mais lentos, e o GaussianNB não
+    aceita; esses recebem a matriz densa.
+    """
+    from sklearn.linear_model._base import LinearClassifierMixin
+
+    return isinstance(params, LinearClassifierMixin) and params.__sklearn_tags__().input_tags.sparse
+
+
+def pontuar(modelo, X):
+    """
+    Classe prevista e probabilidade da classe 1 (adimplência) para cada linha de X.
+
+    Usa o motor NumPy quando disponível e, para os demais modelos, um único
+    predict_proba.
+
+    Args:
+        modelo (dict): Modelo carregado pelo registro.
+        X (np.ndarray ou scipy.sparse.csr_matrix): Matriz na ordem de MODELO_VARS.
+    """
+    motor = modelo.get('motor')
+    if motor is not None:
+        return motor.pontuar(X)
+
+    import pandas as pd
+
+    params = modelo['resultados']
+    if hasattr(X, 'tocsr'):
+        # DataFrame esparso: mantém os nomes das variáveis sem densificar
+        entrada = pd.DataFrame.sparse.from_spmatrix(X, columns=params.feature_names_in_)
+    else:
+        entrada = pd.DataFrame(X, columns=params.feature_names_in_)
+    proba = params.predict_proba(entrada)
+    return params.classes_[proba.argmax(axis=1)], proba[:, 1]
+
+
+def _pontuar_compacto(modelo, codificador, ativos, densas, tamanho_bloco):
+    "Classe e probabilidade a partir da forma compacta do codificador."
+    motor = modelo.get('motor')
+    if motor is not None:
+        return motor.pontuar_ativos(ativos, densas, codificador.colunas_densas)
+
+    montar = codificador.esparsa if usa_esparsa(modelo['resultados']) else codificador.densificar
+    classe = np.zeros(len(ativos), dtype=int)
+    prob = np.empty(len(ativos))
+    for inicio in range(0, len(ativos), tamanho_bloco):
+        bloco = slice(inicio, inicio + tamanho_bloco)
+        X = montar(ativos[bloco], densas[bloco])
+        classe[bloco], prob[bloco] = pontuar(modelo, X)
+    return classe, prob
+
+
+def pontuar_colunas(modelo, codificador, colunas, tamanho_bloco=50_000, cache=None):
+    """
+    Codifica e pontua colunas de valores de uma vez.
+
+    Para modelos logísticos usa a forma compacta do codificador e o motor
+    NumPy; para os demais, a matriz densa (ou esparsa, ver usa_esparsa) com
+    um predict_proba por bloco.
+
+    Args:
+        modelo (dict): Modelo carregado pelo registro.
+        codificador (Codificador): Codificador das colunas recebidas.
+        colunas: Colunas no formato aceito por Codificador.codificar.
+        tamanho_bloco (int): Linhas por chamada ao modelo, quando não há motor NumPy.
+        cache (CachePredicoes, opcional): Quando informado, só os perfis que
+            não estão no cache (nem repetidos na própria chamada) vão ao modelo.
+
+    Returns:
+        tuple: Classe prevista, probabilidade de adimplência e máscara das
+        linhas válidas. Linhas inválidas ficam com classe 0 e probabilidade NaN.
+    """
+    with metricas.etapa('codificar'):
+        ativos, densas, validos = codificador.codificar_ativos(colunas)
+    return pontuar_codificadas(modelo, codificador, ativos, densas, validos, tamanho_bloco, cache)
+
+
+def pontuar_codificadas(modelo, codificador, ativos, densas, validos, tamanho_bloco=50_000, cache=None,
+                        monitorar=True):
+    """
+    Como pontuar_colunas, para linhas já na forma compacta (Codificador.codificar_ativos).
+
+    Com monitorar, as linhas pontuadas entram no monitor de deriva do modelo
+    (previnad.monitoramento); desligue para entradas que não são alunos
+    reais, como os cenários de previnad.cenarios.
+
+    Returns:
+        tuple: Classe prevista, probabilidade de adimplência e máscara das linhas válidas.
+    """
+    def pontuar_perfis(ativos, densas):
+        metricas.contar('perfis_pontuados', len(ativos))
+        with metricas.etapa('modelo'):
+            return _pontuar_compacto(modelo, codificador, ativos, densas, tamanho_bloco)
+
+    classe = np.zeros(len(validos), dtype=int)
+    prob = np.full(len(validos), np.nan)
+    linhas = validos if not validos.all() else slice(None)
+    if cache is not None:
+        with metricas.etapa('consultar_cache'):
+            classe[linhas], prob[linhas] = cache.consultar(modelo['versao'], ativos[linhas],
+                                                           densas[linhas], pontuar_perfis)
+    else:
+        classe[linhas], prob[linhas] = pontuar_perfis(ativos[linhas], densas[linhas])
+    if monitorar:
+        with metricas.etapa('monitorar'):
+            monitoramento.registrar(modelo, codificador, ativos, densas, validos, prob)
+    validas = int(np.count_nonzero(validos))
+    metricas.contar('linhas', validas, situacao='valida')
+    metricas.contar('linhas', len(validos) - validas, situacao='invalida')
+    return classe, prob, validos
+
+
+def verificar_paridade(params, X, tolerancia=1e-12):
+    """
+    Confere se o motor NumPy reproduz o predict/predict_proba do scikit-learn.
+
+    Args:
+        params: LogisticRegression treinado.
+        X (np.ndarray): Matriz de teste na ordem de params.feature_names_in_.
+        tolerancia (float): Maior diferença absoluta aceita nas probabilidades.
+
+    Returns:
+        float: Maior diferença absoluta encontrada.
+
+    Raises:
+        AssertionError: Se as classes divergirem ou a diferença passar da tolerância.
+    """
+    import pandas as pd
+
+    motor = ModeloLogistico.de_sklearn(params)
+    entrada = pd.DataFrame(X, columns=params.feature_names_in_)
+    classes, prob = motor.pontuar(X)
+
+    diferenca = float(np.max(np.abs(prob - params.predict_proba(entrada)[:, 1]), initial=0.0))
+    if not np.array_equal(classes, params.predict(entrada)):
+        raise AssertionError("Classes diferentes do scikit-learn")
+    if diferenca > tolerancia:
+        raise AssertionError(f"Probabilidades diferem em {diferenca:.3g}")
+    return diferenca
@@ -0,0 +1,309 @@
+"""
+Pontuação em lote de arquivos de matrícula.
+
+Recebe um arquivo no mesmo formato de peru_student_enrollment_data_2023.csv
+(CSV separado por ';' ou Parquet), aplica as mesmas traduções e dummies do
+treino (ver previnad.codificacao) e devolve o arquivo com a classe e a probabilidade
+previstas para cada aluno.
+
+pontuar_arquivo lê, pontua e grava um bloco de linhas por vez, então a
+memória usada não depende do tamanho do arquivo.
+
+Uso (na raiz do repositório):
+    python -m previnad.lote matriculas.csv previsoes.parquet
+"""
+import argparse
+import io
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from previnad import explicacao, inferencia, metricas
+from previnad.dominios import COLUNAS_ORIGEM, ROTULOS_CLASSE
+
+TAMANHO_BLOCO = 50_000
+
+# Colunas numéricas do arquivo original; as demais são lidas como texto em todos os blocos
+_COLUNAS_NUMERICAS = ['TUITION PAYMENT MARCH 2022', 'TUITION PAYMENT MARCH 2023',
+                      'NUMBER OF ENROLLED COURSES', 'AT-RISK COURSE']
+_TIPOS_CSV = {original: str for original in COLUNAS_ORIGEM if original not in _COLUNAS_NUMERICAS}
+
+
+def ler_arquivo(arquivo, nome_arquivo):
+    """
+    Lê o arquivo enviado (CSV com separador ';' ou Parquet).
+
+    Args:
+        arquivo: Caminho ou objeto de arquivo.
+        nome_arquivo (str): Nome do arquivo, usado para identificar o formato.
+
+    Returns:
+        pd.DataFrame: Dados do arquivo, sem nenhuma transformação.
+    """
+    if nome_arquivo.lower().endswith('.parquet'):
+        return pd.read_parquet(arquivo)
+    return pd.read_csv(arquivo, sep=';', dtype=_TIPOS_CSV)
+
+
+def ler_blocos(arquivo, nome_arquivo, tamanho_bloco=TAMANHO_BLOCO):
+    """
+    Lê o arquivo (CSV com separador ';' ou Parquet) em blocos de linhas.
+
+    Args:
+        arquivo: Caminho ou objeto de arquivo binário.
+        nome_arquivo (str): Nome do arquivo, usado para identificar o formato.
+        tamanho_bloco (int): Máximo de linhas por bloco.
+
+    Yields:
+        tuple: Bloco (pd.DataFrame, sem nenhuma transformação) e fração do
+        arquivo já lida.
+    """
+    fechar = isinstance(arquivo, (str, os.PathLike))
+    if fechar:
+        arquivo = open(arquivo, 'rb')
+    try:
+        if nome_arquivo.lower().endswith('.parquet'):
+            import pyarrow.parquet as pq
+
+            parquet = pq.ParquetFile(arquivo)
+            total, lidas = max(parquet.metadata.num_rows, 1), 0
+            for lote in parquet.iter_batches(batch_size=tamanho_bloco):
+                lidas += lote.num_rows
+                yield lote.to_pandas(), lidas / total
+            return
+
+        inicio = arquivo.tell()
+        total = max(arquivo.seek(0, io.SEEK_END) - inicio, 1)
+        arquivo.seek(inicio)
+        with pd.read_csv(arquivo, sep=';', dtype=_TIPOS_CSV, chunksize=tamanho_bloco) as leitor:
+            for bloco in leitor:
+                # A posição avança em saltos do buffer do leitor: a fração é aproximada
+                yield bloco, min((arquivo.tell() - inicio) / total, 1.0)
+    finally:
+        if fechar:
+            arquivo.close()
+
+
+def pontuar_dataframe(df, modelo, tamanho_bloco=TAMANHO_BLOCO, cache=None, codificador=None, fatores=0,
+                      monitorar=True):
+    """
+    Pontua todos os alunos de um DataFrame no formato do arquivo original.
+
+    Ver inferencia.pontuar_colunas.
+
+    Args:
+        df (pd.DataFrame): Dados no formato do arquivo original.
+        modelo (dict): Modelo carregado pelo registro.
+        tamanho_bloco (int): Número de linhas por chamada ao modelo.
+        cache (CachePredicoes, opcional): Cache de predições por perfil.
+        codificador (Codificador, opcional): Codificador a usar no lugar do
+            modelo['codificadores']['arquivo'].
+        fatores (int): Quantos dos principais fatores de cada aluno incluir
+            (colunas FATOR_i e CONTRIBUICAO_i, ver explicacao.colunas_fatores).
+            Exige um modelo logístico.
+        monitorar (bool): Registra as linhas no monitor de deriva (ver
+            inferencia.pontuar_codificadas); desligue ao pontuar de novo
+            linhas que já foram registradas.
+
+    Returns:
+        pd.DataFrame: Dados originais com as colunas CLASSE_PREVISTA e PROB_ADIMPLENCIA
+        (e as dos fatores, se pedidas).
+    """
+    codificador = codificador or modelo['codificadores']['arquivo']
+    colunas = df.rename(columns=COLUNAS_ORIGEM, copy=False)
+    with metricas.etapa('codificar'):
+        ativos, densas, validos = codificador.codificar_ativos(colunas)
+    classe, prob, validos = inferencia.pontuar_codificadas(modelo, codificador, ativos, densas, validos,
+                                                           tamanho_bloco, cache, monitorar)
+
+    rotulos = np.array([ROTULOS_CLASSE[0], ROTULOS_CLASSE[1]], dtype=object)[classe]
+    rotulos[~validos] = None
+
+    resultado = df.copy()
+    resultado['CLASSE_PREVISTA'] = rotulos
+    resultado['PROB_ADIMPLENCIA'] = prob
+    if fatores:
+        with metricas.etapa('explicar'):
+            for nome, valores in explicacao.colunas_fatores(modelo, codificador, ativos, densas,
+                                                            validos, fatores).items():
+                resultado[nome] = valores
+    return resultado
+
+
+def _esquema_parquet(bloco):
+    """
+    Esquema Parquet do resultado, fixo para todos os blocos.
+
+    As colunas conhecidas têm tipo declarado: texto para as do arquivo
+    original, a classe e os fatores; float64 para as numéricas, a
+    probabilidade e as contribuições. As demais seguem o primeiro bloco,
+    e as que nele só têm nulos viram texto.
+    """
+    import pyarrow as pa
+
+    campos = []
+    for campo in pa.Schema.from_pandas(bloco, preserve_index=False):
+        nome = campo.name
+        if nome in _COLUNAS_NUMERICAS or nome == 'PROB_ADIMPLENCIA' or nome.startswith('CONTRIBUICAO_'):
+            tipo = pa.float64()
+        elif nome in _TIPOS_CSV or nome == 'CLASSE_PREVISTA' or nome.startswith('FATOR_'):
+            tipo = pa.string()
+        else:
+            tipo = pa.string() if pa.types.is_null(campo.type) else campo.type
+        campos.append(pa.field(nome, tipo))
+    return pa.schema(campos)
+
+
+def _converter_bloco(bloco, esquema):
+    "Converte as colunas do bloco para os tipos do esquema (números inválidos viram nulos)."
+    import pyarrow as pa
+
+    convertidas = {}
+    for campo in esquema:
+        serie = bloco[campo.name]
+        if pa.types.is_floating(campo.type) and not pd.api.types.is_numeric_dtype(serie):
+            convertidas[campo.name] = pd.to_numeric(serie.astype(object), errors='coerce')
+        elif pa.types.is_string(campo.type) and not (serie.dtype == object
+                                                     and pd.api.types.is_string_dtype(serie.dropna())):
+            texto = serie.astype(object).astype(str)
+            texto[serie.isna().to_numpy()] = None
+            convertidas[campo.name] = texto
+    return bloco.assign(**convertidas) if convertidas else bloco
+
+
+class EscritorResultado:
+    """
+    Grava o resultado bloco a bloco em CSV (separador ';') ou Parquet.
+
+    No Parquet, o esquema é fixado no primeiro bloco (ver _esquema_parquet)
+    e os blocos que não batem com ele são convertidos.
+
+    Args:
+        saida: Caminho ou objeto de arquivo binário.
+        formato (str): 'CSV' ou 'Parquet'.
+    """
+
+    def __init__(self, saida, formato):
+        self.saida = saida
+        self.formato = formato
+        self._escritor = None
+        self._esquema = None
+        self._arquivo = None
+
+    def escrever(self, bloco):
+        if self.formato == 'Parquet':
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            if self._escritor is None:
+                self._esquema = _esquema_parquet(bloco)
+                self._escritor = pq.ParquetWriter(self.saida, self._esquema)
+            try:
+                tabela = pa.Table.from_pandas(bloco, schema=self._esquema, preserve_index=False)
+            except (pa.ArrowInvalid, pa.ArrowTypeError):
+                # Só os blocos que não batem com o esquema pagam a conversão
+                tabela = pa.Table.from_pandas(_converter_bloco(bloco, self._esquema),
+                                              schema=self._esquema, preserve_index=False)
+            self._escritor.write_table(tabela)
+            return
+
+        primeiro = self._arquivo is None
+        if primeiro:
+            self._arquivo = (open(self.saida, 'wb') if isinstance(self.saida, (str, os.PathLike))
+                             else self.saida)
+        bloco.to_csv(self._arquivo, sep=';', index=False, header=primeiro, encoding='utf-8')
+
+    def fechar(self):
+        if self._escritor is not None:
+            self._escritor.close()
+        if self._arquivo is not None and self._arquivo is not self.saida:
+            self._arquivo.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *erro):
+        self.fechar()
+
+
+def exportar(resultado, formato, tamanho_bloco=TAMANHO_BLOCO):
+    """
+    Escreve o resultado em CSV (separador ';') ou Parquet, bloco a bloco.
+
+    Returns:
+        bytes: Conteúdo do arquivo para download.
+    """
+    saida = io.BytesIO()
+    with EscritorResultado(saida, formato) as escritor:
+        for inicio in range(0, len(resultado), tamanho_bloco):
+            escritor.escrever(resultado.iloc[inicio:inicio + tamanho_bloco])
+    return saida.getvalue()
+
+
+def pontuar_arquivo(arquivo, nome_arquivo, saida, formato, modelo, tamanho_bloco=TAMANHO_BLOCO,
+                    cache=None, progresso=None, fatores=0, monitorar=True):
+    """
+    Lê, pontua e grava o arquivo de matrículas um bloco por vez.
+
+    Args:
+        arquivo: Caminho ou objeto de arquivo binário de entrada.
+        nome_arquivo (str): Nome do arquivo de entrada, usado para identificar o formato.
+        saida: Caminho ou objeto de arquivo binário de saída.
+        formato (str): Formato da saída, 'CSV' ou 'Parquet'.
+        modelo (dict): Modelo carregado pelo registro.
+        tamanho_bloco (int): Linhas lidas, pontuadas e gravadas de cada vez.
+        cache (CachePredicoes, opcional): Cache de predições por perfil.
+        progresso (callable, opcional): Chamado com a fração do arquivo já processada.
+        fatores, monitorar: Ver pontuar_dataframe.
+
+    Returns:
+        dict: {'linhas', 'pontuadas'}: total de linhas e linhas com valores válidos.
+    """
+    contagem = {'linhas': 0, 'pontuadas': 0}
+    with EscritorResultado(saida, formato) as escritor:
+        blocos = ler_blocos(arquivo, nome_arquivo, tamanho_bloco)
+        while True:
+            with metricas.etapa('ler_bloco'):
+                bloco, fracao = next(blocos, (None, None))
+            if bloco is None:
+                break
+            resultado = pontuar_dataframe(bloco, modelo, tamanho_bloco, cache, fatores=fatores, monitorar=monitorar)
+            with metricas.etapa('gravar_bloco'):
+                escritor.escrever(resultado)
+            contagem['linhas'] += len(resultado)
+            contagem['pontuadas'] += int(resultado['PROB_ADIMPLENCIA'].notna().sum())
+            if progresso is not None:
+                progresso(fracao)
+    return contagem
+
+
+def main(argv=None):
+    from previnad import registro
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('entrada', help='Arquivo de matrículas (CSV separado por ; ou Parquet)')
+    parser.add_argument('saida', help='Arquivo de resultado (.csv ou .parquet)')
+    parser.add_argument('--modelo', default=os.path.join('data', 'modelo_final.pkl'))
+    parser.add_argument('--bloco', type=int, default=TAMANHO_BLOCO, help='Linhas por bloco')
+    parser.add_argument('--fatores', type=int, default=0,
+                        help='Inclui os principais fatores de cada aluno (modelo logístico)')
+    parser.add_argument('--metricas', help='Grava o tempo de cada etapa neste arquivo JSON')
+    args = parser.parse_args(argv)
+
+    formato = 'Parquet' if args.saida.lower().endswith('.parquet') else 'CSV'
+
+    def progresso(fracao):
+        print(f"\r{fracao:6.1%}", end='', file=sys.stderr, flush=True)
+
+    contagem = pontuar_arquivo(args.entrada, os.path.basename(args.entrada), args.saida, formato,
+                               registro.carregar_modelo(args.modelo), args.bloco, progresso=progresso,
+                               fatores=args.fatores)
+    print(f"\n{contagem['pontuadas']} de {contagem['linhas']} alunos pontuados", file=sys.stderr)
+    if args.metricas:
+        metricas.METRICAS.gravar_json(args.metricas)
+
+
+if __name__ == '__main__':
+    main()
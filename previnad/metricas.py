@@ -0,0 +1,280 @@
+"""
+Instrumentação: tempo de cada etapa, contadores e histogramas.
+
+As medições vão para um registro único por processo (METRICAS), que pode
+ser exportado no formato de texto do Prometheus ou em JSON. As etapas
+medidas pelo pacote são:
+
+    carregar_modelo     Leitura do artefato pelo registro (uma vez por versão).
+    codificar           Tradução dos valores para a forma compacta do Codificador.
+    consultar_cache     Consulta ao cache de predições, incluindo a etapa modelo dos perfis novos.
+    modelo              Chamada ao motor NumPy ou ao predict_proba.
+    conjunto            Todos os modelos de um previnad.conjunto, em paralelo.
+    monitorar           Soma das linhas pontuadas no monitor de deriva (previnad.monitoramento).
+    explicar            Principais fatores de cada aluno (previnad.explicacao).
+    cenarios            Produto cartesiano das alternativas na forma compacta (previnad.cenarios).
+    ler_bloco, gravar_bloco
+                        Leitura e gravação de cada bloco na pontuação em lote.
+    atualizar_carteira  Gravação das linhas pontuadas na carteira (previnad.carteira).
+    agregar             Groupby de uma consulta por segmento da carteira.
+
+Com a variável de ambiente PREVINAD_METRICAS=0, as medições não fazem nada.
+
+perfil captura um cProfile e um snapshot do tracemalloc de um trecho (por
+exemplo, de uma única requisição) e grava os resultados em data/perfis/.
+
+Uso:
+    from previnad import metricas
+
+    with metricas.etapa('codificar'):
+        ...
+    metricas.contar('linhas_pontuadas', 10)
+    print(metricas.METRICAS.prometheus())
+"""
+import bisect
+import contextlib
+import json
+import os
+import threading
+import time
+
+DIRETORIO_PERFIS = os.path.join('data', 'perfis')
+PREFIXO = 'previnad_'
+
+# Limites superiores dos baldes dos histogramas de tempo, em segundos
+BALDES_SEGUNDOS = (1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 2.5e-3, 5e-3,
+                   0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Metricas:
+    """
+    Registro de contadores e histogramas, seguro entre threads.
+
+    Cada série é identificada pelo nome e pelos rótulos, como no Prometheus.
+
+    Args:
+        ativo (bool): Se False, contar, observar e cronometro não fazem nada.
+        baldes (tuple): Limites superiores dos baldes dos histogramas.
+    """
+
+    def __init__(self, ativo=True, baldes=BALDES_SEGUNDOS):
+        self.ativo = ativo
+        self.baldes = tuple(baldes)
+        self._contadores = {}    # (nome, rótulos) -> valor
+        self._histogramas = {}   # (nome, rótulos) -> [contagens por balde (+Inf no fim), soma]
+        self._coletores = []
+        self._trava = threading.Lock()
+
+    def contar(self, nome, valor=1, **rotulos):
+        "Soma valor ao contador nome."
+        if not self.ativo:
+            return
+        chave = (nome, tuple(sorted(rotulos.items())))
+        with self._trava:
+            self._contadores[chave] = self._contadores.get(chave, 0) + valor
+
+    def observar(self, nome, valor, **rotulos):
+        "Registra valor no histograma nome."
+        if self.ativo:
+            self._observar((nome, tuple(sorted(rotulos.items()))), valor)
+
+    def _observar(self, chave, valor):
+        balde = bisect.bisect_left(self.baldes, valor)
+        with self._trava:
+            serie = self._histogramas.get(chave)
+            if serie is None:
+                serie = self._histogramas[chave] = [[0] * (len(self.baldes) + 1), 0.0]
+            serie[0][balde] += 1
+            serie[1] += valor
+
+    def cronometro(self, etapa, **rotulos):
+        "Mede o tempo do bloco (with) no histograma etapa_segundos, com o rótulo etapa."
+        rotulos['etapa'] = etapa
+        return _Cronometro(self, ('etapa_segundos', tuple(sorted(rotulos.items()))))
+
+    def coletor(self, funcao):
+        """
+        Registra uma função chamada a cada exportação, que devolve valores
+        instantâneos {nome: número} (por exemplo, as estatísticas do cache).
+        """
+        self._coletores.append(funcao)
+        return funcao
+
+    def limpar(self):
+        "Zera contadores e histogramas (os coletores continuam registrados)."
+        with self._trava:
+            self._contadores.clear()
+            self._histogramas.clear()
+
+    def _valores(self):
+        "Cópia das séries e valores dos coletores, para exportar fora da trava."
+        with self._trava:
+            contadores = dict(self._contadores)
+            histogramas = {chave: (list(contagens), soma)
+                           for chave, (contagens, soma) in self._histogramas.items()}
+        instantaneos = {}
+        for funcao in self._coletores:
+            instantaneos.update({nome: valor for nome, valor in funcao().items()
+                                 if isinstance(valor, (int, float)) and not isinstance(valor, bool)})
+        return contadores, histogramas, instantaneos
+
+    def resumo(self):
+        """
+        Séries em um dicionário pronto para JSON.
+
+        Returns:
+            dict: {'contadores', 'histogramas', 'instantaneos'}. Cada histograma
+            tem contagem, soma, média e as contagens acumuladas por balde
+            ({limite superior: contagem}), como no Prometheus.
+        """
+        contadores, histogramas, instantaneos = self._valores()
+        saida = {'contadores': {}, 'histogramas': {}, 'instantaneos': instantaneos}
+        for (nome, rotulos), valor in sorted(contadores.items()):
+            saida['contadores'].setdefault(nome, []).append({'rotulos': dict(rotulos), 'valor': valor})
+        for (nome, rotulos), (contagens, soma) in sorted(histogramas.items()):
+            total = sum(contagens)
+            acumuladas = dict(zip([str(b) for b in self.baldes] + ['+Inf'], _acumular(contagens)))
+            saida['histogramas'].setdefault(nome, []).append({
+                'rotulos': dict(rotulos), 'contagem': total, 'soma': soma,
+                'media': soma / total if total else None, 'baldes': acumuladas
+            })
+        return saida
+
+    def prometheus(self):
+        "Séries no formato de texto do Prometheus (versão 0.0.4)."
+        contadores, histogramas, instantaneos = self._valores()
+        linhas = []
+        for nome in sorted({nome for nome, _ in contadores}):
+            linhas.append(f'# TYPE {PREFIXO}{nome}_total counter')
+            for (serie, rotulos), valor in sorted(contadores.items()):
+                if serie == nome:
+                    linhas.append(f'{PREFIXO}{nome}_total{_rotulos(rotulos)} {valor}')
+        for nome in sorted({nome for nome, _ in histogramas}):
+            linhas.append(f'# TYPE {PREFIXO}{nome} histogram')
+            for (serie, rotulos), (contagens, soma) in sorted(histogramas.items()):
+                if serie != nome:
+                    continue
+                limites = [repr(b) for b in self.baldes] + ['+Inf']
+                for limite, acumulada in zip(limites, _acumular(contagens)):
+                    linhas.append(f'{PREFIXO}{nome}_bucket{_rotulos(rotulos + (("le", limite),))} {acumulada}')
+                linhas.append(f'{PREFIXO}{nome}_sum{_rotulos(rotulos)} {soma!r}')
+                linhas.append(f'{PREFIXO}{nome}_count{_rotulos(rotulos)} {sum(contagens)}')
+        for nome, valor in sorted(instantaneos.items()):
+            linhas.append(f'# TYPE {PREFIXO}{nome} gauge')
+            linhas.append(f'{PREFIXO}{nome} {valor!r}')
+        return '\n'.join(linhas) + '\n'
+
+    def gravar_json(self, caminho):
+        "Grava o resumo em um arquivo JSON."
+        with open(caminho, 'w', encoding='utf-8') as arquivo:
+            json.dump(self.resumo(), arquivo, ensure_ascii=False, indent=2)
+        return caminho
+
+
+class _Cronometro:
+    "Gerenciador de contexto de Metricas.cronometro (uma classe custa menos que um @contextmanager)."
+
+    __slots__ = ('metricas', 'chave', 'inicio')
+
+    def __init__(self, metricas, chave):
+        self.metricas = metricas
+        self.chave = chave
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+
+    def __exit__(self, *erro):
+        if self.metricas.ativo:
+            self.metricas._observar(self.chave, time.perf_counter() - self.inicio)
+
+
+def _acumular(contagens):
+    total, acumuladas = 0, []
+    for contagem in contagens:
+        total += contagem
+        acumuladas.append(total)
+    return acumuladas
+
+
+def _rotulos(rotulos):
+    if not rotulos:
+        return ''
+    pares = ','.join('{}="{}"'.format(nome, str(valor).replace('\\', '\\\\').replace('"', '\\"'))
+                     for nome, valor in rotulos)
+    return '{' + pares + '}'
+
+
+METRICAS = Metricas(ativo=os.environ.get('PREVINAD_METRICAS', '1') != '0')
+
+# Atalhos para o registro do processo
+etapa = METRICAS.cronometro
+contar = METRICAS.contar
+observar = METRICAS.observar
+
+_perfilando = threading.Lock()
+
+
+@contextlib.contextmanager
+def perfil(nome='perfil', diretorio=DIRETORIO_PERFIS, linhas=30):
+    """
+    Captura cProfile e tracemalloc do bloco e grava os resultados.
+
+    Só um perfil roda por vez no processo; se outro já estiver ativo, o
+    bloco executa sem perfil.
+
+    Args:
+        nome (str): Início do nome dos arquivos gravados.
+        diretorio (str): Onde gravar os arquivos.
+        linhas (int): Quantas funções e linhas de alocação listar no relatório.
+
+    Yields:
+        dict: Preenchido na saída do bloco com 'prof' (estatísticas do
+        cProfile, para pstats ou snakeviz) e 'relatorio' (texto com as
+        funções mais caras, as maiores alocações e o pico de memória).
+        Vazio se o perfil não rodou.
+    """
+    import cProfile
+    import tracemalloc
+
+    caminhos = {}
+    if not _perfilando.acquire(blocking=False):
+        yield caminhos
+        return
+    try:
+        iniciou = not tracemalloc.is_tracing()
+        if iniciou:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        antes = tracemalloc.take_snapshot()
+        perfilador = cProfile.Profile()
+        perfilador.enable()
+        try:
+            yield caminhos
+        finally:
+            perfilador.disable()
+            depois = tracemalloc.take_snapshot()
+            pico = tracemalloc.get_traced_memory()[1]
+            if iniciou:
+                tracemalloc.stop()
+            caminhos.update(_gravar_perfil(nome, diretorio, linhas, perfilador, antes, depois, pico))
+    finally:
+        _perfilando.release()
+
+
+def _gravar_perfil(nome, diretorio, linhas, perfilador, antes, depois, pico):
+    import io
+    import pstats
+
+    os.makedirs(diretorio, exist_ok=True)
+    base = os.path.join(diretorio, f"{nome}_{time.strftime('%Y%m%d_%H%M%S')}_{os.getpid()}")
+    perfilador.dump_stats(base + '.prof')
+
+    texto = io.StringIO()
+    pstats.Stats(perfilador, stream=texto).sort_stats('cumulative').print_stats(linhas)
+    texto.write(f'\nPico de memória rastreada: {pico / 1e6:.3f} MB\n')
+    texto.write(f'Maiores alocações no trecho (tracemalloc):\n')
+    for diferenca in depois.compare_to(antes, 'lineno')[:linhas]:
+        texto.write(f'  {diferenca}\n')
+    with open(base + '.txt', 'w', encoding='utf-8') as arquivo:
+        arquivo.write(texto.getvalue())
+    return {'prof': base + '.prof', 'relatorio': base + '.txt'}
@@ -0,0 +1,364 @@
+"""
+Monitoramento de deriva dos dados e da calibração, atualizado a cada pontuação.
+
+O treino guarda no artefato uma referência (ver referencia_matriz): quantas
+linhas ativaram cada dummy de modelo_vars, o histograma de cada variável
+numérica (já normalizada) e o histograma das probabilidades previstas, com
+os desfechos observados em cada faixa de probabilidade.
+
+Cada linha pontuada (inferencia.pontuar_codificadas) soma nas mesmas
+contagens de um Monitor por versão do modelo, a partir da forma compacta do
+Codificador: o custo é constante por linha e nada do histórico precisa ser
+relido. As distribuições atuais são comparadas com as da referência pelo
+PSI (índice de estabilidade populacional) e pela divergência KL:
+
+    PSI < 0,10          estável
+    0,10 <= PSI < 0,25  atenção
+    PSI >= 0,25         alerta
+
+Para modelos sem referência no artefato (como o modelo_final.pkl do
+notebook), ela pode ser calculada a partir do arquivo de treino e gravada em
+data/referencia_<versao>.npz:
+
+    python -m previnad.monitoramento referencia peru_student_enrollment_data_2023.csv
+
+Com a variável de ambiente PREVINAD_MONITORAMENTO=0, as pontuações não são
+registradas.
+"""
+import argparse
+import os
+import threading
+
+import numpy as np
+
+DIRETORIO_REFERENCIAS = 'data'
+ATIVO = os.environ.get('PREVINAD_MONITORAMENTO', '1') != '0'
+
+# Faixas dos histogramas: variáveis numéricas (normalizadas em [0, 1]) e probabilidades
+FAIXAS_DENSAS = 10
+FAIXAS_PROB = 20
+
+# Limites de PSI dos níveis 'atencao' e 'alerta', e mínimo de linhas para avaliar a deriva
+LIMITE_ATENCAO = 0.10
+LIMITE_ALERTA = 0.25
+MINIMO_LINHAS = 500
+# Fração de linhas com valores ausentes ou desconhecidos que gera alerta (o treino não tem nenhuma)
+LIMITE_INVALIDAS = 0.05
+
+# Chaves da referência, gravadas com o prefixo 'referencia_' nos artefatos .npz
+CHAVES_REFERENCIA = ('linhas', 'colunas', 'densas', 'prob', 'soma_prob', 'positivos')
+
+# Frequência mínima usada no PSI e na KL, para faixas vazias não darem log(0)
+_PISO = 1e-4
+
+_monitores = {}   # versão do modelo -> Monitor
+_trava = threading.Lock()
+
+
+def _faixas(valores, n):
+    "Faixa (0 a n - 1) de cada valor em [0, 1]; valores fora do intervalo vão para a faixa da ponta."
+    # minimum/maximum em vez de np.clip, bem mais lento para as poucas linhas de um envio do formulário
+    faixas = (np.asarray(valores) * n).astype(np.intp)
+    return np.minimum(np.maximum(faixas, 0, out=faixas), n - 1, out=faixas)
+
+
+def _variaveis_densas(esquema):
+    """
+    Variáveis numéricas na ordem das colunas, a das linhas de 'densas'.
+
+    A ordem do dicionário esquema['densas'] não serve: o esquema gravado no
+    .npz volta com as chaves em ordem alfabética.
+    """
+    return [nome for nome in esquema['colunas'] if nome in esquema['densas']]
+
+
+def referencia_matriz(esquema, X, prob, y=None):
+    """
+    Referência do monitoramento a partir da matriz de treino.
+
+    Args:
+        esquema (dict): Esquema do modelo (ver previnad.esquema).
+        X (scipy.sparse.csr_matrix): Matriz de treino, nas colunas do esquema.
+        prob (np.ndarray): Probabilidade de adimplência prevista para cada linha.
+        y (np.ndarray, opcional): Desfecho de cada linha (1 = adimplente), para a calibração.
+
+    Returns:
+        dict: {'linhas', 'colunas', 'densas', 'prob', 'soma_prob', 'positivos'}
+        ('positivos' é None sem y).
+    """
+    colunas = esquema['colunas']
+    X = X.tocsc()
+    densas = np.zeros((len(esquema['densas']), FAIXAS_DENSAS), dtype=np.int64)
+    for k, nome in enumerate(_variaveis_densas(esquema)):
+        valores = X[:, colunas.index(nome)].toarray().ravel()
+        densas[k] = np.bincount(_faixas(valores, FAIXAS_DENSAS), minlength=FAIXAS_DENSAS)
+
+    faixas = _faixas(prob, FAIXAS_PROB)
+    return {
+        'linhas': int(X.shape[0]),
+        'colunas': np.asarray(X.getnnz(axis=0), dtype=np.int64),
+        'densas': densas,
+        'prob': np.bincount(faixas, minlength=FAIXAS_PROB).astype(np.int64),
+        'soma_prob': np.bincount(faixas, weights=prob, minlength=FAIXAS_PROB),
+        'positivos': (np.bincount(faixas, weights=y, minlength=FAIXAS_PROB).astype(np.int64)
+                      if y is not None else None)
+    }
+
+
+def somar_referencias(a, b):
+    "Soma duas referências do mesmo esquema (por exemplo, o histórico e um lote novo)."
+    soma = {chave: a[chave] + b[chave] for chave in CHAVES_REFERENCIA if chave != 'positivos'}
+    soma['positivos'] = (a['positivos'] + b['positivos']
+                         if a['positivos'] is not None and b['positivos'] is not None else None)
+    return soma
+
+
+def psi(atual, referencia):
+    "Índice de estabilidade populacional entre duas contagens nas mesmas faixas."
+    p = np.maximum(atual / max(atual.sum(), 1), _PISO)
+    q = np.maximum(referencia / max(referencia.sum(), 1), _PISO)
+    return float(np.sum((p - q) * np.log(p / q)))
+
+
+def kl(atual, referencia):
+    "Divergência KL da distribuição atual para a de referência."
+    p = np.maximum(atual / max(atual.sum(), 1), _PISO)
+    q = np.maximum(referencia / max(referencia.sum(), 1), _PISO)
+    return float(np.sum(p * np.log(p / q)))
+
+
+def nivel(valor):
+    "'estavel', 'atencao' ou 'alerta' para um PSI."
+    if valor >= LIMITE_ALERTA:
+        return 'alerta'
+    if valor >= LIMITE_ATENCAO:
+        return 'atencao'
+    return 'estavel'
+
+
+def calibracao(contagens, soma_prob, positivos):
+    """
+    Erro de calibração esperado (ECE) por faixa de probabilidade.
+
+    Returns:
+        float: Média, ponderada pelas linhas de cada faixa, de
+        |probabilidade média prevista - fração de adimplentes observada|
+        (None sem linhas).
+    """
+    total = contagens.sum()
+    if not total:
+        return None
+    ocupadas = contagens > 0
+    return float(np.abs(soma_prob[ocupadas] - positivos[ocupadas]).sum() / total)
+
+
+class Monitor:
+    """
+    Contagens das linhas pontuadas por uma versão do modelo, comparáveis com a referência do treino.
+
+    Args:
+        esquema (dict): Esquema do modelo.
+        referencia (dict, opcional): Referência de referencia_matriz; sem ela,
+            as contagens são mantidas, mas a deriva não é avaliada.
+    """
+
+    def __init__(self, esquema, referencia=None):
+        self.esquema = esquema
+        self.referencia = referencia
+        colunas = esquema['colunas']
+        self._posicao = {nome: i for i, nome in enumerate(colunas)}
+        # Colunas das dummies de cada variável categórica (a categoria base é o que sobra)
+        self._categoricas = {nome: np.array([self._posicao[f'{nome}_{c}'] for c in info['categorias']],
+                                            dtype=np.intp)
+                             for nome, info in esquema['categoricas'].items()}
+        self._densas = {self._posicao[nome]: k for k, nome in enumerate(_variaveis_densas(esquema))}
+
+        self.linhas = 0
+        self.invalidas = 0
+        self.colunas = np.zeros(len(colunas) + 1, dtype=np.int64)   # a última é a sentinela
+        self.densas = np.zeros((len(esquema['densas']), FAIXAS_DENSAS), dtype=np.int64)
+        self.prob = np.zeros(FAIXAS_PROB, dtype=np.int64)
+        self.desfechos = np.zeros(FAIXAS_PROB, dtype=np.int64)
+        self.soma_prob_desfechos = np.zeros(FAIXAS_PROB)
+        self.positivos = np.zeros(FAIXAS_PROB, dtype=np.int64)
+        self._trava = threading.Lock()
+
+    def registrar(self, codificador, ativos, densas, validos, prob):
+        """
+        Soma as linhas pontuadas nas contagens.
+
+        Args:
+            codificador (Codificador): Codificador que gerou a forma compacta.
+            ativos, densas, validos: Saída de codificar_ativos.
+            prob (np.ndarray): Probabilidade de adimplência de cada linha.
+        """
+        todas = validos.all()
+        if not todas:
+            ativos, densas, prob = ativos[validos], densas[validos], prob[validos]
+        colunas = np.bincount(ativos.ravel(), minlength=len(self.colunas))
+        # Um único bincount para todas as variáveis numéricas: a faixa de cada uma vai para a sua linha de self.densas
+        linhas_densas = np.array([self._densas[coluna] for coluna in codificador.colunas_densas.tolist()])
+        faixas = linhas_densas * FAIXAS_DENSAS + _faixas(densas, FAIXAS_DENSAS)
+        contagens_densas = np.bincount(faixas.ravel(), minlength=self.densas.size).reshape(self.densas.shape)
+        faixas_prob = np.bincount(_faixas(prob, FAIXAS_PROB), minlength=FAIXAS_PROB)
+        with self._trava:
+            self.linhas += len(ativos)
+            self.invalidas += 0 if todas else int(len(validos) - len(ativos))
+            self.colunas += colunas
+            self.densas += contagens_densas
+            self.prob += faixas_prob
+
+    def registrar_desfechos(self, prob, y):
+        """
+        Soma desfechos observados (1 = adimplente) das probabilidades previstas, para a calibração.
+
+        Raises:
+            ValueError: Se um desfecho não é 0 ou 1 ou uma probabilidade está fora de [0, 1].
+        """
+        prob, y = np.asarray(prob, dtype=float), np.asarray(y)
+        if not np.isin(y, (0, 1)).all():
+            raise ValueError("Os desfechos devem ser 0 ou 1")
+        if not ((prob >= 0) & (prob <= 1)).all():
+            raise ValueError("As probabilidades devem estar entre 0 e 1")
+        faixas = _faixas(prob, FAIXAS_PROB)
+        with self._trava:
+            self.desfechos += np.bincount(faixas, minlength=FAIXAS_PROB)
+            self.soma_prob_desfechos += np.bincount(faixas, weights=prob, minlength=FAIXAS_PROB)
+            self.positivos += np.bincount(faixas, weights=y, minlength=FAIXAS_PROB).astype(np.int64)
+
+    def distribuicoes(self):
+        """
+        Contagens atuais e de referência de cada variável e das probabilidades.
+
+        Returns:
+            dict: {variável: (atual, referência ou None)}; nas categóricas, a
+            primeira posição é a categoria base. As probabilidades ficam em '__prob__'.
+        """
+        with self._trava:
+            linhas, colunas = self.linhas, self.colunas.copy()
+            densas, prob = self.densas.copy(), self.prob.copy()
+        ref = self.referencia
+
+        resultado = {}
+        for nome, indices in self._categoricas.items():
+            atual = np.concatenate([[linhas - colunas[indices].sum()], colunas[indices]])
+            referencia = None
+            if ref is not None:
+                referencia = np.concatenate([[ref['linhas'] - ref['colunas'][indices].sum()],
+                                             ref['colunas'][indices]])
+            resultado[nome] = (atual, referencia)
+        for k, nome in enumerate(_variaveis_densas(self.esquema)):
+            resultado[nome] = (densas[k], ref['densas'][k] if ref is not None else None)
+        resultado['__prob__'] = (prob, ref['prob'] if ref is not None else None)
+        return resultado
+
+    def relatorio(self):
+        """
+        Deriva de cada variável e das probabilidades, e calibração.
+
+        Returns:
+            dict: {'linhas', 'invalidas', 'referencia' (se há referência),
+            'variaveis': [{'variavel', 'psi', 'kl', 'nivel'}] do maior para o
+            menor PSI (vazia sem referência ou com menos de MINIMO_LINHAS),
+            'calibracao': {'ece', 'ece_treino', 'desfechos'}, 'alertas': [texto]}.
+        """
+        variaveis = []
+        if self.referencia is not None and self.linhas >= MINIMO_LINHAS:
+            for nome, (atual, referencia) in self.distribuicoes().items():
+                valor = psi(atual, referencia)
+                variaveis.append({'variavel': 'probabilidade' if nome == '__prob__' else nome,
+                                  'psi': valor, 'kl': kl(atual, referencia), 'nivel': nivel(valor)})
+            variaveis.sort(key=lambda item: item['psi'], reverse=True)
+
+        with self._trava:
+            ece = calibracao(self.desfechos, self.soma_prob_desfechos, self.positivos)
+            desfechos = int(self.desfechos.sum())
+        ref = self.referencia
+        ece_treino = (calibracao(ref['prob'], ref['soma_prob'], ref['positivos'])
+                      if ref is not None and ref['positivos'] is not None else None)
+
+        total = self.linhas + self.invalidas
+        alertas = [f"{item['variavel']}: PSI {item['psi']:.3f} ({item['nivel']})"
+                   for item in variaveis if item['nivel'] != 'estavel']
+        if total >= MINIMO_LINHAS and self.invalidas / total >= LIMITE_INVALIDAS:
+            alertas.append(f"{self.invalidas / total:.1%} das linhas com valores ausentes ou desconhecidos")
+        if ece is not None and ece_treino is not None and desfechos >= MINIMO_LINHAS \
+                and ece >= max(2 * ece_treino, ece_treino + 0.02):
+            alertas.append(f"Calibração: ECE {ece:.3f} nos desfechos observados (treino: {ece_treino:.3f})")
+        return {
+            'linhas': self.linhas,
+            'invalidas': self.invalidas,
+            'referencia': self.referencia is not None,
+            'variaveis': variaveis,
+            'calibracao': {'ece': ece, 'ece_treino': ece_treino, 'desfechos': desfechos},
+            'alertas': alertas
+        }
+
+
+def caminho_referencia(versao, diretorio=DIRETORIO_REFERENCIAS):
+    "Arquivo da referência calculada fora do treino para uma versão do modelo."
+    return os.path.join(diretorio, f'referencia_{versao}.npz')
+
+
+def gravar_referencia(referencia, caminho):
+    "Grava a referência num .npz (as chaves com o prefixo 'referencia_', como nos artefatos)."
+    np.savez(caminho, **{f'referencia_{chave}': valor for chave, valor in referencia.items() if valor is not None})
+    return caminho
+
+
+def ler_referencia(dados):
+    "Referência das chaves 'referencia_*' de um .npz aberto (ou None, se não há)."
+    if 'referencia_linhas' not in dados:
+        return None
+    referencia = {chave: dados[f'referencia_{chave}'] if f'referencia_{chave}' in dados else None
+                  for chave in CHAVES_REFERENCIA}
+    referencia['linhas'] = int(referencia['linhas'])
+    return referencia
+
+
+def monitor(modelo):
+    """
+    Monitor da versão do modelo, único por processo.
+
+    A referência vem do artefato ('referencia') ou, se ele não tem, de
+    data/referencia_<versao>.npz (ver main).
+    """
+    with _trava:
+        if modelo['versao'] not in _monitores:
+            referencia = modelo.get('referencia')
+            caminho = caminho_referencia(modelo['versao'])
+            if referencia is None and os.path.exists(caminho):
+                with np.load(caminho, allow_pickle=False) as dados:
+                    referencia = ler_referencia(dados)
+            _monitores[modelo['versao']] = Monitor(modelo['esquema'], referencia)
+        return _monitores[modelo['versao']]
+
+
+def registrar(modelo, codificador, ativos, densas, validos, prob):
+    "Soma as linhas pontuadas no monitor do modelo (nada, com PREVINAD_MONITORAMENTO=0)."
+    if ATIVO and len(validos):
+        monitor(modelo).registrar(codificador, ativos, densas, validos, prob)
+
+
+def main(argv=None):
+    from previnad import inferencia, registro, treino
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    comandos = parser.add_subparsers(dest='comando', required=True)
+    comando = comandos.add_parser('referencia', help='Calcula a referência a partir do arquivo de treino')
+    comando.add_argument('dados', help='Arquivo com que o modelo foi treinado (CSV separado por ; ou Parquet)')
+    comando.add_argument('--modelo', default=os.path.join('data', 'modelo_final.pkl'))
+    comando.add_argument('--diretorio', default=DIRETORIO_REFERENCIAS)
+    args = parser.parse_args(argv)
+
+    modelo = registro.carregar_modelo(args.modelo)
+    df = treino.ler_dados(args.dados)
+    X, y = treino.matriz(df[df.notna().all(axis=1)], modelo['esquema'])
+    _, prob = inferencia.pontuar(modelo, X)
+    referencia = referencia_matriz(modelo['esquema'], X, prob, y)
+    os.makedirs(args.diretorio, exist_ok=True)
+    print(gravar_referencia(referencia, caminho_referencia(modelo['versao'], args.diretorio)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,289 @@
+"""
+Registro de modelos.
+
+Carrega cada artefato uma única vez por processo, usando o hash do arquivo
+como chave, e permite exportar o modelo treinado para um formato .npz sem
+pickle. Os artefatos exportados ficam lado a lado em data/modelos/, um por
+versão, e são carregados sem importar o scikit-learn.
+
+Um .pkl de regressão logística pode ter uma cópia .npz ao lado (por
+exemplo, data/modelo_final.npz), gravada por exportar_ao_lado (ou --ao-lado)
+e marcada com o hash do .pkl e com a mesma versão. Enquanto o .pkl não
+muda, carregar_modelo lê essa cópia: a partida não importa o scikit-learn
+nem desserializa o pickle. A carga nunca grava arquivos.
+
+Na carga, o esquema compilado das variáveis (gravado pelo treino ou, nos
+artefatos antigos, reconstruído a partir das colunas e da escala) é
+validado uma única vez e dá origem aos codificadores do modelo.
+
+Uso (na raiz do repositório):
+    python -m previnad.registro data/modelo_final.pkl
+    python -m previnad.registro data/modelo_final.pkl --ao-lado
+"""
+import hashlib
+import os
+import pickle
+import sys
+import threading
+from concurrent.futures import Future
+
+import numpy as np
+
+from previnad import metricas, monitoramento
+from previnad.codificacao import codificador_arquivo, codificador_formulario
+from previnad.dominios import ler_escala
+from previnad.esquema import compilar_esquema, desserializar, serializar, validar_esquema
+from previnad.inferencia import ModeloLogistico, motor_inferencia
+
+DIRETORIO_MODELOS = os.path.join('data', 'modelos')
+VERSAO_FORMATO = 1
+
+_modelos = {}     # hash do arquivo -> modelo carregado
+_hashes = {}      # (caminho, mtime, tamanho) -> hash do arquivo
+_trava = threading.Lock()
+
+
+def hash_arquivo(caminho):
+    """
+    Calcula o SHA-256 do arquivo, reaproveitando o último resultado enquanto
+    o arquivo não muda (mesmo mtime e tamanho).
+    """
+    info = os.stat(caminho)
+    chave = (os.path.abspath(caminho), info.st_mtime_ns, info.st_size)
+    if chave not in _hashes:
+        sha = hashlib.sha256()
+        with open(caminho, 'rb') as arquivo:
+            for bloco in iter(lambda: arquivo.read(1 << 20), b''):
+                sha.update(bloco)
+        _hashes[chave] = sha.hexdigest()
+    return _hashes[chave]
+
+
+def carregar_modelo(caminho, usar_npz=True):
+    """
+    Carrega um artefato de modelo (.pkl ou .npz), uma única vez por conteúdo.
+
+    Args:
+        caminho (str): Caminho do artefato.
+        usar_npz (bool): Para um .pkl, lê a cópia .npz ao lado quando ela
+            existe e corresponde ao .pkl (ver exportar_ao_lado). Com False,
+            sempre desserializa o pickle.
+
+    Returns:
+        dict: {'metodo', 'resultados', 'escala', 'f1'}, no mesmo formato do
+        modelo_final.pkl gerado pelo notebook, mais 'versao' (a gravada no
+        .npz ou, para o .pkl, o início do hash do arquivo), 'motor' (motor
+        NumPy de previnad.inferencia, ou None se o modelo não for logístico),
+        'esquema' (ver previnad.esquema) e 'codificadores'
+        ({'formulario', 'arquivo'}: Codificador montado a partir do esquema).
+
+    Raises:
+        ValueError: Se o esquema não corresponde ao modelo (ver esquema.validar_esquema).
+    """
+    versao = hash_arquivo(caminho)
+    chave = (versao, usar_npz)
+    with _trava:
+        if chave not in _modelos:
+            with metricas.etapa('carregar_modelo'):
+                modelo = _ler_artefato(caminho, versao, usar_npz)
+            modelo.setdefault('versao', versao[:12])
+            _preparar_codificadores(modelo)
+            modelo['motor'] = motor_inferencia(modelo['resultados'])
+            _modelos[chave] = modelo
+        return _modelos[chave]
+
+
+def _preparar_codificadores(modelo):
+    "Valida o esquema do modelo (montando-o, se o artefato não tem) e cria os codificadores."
+    params = modelo['resultados']
+    esquema = modelo.get('esquema') or compilar_esquema(params.feature_names_in_, modelo['escala'])
+    validar_esquema(esquema, params, modelo['escala'])
+    modelo['esquema'] = esquema
+    modelo['codificadores'] = {
+        'formulario': codificador_formulario(esquema),
+        'arquivo': codificador_arquivo(esquema)
+    }
+
+
+def carregar_em_segundo_plano(caminho):
+    """
+    Começa a carregar o artefato numa thread, para a carga correr junto com o resto da partida.
+
+    Returns:
+        concurrent.futures.Future: Resolvido com o modelo de carregar_modelo.
+    """
+    futuro = Future()
+
+    def carregar():
+        try:
+            futuro.set_result(carregar_modelo(caminho))
+        except BaseException as erro:
+            futuro.set_exception(erro)
+
+    threading.Thread(target=carregar, name='previnad-carga', daemon=True).start()
+    return futuro
+
+
+def _ler_artefato(caminho, versao, usar_npz):
+    if caminho.endswith('.npz'):
+        return _ler_npz(caminho)
+    if usar_npz:
+        modelo = _ler_ao_lado(caminho, versao)
+        if modelo is not None:
+            return modelo
+    with open(caminho, 'rb') as arquivo:
+        return pickle.load(arquivo)
+
+
+def _caminho_ao_lado(caminho):
+    return os.path.splitext(caminho)[0] + '.npz'
+
+
+def _ler_ao_lado(caminho, versao):
+    "Modelo da cópia .npz do .pkl, ou None se ela não existe ou é de outro .pkl."
+    ao_lado = _caminho_ao_lado(caminho)
+    try:
+        with np.load(ao_lado, allow_pickle=False) as dados:
+            if 'origem' not in dados or str(dados['origem']) != versao:
+                return None
+        return _ler_npz(ao_lado)
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def _ler_npz(caminho):
+    "Lê um artefato .npz gerado por exportar_modelo."
+    with np.load(caminho, allow_pickle=False) as dados:
+        if int(dados['versao_formato']) != VERSAO_FORMATO:
+            raise ValueError(f"Formato de artefato não suportado: {caminho}")
+        resultados = ModeloLogistico(dados['coef'], dados['intercept'],
+                                     dados['classes'], dados['variaveis'].tolist())
+        escala = [{nome: [float(minimo), float(maximo)]}
+                  for nome, (minimo, maximo) in zip(dados['escala_nomes'].tolist(),
+                                                    dados['escala_limites'])]
+        modelo = {
+            'metodo': str(dados['metodo']),
+            'resultados': resultados,
+            'escala': escala,
+            'f1': float(dados['f1']),
+            'versao': str(dados['versao'])
+        }
+        # Estatísticas do retreino incremental (previnad.incremental), quando exportadas
+        if 'hessiana' in dados:
+            modelo.update(hessiana=dados['hessiana'], C=float(dados['C']), n_treino=int(dados['n_treino']))
+        if 'esquema' in dados:
+            modelo['esquema'] = desserializar(str(dados['esquema']))
+        referencia = monitoramento.ler_referencia(dados)
+        if referencia is not None:
+            modelo['referencia'] = referencia
+        return modelo
+
+
+def exportar_modelo(modelo, diretorio=DIRETORIO_MODELOS):
+    """
+    Exporta um modelo logístico para um artefato .npz sem pickle.
+
+    O nome do arquivo leva a versão (hash dos coeficientes e metadados), de
+    modo que várias versões podem conviver no mesmo diretório. As estatísticas
+    do retreino incremental ('hessiana', 'C' e 'n_treino'), o esquema e a
+    referência do monitoramento, se houver, vão junto. O esquema e a
+    referência não entram na versão: o esquema só repete as colunas e a
+    escala, a referência descreve os dados de treino e não muda as
+    predições, e um artefato exportado de novo mantém a versão.
+
+    Args:
+        modelo (dict): Conteúdo do modelo_final.pkl.
+        diretorio (str): Onde salvar o artefato.
+
+    Returns:
+        str: Caminho do arquivo criado.
+    """
+    arrays = _arrays(modelo)
+    sha = hashlib.sha256()
+    for nome in sorted(nome for nome in arrays if nome != 'esquema' and not nome.startswith('referencia_')):
+        sha.update(nome.encode())
+        sha.update(arrays[nome].tobytes())
+    versao = sha.hexdigest()[:12]
+    arrays['versao'] = np.array(versao)
+
+    os.makedirs(diretorio, exist_ok=True)
+    return _gravar_npz(os.path.join(diretorio, f'modelo_{versao}.npz'), arrays)
+
+
+def exportar_ao_lado(modelo, caminho, versao=None):
+    """
+    Grava a cópia .npz de um .pkl logístico ao lado dele (mesmo nome, extensão .npz).
+
+    A cópia guarda o hash do .pkl ('origem') e a mesma versão que o .pkl
+    teria, de modo que caches e tabelas de risco continuam valendo.
+
+    Args:
+        modelo (dict): Conteúdo do .pkl.
+        caminho (str): Caminho do .pkl.
+        versao (str, opcional): Hash do .pkl, se já calculado.
+
+    Returns:
+        str: Caminho da cópia.
+    """
+    versao = versao or hash_arquivo(caminho)
+    arrays = _arrays(modelo)
+    arrays.update(origem=np.array(versao), versao=np.array(versao[:12]))
+    return _gravar_npz(_caminho_ao_lado(caminho), arrays)
+
+
+def _gravar_npz(caminho, arrays):
+    "Grava num arquivo temporário e troca de uma vez, para um leitor nunca ver o arquivo pela metade."
+    temporario = f'{caminho}.{os.getpid()}.tmp'
+    with open(temporario, 'wb') as arquivo:
+        np.savez(arquivo, **arrays)
+    os.replace(temporario, caminho)
+    return caminho
+
+
+def _arrays(modelo):
+    "Arrays do artefato .npz (sem a versão); o esquema vai em JSON e a referência com o prefixo 'referencia_'."
+    params = modelo['resultados']
+    limites = ler_escala(modelo['escala'])
+    arrays = {
+        'versao_formato': np.array(VERSAO_FORMATO),
+        'metodo': np.array(modelo['metodo']),
+        'f1': np.array(float(modelo['f1'])),
+        'coef': np.asarray(params.coef_, dtype=float),
+        'intercept': np.asarray(params.intercept_, dtype=float),
+        'classes': np.asarray(params.classes_),
+        'variaveis': np.asarray(params.feature_names_in_, dtype=str),
+        'escala_nomes': np.array(list(limites), dtype=str),
+        'escala_limites': np.array(list(limites.values()), dtype=float).reshape(-1, 2)
+    }
+    if 'hessiana' in modelo:
+        arrays.update(hessiana=np.asarray(modelo['hessiana'], dtype=float),
+                      C=np.array(float(modelo['C'])), n_treino=np.array(int(modelo['n_treino'])))
+    if 'esquema' in modelo:
+        arrays['esquema'] = np.array(serializar(modelo['esquema']))
+    if modelo.get('referencia') is not None:
+        arrays.update({f'referencia_{chave}': np.asarray(valor) for chave, valor in modelo['referencia'].items()
+                       if valor is not None})
+    return arrays
+
+
+def listar_modelos(diretorio=DIRETORIO_MODELOS):
+    """
+    Lista os artefatos .npz disponíveis, do mais recente para o mais antigo.
+
+    Returns:
+        list: Caminhos dos artefatos.
+    """
+    if not os.path.isdir(diretorio):
+        return []
+    caminhos = [os.path.join(diretorio, nome) for nome in os.listdir(diretorio)
+                if nome.startswith('modelo_') and nome.endswith('.npz')]
+    return sorted(caminhos, key=os.path.getmtime, reverse=True)
+
+
+if __name__ == '__main__':
+    argumentos = [arg for arg in sys.argv[1:] if arg != '--ao-lado']
+    origem = argumentos[0] if argumentos else os.path.join('data', 'modelo_final.pkl')
+    if '--ao-lado' in sys.argv:
+        print(exportar_ao_lado(carregar_modelo(origem, usar_npz=False), origem))
+    else:
+        print(exportar_modelo(carregar_modelo(origem)))
@@ -0,0 +1,242 @@
+"""
+Seleção de modelos por validação cruzada, em paralelo e com cache em disco.
+
+Equivale ao laço do notebook (cross_val_score(modelo, X, y, cv=5,
+scoring='f1') para cada candidato), mas:
+
+- as partições são calculadas uma única vez e compartilhadas por todos os
+  candidatos;
+- cada par (candidato, partição) é uma tarefa independente, executada num
+  pool de processos;
+- um candidato é descartado assim que nem com F1 = 1 nas partições que
+  faltam ele alcançaria a média já garantida por outro candidato;
+- o F1 de cada tarefa fica em cache no disco, com chave formada pelo hash
+  dos dados, pela partição, pelo candidato e por seus hiperparâmetros.
+  Rodar de novo com os mesmos dados só calcula os candidatos novos ou com
+  hiperparâmetros alterados. Candidatos com random_state=None (a árvore e
+  a floresta do notebook) dão outro F1 a cada ajuste e não entram no cache.
+
+O hash cobre a matriz de treino inteira: acrescentar ou alterar uma única
+linha muda a chave de todas as tarefas, e todos os candidatos e partições
+são recalculados. O cache só poupa trabalho quando os dados são os mesmos.
+"""
+import hashlib
+import json
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+
+from previnad.inferencia import usa_esparsa
+
+DIRETORIO_CACHE = os.path.join('data', 'cache_selecao')
+
+# Dados compartilhados com os processos do pool (definidos em _iniciar)
+_X = _y = _particoes = None
+
+
+def candidatos():
+    "Modelos comparados na validação cruzada, como no notebook."
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.naive_bayes import GaussianNB
+    from sklearn.neighbors import KNeighborsClassifier
+    from sklearn.tree import DecisionTreeClassifier
+
+    return {
+        'Logit': LogisticRegression(),
+        'NB': GaussianNB(),
+        'KNN': KNeighborsClassifier(),
+        'Tree': DecisionTreeClassifier(),
+        'Forest': RandomForestClassifier()
+    }
+
+
+def particoes(y, cv=5):
+    "Partições de treino/teste, as mesmas que cross_val_score usaria para um classificador."
+    from sklearn.model_selection import check_cv
+
+    return list(check_cv(cv, y, classifier=True).split(np.zeros((len(y), 1)), y))
+
+
+def hash_dados(X, y):
+    "SHA-256 da matriz de treino (densa ou CSR) e do alvo."
+    sha = hashlib.sha256()
+    arrays = [X.data, X.indices, X.indptr] if hasattr(X, 'tocsr') else [X]
+    for array in arrays + [y]:
+        array = np.ascontiguousarray(array)
+        sha.update(str((array.dtype.str, array.shape)).encode())
+        sha.update(memoryview(array).cast('B'))
+    return sha.hexdigest()
+
+
+def _chave(base, nome, modelo, k):
+    "Chave do cache de uma tarefa: dados e partições (base), candidato, hiperparâmetros e partição k."
+    params = sorted((nome_param, repr(valor)) for nome_param, valor in modelo.get_params().items())
+    texto = json.dumps([base, nome, type(modelo).__name__, params, k])
+    return hashlib.sha256(texto.encode()).hexdigest()[:24]
+
+
+def _deterministico(modelo):
+    "Se o ajuste do candidato se repete com os mesmos dados (sem random_state livre que ele use)."
+    params = modelo.get_params()
+    if params.get('random_state', 0) is not None:
+        return True
+    # A LogisticRegression só sorteia com os solvers sag, saga e liblinear
+    return params.get('solver') in ('lbfgs', 'newton-cg', 'newton-cholesky')
+
+
+def _iniciar(X, y, particoes):
+    global _X, _y, _particoes
+    _X, _y, _particoes = X, y, particoes
+
+
+def _avaliar(modelo, k):
+    "F1 do modelo treinado nas linhas de treino da partição k e avaliado nas de teste."
+    from sklearn.base import clone
+    from sklearn.metrics import get_scorer
+
+    treino, teste = _particoes[k]
+    X_treino, X_teste = _X[treino], _X[teste]
+    if hasattr(_X, 'tocsr') and not usa_esparsa(modelo):
+        X_treino, X_teste = X_treino.toarray(), X_teste.toarray()
+    ajustado = clone(modelo).fit(X_treino, _y[treino])
+    return float(get_scorer('f1')(ajustado, X_teste, _y[teste]))
+
+
+class _Placar:
+    "F1 por partição de cada candidato e os limites da média que ele ainda pode atingir."
+
+    def __init__(self, nomes, n_particoes):
+        self.n = n_particoes
+        self.scores = {nome: [None] * n_particoes for nome in nomes}
+        self.podados = set()
+
+    def registrar(self, nome, k, f1):
+        self.scores[nome][k] = f1
+
+    def limites(self, nome):
+        "Menor e maior média possíveis, com F1 entre 0 e 1 nas partições que faltam."
+        feitos = [s for s in self.scores[nome] if s is not None]
+        soma = sum(feitos)
+        return soma / self.n, (soma + self.n - len(feitos)) / self.n
+
+    def podar(self):
+        "Descarta os candidatos que já não podem vencer; devolve os recém-descartados."
+        ativos = [nome for nome in self.scores if nome not in self.podados]
+        garantido = max(self.limites(nome)[0] for nome in ativos)
+        novos = {nome for nome in ativos if self.limites(nome)[1] < garantido}
+        self.podados |= novos
+        return novos
+
+
+def selecionar(X, y, modelos=None, cv=5, processos=None, podar=True, diretorio_cache=DIRETORIO_CACHE):
+    """
+    Compara os candidatos por F1 em validação cruzada.
+
+    Args:
+        X (np.ndarray ou scipy.sparse.csr_matrix): Matriz de treino. Com CSR,
+            os modelos não lineares recebem cada partição densificada
+            (ver inferencia.usa_esparsa).
+        y (np.ndarray): Alvo (0/1).
+        modelos (dict, opcional): {nome: estimador não treinado}; padrão: candidatos().
+        cv (int): Número de partições.
+        processos (int, opcional): Tamanho do pool; padrão: número de CPUs.
+            Com 1, as tarefas rodam no próprio processo.
+        podar (bool): Descarta candidatos que já não podem vencer.
+        diretorio_cache (str, opcional): Onde guardar o F1 de cada tarefa; None desliga o cache.
+
+    Returns:
+        dict: {nome: {'model', 'scores', 'mean_f1', 'std_f1', 'podado'}}, na
+        ordem de modelos. Candidatos podados têm apenas as partições
+        calculadas em 'scores' e médias None.
+    """
+    modelos = modelos if modelos is not None else candidatos()
+    divisao = particoes(y, cv)
+    base = hash_dados(X, y) + hashlib.sha256(
+        b''.join(teste.astype(np.int64).tobytes() for _, teste in divisao)).hexdigest()
+    placar = _Placar(list(modelos), len(divisao))
+
+    # Tarefas na ordem dos candidatos: quem termina primeiro fixa a média que os demais
+    # precisam alcançar, e os que já não podem vencer deixam de ocupar o pool
+    tarefas = []
+    for nome, modelo in modelos.items():
+        for k in range(len(divisao)):
+            chave = _chave(base, nome, modelo, k) if _deterministico(modelo) else None
+            f1 = _ler_cache(diretorio_cache, chave)
+            if f1 is None:
+                tarefas.append((nome, k, chave))
+            else:
+                placar.registrar(nome, k, f1)
+
+    if podar:
+        placar.podar()
+    tarefas = [t for t in tarefas if t[0] not in placar.podados]
+
+    processos = processos or os.cpu_count()
+    if processos == 1 or len(tarefas) <= 1:
+        _iniciar(X, y, divisao)
+        for nome, k, chave in tarefas:
+            if nome in placar.podados:
+                continue
+            _concluir(placar, diretorio_cache, nome, k, chave, _avaliar(modelos[nome], k), podar)
+    else:
+        with ProcessPoolExecutor(processos, initializer=_iniciar, initargs=(X, y, divisao)) as pool:
+            pendentes = {pool.submit(_avaliar, modelos[nome], k): (nome, k, chave)
+                         for nome, k, chave in tarefas}
+            while pendentes:
+                prontas, _ = wait(pendentes, return_when=FIRST_COMPLETED)
+                for futuro in prontas:
+                    nome, k, chave = pendentes.pop(futuro)
+                    if not futuro.cancelled():
+                        _concluir(placar, diretorio_cache, nome, k, chave, futuro.result(), podar)
+                # Tarefas de candidatos podados que ainda não começaram são canceladas
+                for futuro, (nome, _, _) in list(pendentes.items()):
+                    if nome in placar.podados and futuro.cancel():
+                        del pendentes[futuro]
+
+    resultados = {}
+    for nome, modelo in modelos.items():
+        scores = placar.scores[nome]
+        completo = nome not in placar.podados and None not in scores
+        resultados[nome] = {
+            'model': modelo,
+            'scores': scores,
+            'mean_f1': float(np.mean(scores)) if completo else None,
+            'std_f1': float(np.std(scores)) if completo else None,
+            'podado': nome in placar.podados
+        }
+    return resultados
+
+
+def melhor(resultados):
+    "Nome do candidato com maior F1 médio (o primeiro, em caso de empate, como no notebook)."
+    completos = {nome: r for nome, r in resultados.items() if r['mean_f1'] is not None}
+    return max(completos, key=lambda nome: completos[nome]['mean_f1'])
+
+
+def _concluir(placar, diretorio_cache, nome, k, chave, f1, podar):
+    placar.registrar(nome, k, f1)
+    _gravar_cache(diretorio_cache, chave, {'modelo': nome, 'particao': k, 'f1': f1})
+    if podar:
+        placar.podar()
+
+
+def _ler_cache(diretorio, chave):
+    if diretorio is None or chave is None:
+        return None
+    try:
+        with open(os.path.join(diretorio, f'{chave}.json'), encoding='utf-8') as arquivo:
+            return json.load(arquivo)['f1']
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def _gravar_cache(diretorio, chave, conteudo):
+    if diretorio is None or chave is None:
+        return
+    os.makedirs(diretorio, exist_ok=True)
+    caminho = os.path.join(diretorio, f'{chave}.json')
+    with open(caminho + '.tmp', 'w', encoding='utf-8') as arquivo:
+        json.dump(conteudo, arquivo)
+    os.replace(caminho + '.tmp', caminho)
@@ -0,0 +1,400 @@
+"""
+Tabela de risco pré-calculada para todas as combinações do formulário.
+
+Todas as variáveis do formulário têm domínio finito (cerca de 3 bilhões de
+combinações), então a probabilidade de adimplência de cada combinação pode
+ser calculada uma única vez e guardada num .npy float32 mapeado em memória,
+com um eixo por variável: a posição de um aluno no arquivo é o índice de
+base mista das suas respostas. Pontuar um aluno vira uma leitura direta, e
+médias por uma ou duas variáveis (por exemplo CAMPUS x BOLSAS_DESCONTO) saem
+das marginais gravadas junto com a tabela, sem reler os ~12 GB.
+
+Como o modelo é logístico, o logito é a soma das contribuições de cada
+variável. A tabela é gerada em blocos: o logito das variáveis finais é
+montado uma vez por broadcast e, em cada bloco, só a parte fixa das
+variáveis iniciais é somada a ele.
+
+A classe, como na inferência, sai do sinal do logito em float64. Ela só
+difere de "probabilidade > 0,5" nas células cuja probabilidade arredonda
+para exatamente 0,5 em float32; essas poucas células ficam com a classe
+gravada à parte nos metadados.
+
+Uso (na raiz do repositório):
+    python -m previnad.tabela_risco gerar
+    python -m previnad.tabela_risco media CAMPUS BOLSAS_DESCONTO
+"""
+import argparse
+import itertools
+import os
+import sys
+import time
+
+import numpy as np
+
+from previnad.codificacao import _compilar, _consultar
+from previnad.dominios import MAPAS_FORMULARIO, VALORES_FORMULARIO
+from previnad.inferencia import _sigmoide
+
+DIRETORIO_TABELAS = 'data'
+
+# Eixos da tabela, na ordem do arquivo: {variável: opções do formulário}
+DOMINIOS_FORMULARIO = {**VALORES_FORMULARIO, **MAPAS_FORMULARIO}
+
+# Máximo de células calculadas de uma vez na geração e na varredura da tabela
+LIMITE_BLOCO = 1 << 23
+
+
+def caminhos_tabela(versao, diretorio=DIRETORIO_TABELAS):
+    "Caminhos da tabela (.npy) e dos metadados (.npz) de uma versão do modelo."
+    base = os.path.join(diretorio, f'tabela_risco_{versao}')
+    return base + '.npy', base + '.npz'
+
+
+def _divisao(forma, limite):
+    "Quantos eixos iniciais percorrer um a um para que o bloco dos finais caiba no limite."
+    for m in range(len(forma) + 1):
+        if np.prod(forma[m:], dtype=np.int64) <= limite:
+            return m
+    return len(forma)
+
+
+def contribuicoes(modelo, dominios=DOMINIOS_FORMULARIO, codificador=None):
+    """
+    Contribuição de cada opção de cada variável para o logito.
+
+    Sem codificador, usa o do formulário montado pelo registro a partir do esquema do modelo.
+
+    Returns:
+        list: Um array por variável, na ordem de dominios.
+
+    Raises:
+        ValueError: Se o modelo não é logístico ou uma opção não é reconhecida.
+    """
+    motor = modelo.get('motor')
+    if motor is None:
+        raise ValueError("A tabela de risco exige um modelo logístico (logito aditivo)")
+    # Peso zero no fim para a sentinela (categoria base)
+    coef = np.append(motor.coef_[0], 0.0)
+    codificador = codificador or modelo['codificadores']['formulario']
+
+    resultado = []
+    for nome, tabela in dominios.items():
+        colunas, valores, encontrados = codificador.codificar_variavel(nome, list(tabela))
+        if not encontrados.all():
+            raise ValueError(f"Opções sem codificação em {nome}")
+        resultado.append(coef[colunas] * valores)
+    return resultado
+
+
+def gerar_tabela(modelo, diretorio=DIRETORIO_TABELAS, dominios=DOMINIOS_FORMULARIO,
+                 codificador=None, limite_bloco=LIMITE_BLOCO, progresso=None):
+    """
+    Pontua todas as combinações de dominios e grava a tabela e seus metadados.
+
+    Args:
+        modelo (dict): Modelo carregado pelo registro (precisa do motor NumPy).
+        diretorio (str): Onde gravar tabela_risco_<versao>.npy e .npz.
+        dominios (dict): {variável: opções}, um eixo da tabela por variável.
+        codificador (Codificador, opcional): Codificador que entende as opções
+            de dominios; por padrão, modelo['codificadores']['formulario'].
+        limite_bloco (int): Máximo de células calculadas de uma vez.
+        progresso (callable, opcional): Chamado com a fração já gerada.
+
+    Returns:
+        str: Caminho da tabela gerada.
+    """
+    nomes = list(dominios)
+    partes = contribuicoes(modelo, dominios, codificador)
+    forma = tuple(len(p) for p in partes)
+    m = _divisao(forma, limite_bloco)
+    finais = range(m, len(forma))
+
+    # Logito das variáveis finais (com o intercepto), somado por broadcast
+    logito_final = np.float64(modelo['motor'].intercept_[0])
+    for parte in partes[m:]:
+        logito_final = np.add.outer(logito_final, parte)
+
+    # Somas das probabilidades por par de variáveis, para médias sem reler a tabela
+    marginais = {par: np.zeros((forma[par[0]], forma[par[1]]))
+                 for par in itertools.combinations(range(len(forma)), 2)}
+
+    os.makedirs(diretorio, exist_ok=True)
+    caminho, caminho_meta = caminhos_tabela(modelo['versao'], diretorio)
+    temporario = caminho + '.tmp'
+    tabela = np.lib.format.open_memmap(temporario, mode='w+', dtype=np.float32, shape=forma)
+
+    # Posições (no arquivo achatado) das células com probabilidade 0,5 em float32, e suas classes
+    empates, classes_empates = [], []
+    total = int(np.prod(forma[:m], dtype=np.int64))
+    for n, inicial in enumerate(np.ndindex(*forma[:m])):
+        base = sum(partes[k][i] for k, i in enumerate(inicial))
+        logito = logito_final + base
+        prob = _sigmoide(logito)
+        tabela[inicial] = prob
+        empate = np.flatnonzero(prob.astype(np.float32) == 0.5)
+        if len(empate):
+            inicio = np.ravel_multi_index(inicial + (0,) * len(finais), forma)
+            empates.append(inicio + empate)
+            classes_empates.append(np.ravel(logito)[empate] > 0)
+        _acumular(marginais, inicial, prob, finais)
+        if progresso is not None:
+            progresso((n + 1) / total)
+
+    tabela.flush()
+    del tabela
+    os.replace(temporario, caminho)
+
+    # Os metadados são gravados por último: a tabela só é usada quando eles existem
+    meta = {
+        'versao': np.array(modelo['versao']),
+        # Hash do esquema de que saiu a codificação: tabelas de outro esquema não são abertas
+        'esquema': np.array(modelo['esquema']['hash']),
+        'eixos': np.array(nomes),
+        'classes': np.asarray(modelo['motor'].classes_),
+        'empates': np.concatenate(empates or [np.zeros(0, dtype=np.int64)]).astype(np.int64),
+        'empates_classe': np.concatenate(classes_empates or [np.zeros(0, dtype=bool)]).astype(np.intp)
+    }
+    for k, nome in enumerate(nomes):
+        meta[f'rotulos_{nome}'] = np.array([str(r) for r in dominios[nome]])
+    for (a, b), soma in marginais.items():
+        meta[f'marginal_{nomes[a]}__{nomes[b]}'] = soma
+    np.savez(caminho_meta, **meta)
+    return caminho
+
+
+def _acumular(marginais, inicial, prob, finais):
+    """
+    Soma as probabilidades de um bloco nas marginais por par de variáveis.
+
+    O bloco tem os eixos iniciais fixos nos índices de inicial e todos os
+    valores dos eixos finais.
+    """
+    m = len(inicial)
+    pares_finais = {(a, b): prob.sum(axis=tuple(k - m for k in finais if k not in (a, b)))
+                    for a, b in itertools.combinations(finais, 2)}
+    if pares_finais:
+        por_eixo = {}
+        for (a, b), soma in pares_finais.items():
+            por_eixo.setdefault(a, soma.sum(axis=1))
+            por_eixo.setdefault(b, soma.sum(axis=0))
+    else:
+        por_eixo = {k: prob for k in finais}
+    total = prob.sum()
+
+    for (a, b), destino in marginais.items():
+        if b < m:
+            destino[inicial[a], inicial[b]] += total
+        elif a < m:
+            destino[inicial[a]] += por_eixo[b]
+        else:
+            destino += pares_finais[(a, b)]
+
+
+class TabelaRisco:
+    """
+    Tabela de risco gerada por gerar_tabela, aberta em modo somente leitura.
+
+    Args:
+        caminho (str): Caminho do .npy; os metadados ficam no .npz de mesmo nome.
+    """
+
+    def __init__(self, caminho):
+        meta = np.load(os.path.splitext(caminho)[0] + '.npz', allow_pickle=False)
+        self.versao = str(meta['versao'])
+        self.esquema = str(meta['esquema']) if 'esquema' in meta else None
+        self.eixos = [str(nome) for nome in meta['eixos']]
+        self.classes_ = meta['classes']
+        # Tabelas anteriores aos empates não os têm: a classe fica pela probabilidade
+        self._empates = meta['empates'] if 'empates' in meta else np.zeros(0, dtype=np.int64)
+        self._empates_classe = meta['empates_classe'] if 'empates_classe' in meta else np.zeros(0, dtype=np.intp)
+        self.rotulos = {nome: meta[f'rotulos_{nome}'] for nome in self.eixos}
+        self.marginais = {(a, b): meta[f'marginal_{a}__{b}']
+                          for a, b in itertools.combinations(self.eixos, 2)}
+
+        self.tabela = np.load(caminho, mmap_mode='r')
+        self._plana = self.tabela.reshape(-1)
+        # Passo de cada eixo no índice de base mista
+        self._passos = np.array(self.tabela.strides, dtype=np.int64) // self.tabela.itemsize
+        self._indices = {nome: _compilar({rotulo: i for i, rotulo in enumerate(rotulos)})
+                         for nome, rotulos in self.rotulos.items()}
+
+    def posicoes(self, colunas):
+        """
+        Posição de cada linha na tabela.
+
+        Args:
+            colunas: Qualquer objeto indexável por variável (dict, DataFrame...).
+
+        Returns:
+            tuple: Posições e máscara das linhas com todas as opções conhecidas.
+        """
+        posicao = 0
+        validos = True
+        for nome, passo in zip(self.eixos, self._passos):
+            indices, encontrados = _consultar(self._indices[nome], colunas[nome])
+            posicao = posicao + indices.astype(np.int64) * passo
+            validos = validos & encontrados
+        return np.where(validos, posicao, 0), validos
+
+    def pontuar(self, colunas):
+        """
+        Classe prevista e probabilidade de adimplência lidas da tabela.
+
+        Returns:
+            tuple: Mesmo formato de inferencia.pontuar_colunas.
+        """
+        posicoes, validos = self.posicoes(colunas)
+        # Lê em ordem crescente de posição: com a tabela fora do cache de
+        # páginas, o acesso sequencial ao disco é bem mais rápido que o aleatório
+        ordem = np.argsort(posicoes, kind='stable')
+        prob = np.empty(len(posicoes))
+        prob[ordem] = self._plana[posicoes[ordem]]
+        prob[~validos] = np.nan
+        indice_classe = (prob > 0.5).astype(np.intp)
+        empate = np.flatnonzero(validos & (prob == 0.5))
+        if len(empate) and len(self._empates):
+            k = np.minimum(np.searchsorted(self._empates, posicoes[empate]), len(self._empates) - 1)
+            gravado = self._empates[k] == posicoes[empate]
+            indice_classe[empate[gravado]] = self._empates_classe[k[gravado]]
+        classe = self.classes_[indice_classe]
+        classe[~validos] = 0
+        return classe, prob, validos
+
+    def media(self, eixos, filtros=None):
+        """
+        Probabilidade média de adimplência por combinação das variáveis em eixos.
+
+        Todas as combinações do formulário têm o mesmo peso. Sem filtros e
+        com até duas variáveis, o resultado sai das marginais gravadas;
+        nos demais casos a tabela é percorrida em blocos.
+
+        Args:
+            eixos (list): Variáveis do agrupamento.
+            filtros (dict, opcional): {variável: opção} fixadas antes da média.
+
+        Returns:
+            pd.Series: Médias indexadas pelas opções das variáveis em eixos
+            (ou um float, com eixos vazio).
+
+        Raises:
+            ValueError: Se uma variável ou opção não existe na tabela.
+        """
+        import pandas as pd
+
+        eixos = list(eixos)
+        filtros = filtros or {}
+        desconhecidas = [nome for nome in eixos + list(filtros) if nome not in self.eixos]
+        if desconhecidas:
+            raise ValueError(f"Variáveis fora da tabela: {desconhecidas}")
+        if len(set(eixos)) < len(eixos) or set(eixos) & set(filtros):
+            raise ValueError("Cada variável pode aparecer uma única vez em eixos e filtros")
+
+        if not filtros and len(eixos) <= 2:
+            somas = self._somas_marginais(eixos)
+        else:
+            somas = self._somas_varredura(eixos, filtros)
+        # Células da tabela somadas em cada combinação dos eixos
+        celulas = np.prod([tamanho for nome, tamanho in zip(self.eixos, self.tabela.shape)
+                           if nome not in eixos and nome not in filtros], dtype=np.int64)
+        medias = somas / celulas
+
+        if not eixos:
+            return float(medias)
+        indice = pd.MultiIndex.from_product([self.rotulos[nome] for nome in eixos], names=eixos)
+        if len(eixos) == 1:
+            indice = indice.get_level_values(0)
+        return pd.Series(np.ravel(medias), index=indice, name='PROB_ADIMPLENCIA_MEDIA')
+
+    def _somas_marginais(self, eixos):
+        "Somas das probabilidades por uma ou duas variáveis, a partir das marginais."
+        if not eixos:
+            a, b = next(iter(self.marginais))
+            return np.float64(self.marginais[(a, b)].sum())
+        for (a, b), soma in self.marginais.items():
+            if eixos == [a, b]:
+                return soma
+            if eixos == [b, a]:
+                return soma.T
+            if eixos == [a]:
+                return soma.sum(axis=1)
+            if eixos == [b]:
+                return soma.sum(axis=0)
+
+    def _somas_varredura(self, eixos, filtros):
+        "Somas das probabilidades por combinação de eixos, percorrendo a tabela em blocos."
+        fixos = tuple(int(self._indice_opcao(nome, filtros[nome])) if nome in filtros else slice(None)
+                      for nome in self.eixos)
+        sub = self.tabela[fixos]
+        nomes = [nome for nome in self.eixos if nome not in filtros]
+
+        forma = sub.shape
+        m = _divisao(forma, LIMITE_BLOCO)
+        somas = np.zeros([forma[k] for k, nome in enumerate(nomes) if nome in eixos])
+        livres = tuple(k - m for k in range(m, len(forma)) if nomes[k] not in eixos)
+        for inicial in np.ndindex(*forma[:m]):
+            bloco = np.asarray(sub[inicial]).sum(axis=livres, dtype=np.float64)
+            somas[tuple(i for i, nome in zip(inicial, nomes) if nome in eixos)] += bloco
+
+        # Eixos na ordem pedida
+        ordem = [nome for nome in nomes if nome in eixos]
+        return np.transpose(somas, [ordem.index(nome) for nome in eixos])
+
+    def _indice_opcao(self, nome, opcao):
+        indices, encontrados = _consultar(self._indices[nome], [opcao])
+        if not encontrados[0]:
+            raise ValueError(f"Opção desconhecida em {nome}: {opcao}")
+        return indices[0]
+
+
+def abrir_tabela(modelo, diretorio=DIRETORIO_TABELAS):
+    """
+    Abre a tabela de risco da versão do modelo, se ela já foi gerada.
+
+    Uma tabela gerada com outro esquema (ou antes de o esquema ser gravado
+    nos metadados) é ignorada: é preciso gerá-la de novo.
+
+    Returns:
+        TabelaRisco ou None.
+    """
+    caminho, caminho_meta = caminhos_tabela(modelo['versao'], diretorio)
+    if not (os.path.exists(caminho) and os.path.exists(caminho_meta)):
+        return None
+    tabela = TabelaRisco(caminho)
+    if tabela.esquema != modelo['esquema']['hash']:
+        return None
+    return tabela
+
+
+def main(argv=None):
+    from previnad import registro
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--modelo', default=os.path.join('data', 'modelo_final.pkl'))
+    parser.add_argument('--diretorio', default=DIRETORIO_TABELAS)
+    comandos = parser.add_subparsers(dest='comando', required=True)
+    comandos.add_parser('gerar', help='Pontua todas as combinações e grava a tabela')
+    media = comandos.add_parser('media', help='Probabilidade média por variáveis')
+    media.add_argument('eixos', nargs='*')
+    media.add_argument('--filtro', action='append', default=[], metavar='VARIAVEL=OPCAO')
+    args = parser.parse_args(argv)
+
+    modelo = registro.carregar_modelo(args.modelo)
+    if args.comando == 'gerar':
+        inicio = time.perf_counter()
+
+        def progresso(fracao):
+            print(f"\r{fracao:6.1%}", end='', file=sys.stderr, flush=True)
+
+        caminho = gerar_tabela(modelo, args.diretorio, progresso=progresso)
+        print(f"\n{caminho} gerada em {time.perf_counter() - inicio:.0f} s", file=sys.stderr)
+        return
+
+    tabela = abrir_tabela(modelo, args.diretorio)
+    if tabela is None:
+        sys.exit(f"Tabela da versão {modelo['versao']} não encontrada; rode o comando gerar")
+    filtros = dict(filtro.split('=', 1) for filtro in args.filtro)
+    print(tabela.media(args.eixos, filtros).to_string())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,224 @@
+"""
+Treino do modelo de inadimplência a partir do arquivo de matrículas.
+
+Reproduz o pipeline do PrevInad.ipynb (limpeza, traduções, dummies com
+drop_first, normalização min-max, validação cruzada por F1 e ajuste do melhor
+modelo em todos os dados) com operações vetorizadas: o CSV é lido uma única
+vez, só com as colunas necessárias e com as variáveis categóricas como
+category, e a matriz de treino (esparsa, em CSR) é montada pelo mesmo
+Codificador usado para pontuar. A comparação dos modelos fica em previnad.selecao.
+
+O resultado é o dicionário {'metodo', 'resultados', 'escala', 'f1'} que o
+app carrega de data/modelo_final.pkl, mais o esquema compilado das
+variáveis ('esquema', ver previnad.esquema), com as categorias base exatas
+de cada variável, e a referência do monitoramento de deriva ('referencia',
+ver previnad.monitoramento). 'f1' é o F1 médio da validação cruzada do
+método escolhido; a acurácia nos próprios dados de treino, que o notebook
+guardava em 'f1', fica em 'acuracia_treino'.
+
+Uso (na raiz do repositório):
+    python -m previnad.treino peru_student_enrollment_data_2023.csv
+    python -m previnad.treino dados.csv --modelos Logit Tree --saida data/modelo_novo.pkl --exportar
+    python -m previnad.treino dados.csv --candidatos data/candidatos
+"""
+import argparse
+import os
+import pickle
+import sys
+import time
+
+import pandas as pd
+
+from previnad import incremental, monitoramento, selecao
+from previnad.codificacao import codificador_arquivo
+from previnad.esquema import compilar_esquema, escala_esquema
+from previnad.inferencia import usa_esparsa
+from previnad.dominios import (COLUNAS_ORIGEM, MAPAS_ORIGEM, VARIAVEIS_BINARIAS,
+                               VARIAVEIS_DUMMY, VARIAVEIS_ESCALA)
+
+VARIAVEL_ALVO = 'PGTO_ANUIDADE_2023'
+
+# Colunas que o notebook descarta depois do dropna: entram só para decidir quais linhas ficam
+COLUNAS_FILTRO = ['PROVINCIA', 'DISTRITO', 'PROGRAMA_CURSO', 'MODALIDADE_ENSINO']
+
+COLUNAS_CATEGORICAS = VARIAVEIS_DUMMY + ['DEFICIENCIA'] + COLUNAS_FILTRO
+COLUNAS_NUMERICAS = ['PGTO_ANUIDADE_2022', VARIAVEL_ALVO] + VARIAVEIS_ESCALA
+
+# Nome no modelo -> nome da coluna no arquivo original
+_COLUNAS_ARQUIVO = {nome: original for original, nome in COLUNAS_ORIGEM.items()}
+
+
+def ler_dados(caminho):
+    """
+    Lê o arquivo de matrículas (CSV separado por ';' ou Parquet) só com as colunas do treino.
+
+    Returns:
+        pd.DataFrame: Colunas já com os nomes em português; as categóricas como category.
+    """
+    nomes = COLUNAS_CATEGORICAS + COLUNAS_NUMERICAS
+    originais = [_COLUNAS_ARQUIVO[nome] for nome in nomes]
+    if caminho.lower().endswith('.parquet'):
+        df = pd.read_parquet(caminho, columns=originais)
+        df = df.astype({_COLUNAS_ARQUIVO[nome]: 'category' for nome in COLUNAS_CATEGORICAS})
+    else:
+        tipos = {_COLUNAS_ARQUIVO[nome]: 'category' for nome in COLUNAS_CATEGORICAS}
+        tipos.update({_COLUNAS_ARQUIVO[nome]: 'float32' for nome in COLUNAS_NUMERICAS})
+        df = pd.read_csv(caminho, sep=';', usecols=originais, dtype=tipos)
+    return df.rename(columns=COLUNAS_ORIGEM)
+
+
+def variaveis_modelo(df):
+    """
+    Colunas do modelo para os dados de treino, na ordem do notebook.
+
+    Como o pd.get_dummies(..., drop_first=True), cada variável categórica
+    ganha uma dummy por categoria presente, menos a primeira em ordem alfabética.
+
+    Returns:
+        tuple: Colunas do modelo e {variável categórica: categoria base} (a descartada).
+    """
+    # Variáveis numéricas na ordem em que aparecem no arquivo original
+    variaveis = [nome for nome in COLUNAS_ORIGEM.values()
+                 if nome in VARIAVEIS_BINARIAS + VARIAVEIS_ESCALA]
+    bases = {}
+    for nome in VARIAVEIS_DUMMY:
+        # Categorias presentes nos dados, já traduzidas
+        traduzidas = sorted({MAPAS_ORIGEM[nome][str(c)] for c in df[nome].unique()
+                             if str(c) in MAPAS_ORIGEM[nome]})
+        variaveis += [f'{nome}_{categoria}' for categoria in traduzidas[1:]]
+        bases[nome] = traduzidas[0]
+    return variaveis, bases
+
+
+def matriz(df, esquema):
+    """
+    Matriz esparsa e alvo para o esquema de um modelo.
+
+    Args:
+        df (pd.DataFrame): Dados lidos por ler_dados, já sem valores ausentes.
+        esquema (dict): Esquema compilado do modelo (ver previnad.esquema).
+
+    Returns:
+        tuple: Matriz X (CSR) e alvo y. Linhas com valores fora dos mapas de
+        tradução ou do vocabulário do esquema são descartadas.
+    """
+    X, validos = codificador_arquivo(esquema).codificar_esparsa(df)
+    if not validos.all():
+        print(f"{(~validos).sum()} linhas com valores fora dos mapas foram descartadas", file=sys.stderr)
+        X = X[validos]
+    y = df[VARIAVEL_ALVO].to_numpy()[validos].astype(int)
+    return X, y
+
+
+def preparar(df):
+    """
+    Monta a matriz de treino a partir dos dados lidos por ler_dados.
+
+    Linhas com valores ausentes (em qualquer coluna usada pelo notebook) ou
+    fora dos mapas de tradução são descartadas.
+
+    Returns:
+        tuple: Matriz X (CSR), alvo y e esquema compilado do modelo (colunas,
+        vocabulário e escala min-max; ver previnad.esquema).
+    """
+    df = df[df.notna().all(axis=1)]
+
+    escala = [{nome: [float(df[nome].min()), float(df[nome].max())]} for nome in VARIAVEIS_ESCALA]
+    modelo_vars, bases = variaveis_modelo(df)
+    esquema = compilar_esquema(modelo_vars, escala, bases)
+    X, y = matriz(df, esquema)
+    return X, y, esquema
+
+
+def treinar(caminho, modelos=None, cv=5, processos=None, diretorio_candidatos=None):
+    """
+    Treina o modelo a partir do arquivo de matrículas.
+
+    Args:
+        caminho (str): Arquivo no formato de peru_student_enrollment_data_2023.csv.
+        modelos (list, opcional): Nomes dos candidatos (padrão: todos os do notebook).
+        cv (int): Número de partições da validação cruzada.
+        processos (int, opcional): Processos da seleção de modelos (ver selecao.selecionar).
+        diretorio_candidatos (str, opcional): Se informado, todos os candidatos
+            (sem poda na seleção) são ajustados em todos os dados e gravados
+            em diretorio_candidatos/modelo_<metodo>.pkl, para servir vários
+            modelos ao mesmo tempo (ver previnad.conjunto).
+
+    Returns:
+        dict: {'metodo', 'resultados', 'escala', 'f1', 'esquema'}, como o
+        modelo_final.pkl, mais 'acuracia_treino' e 'referencia'.
+        Para a regressão logística, também 'hessiana', 'C' e 'n_treino' (ver
+        incremental.estatisticas).
+    """
+    X, y, esquema = preparar(ler_dados(caminho))
+    todos = selecao.candidatos()
+    resultados = selecao.selecionar(X, y, {nome: todos[nome] for nome in modelos or todos},
+                                    cv, processos, podar=diretorio_candidatos is None)
+
+    # Melhor modelo, ajustado em todos os dados
+    metodo = selecao.melhor(resultados)
+    resultado = _ajustar(metodo, resultados[metodo], X, y, esquema)
+    if diretorio_candidatos is not None:
+        os.makedirs(diretorio_candidatos, exist_ok=True)
+        for nome, candidato in resultados.items():
+            ajustado = resultado if nome == metodo else _ajustar(nome, candidato, X, y, esquema)
+            salvar_modelo(ajustado, os.path.join(diretorio_candidatos, f'modelo_{nome}.pkl'))
+    return resultado
+
+
+def _ajustar(metodo, candidato, X, y, esquema):
+    "Ajusta o candidato da seleção em todos os dados e monta o dicionário do modelo_final.pkl."
+    modelo = candidato['model']
+    modelo_vars = esquema['colunas']
+    # DataFrame para o modelo guardar os nomes das variáveis (feature_names_in_)
+    if usa_esparsa(modelo):
+        entrada = pd.DataFrame.sparse.from_spmatrix(X, columns=modelo_vars)
+    else:
+        entrada = pd.DataFrame(X.toarray(), columns=modelo_vars)
+    modelo.fit(entrada, y)
+    prob = modelo.predict_proba(entrada)[:, list(modelo.classes_).index(1)]
+    resultado = {
+        'metodo': metodo,
+        'resultados': modelo,
+        'escala': escala_esquema(esquema),
+        'f1': candidato['mean_f1'],
+        'acuracia_treino': float(modelo.score(entrada, y)),
+        'esquema': esquema,
+        'referencia': monitoramento.referencia_matriz(esquema, X, prob, y)
+    }
+    if incremental.suporta(modelo):
+        # Estatísticas para os retreinos incrementais (ver previnad.incremental)
+        resultado.update(incremental.estatisticas(modelo, X))
+    return resultado
+
+
+def salvar_modelo(modelo, caminho=os.path.join('data', 'modelo_final.pkl')):
+    "Grava o modelo no mesmo formato (pickle) do notebook."
+    with open(caminho, 'wb') as arquivo:
+        pickle.dump(modelo, arquivo)
+    return caminho
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('dados', help='Arquivo de matrículas (CSV separado por ; ou Parquet)')
+    parser.add_argument('--saida', default=os.path.join('data', 'modelo_final.pkl'))
+    parser.add_argument('--modelos', nargs='+', choices=['Logit', 'NB', 'KNN', 'Tree', 'Forest'])
+    parser.add_argument('--cv', type=int, default=5)
+    parser.add_argument('--processos', type=int, help='Processos da seleção de modelos (padrão: número de CPUs)')
+    parser.add_argument('--exportar', action='store_true', help='Exporta também o artefato .npz')
+    parser.add_argument('--candidatos', help='Grava também todos os candidatos ajustados neste diretório')
+    args = parser.parse_args(argv)
+
+    inicio = time.perf_counter()
+    modelo = treinar(args.dados, args.modelos, args.cv, args.processos, args.candidatos)
+    print(f"{modelo['metodo']} treinado em {time.perf_counter() - inicio:.1f} s; "
+          f"salvo em {salvar_modelo(modelo, args.saida)}")
+    if args.exportar and hasattr(modelo['resultados'], 'coef_'):
+        from previnad import registro
+
+        print(f"Artefato exportado: {registro.exportar_modelo(modelo)}")
+
+
+if __name__ == '__main__':
+    main()
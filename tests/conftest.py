@@ -0,0 +1,61 @@
+"""
+Dados e modelos compartilhados pelos testes.
+
+Uso (na raiz do repositório):
+    python -m pytest
+"""
+import os
+
+import pytest
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CAMINHO_MODELO = os.path.join(RAIZ, 'data', 'modelo_final.pkl')
+
+# Um aluno preenchido no formulário do app
+REGISTRO = {
+    'PGTO_ANUIDADE_2022': 'Sim',
+    'DEFICIENCIA': 'Não',
+    'NUMERO_DISCIPLINAS_MATRICULADAS': 6,
+    'CURSO_EM_RISCO': 0,
+    'MATRICULA': 'Novo',
+    'GENERO': 'Feminino',
+    'DEPARTAMENTO': 'LIMA',
+    'CLASSIFICACAO': 'Graduação',
+    'CAMPUS': 'Lima Centro',
+    'FACULDADE': 'Saude',
+    'TURNO': 'Manhã',
+    'BOLSAS_DESCONTO': 'Convenios',
+    'FAIXA_ETARIA': '19-20'
+}
+
+
+@pytest.fixture(scope='session')
+def caminho_modelo():
+    return CAMINHO_MODELO
+
+
+@pytest.fixture(scope='session')
+def modelo():
+    "modelo_final.pkl do notebook, desserializado (LogisticRegression do scikit-learn)."
+    from previnad import registro
+
+    return registro.carregar_modelo(CAMINHO_MODELO, usar_npz=False)
+
+
+@pytest.fixture
+def perfil():
+    "Cópia de REGISTRO, que o teste pode alterar."
+    return dict(REGISTRO)
+
+
+@pytest.fixture(scope='session')
+def perfis_aleatorios():
+    "Colunas com 2000 alunos sorteados entre todas as opções do formulário."
+    import numpy as np
+
+    from previnad.dominios import MAPAS_FORMULARIO, VALORES_FORMULARIO
+
+    gerador = np.random.default_rng(0)
+    opcoes = {**VALORES_FORMULARIO, **MAPAS_FORMULARIO}
+    return {nome: [list(tabela)[i] for i in gerador.integers(0, len(tabela), 2000)]
+            for nome, tabela in opcoes.items()}
@@ -0,0 +1,133 @@
+"""
+Códigos de resposta do serviço de pontuação, chamado direto pela interface ASGI.
+"""
+import asyncio
+import json
+
+import pytest
+
+from previnad.api import ServicoPontuacao
+
+
+async def _chamar(servico, metodo, caminho, corpo=None, consulta=b''):
+    "Uma requisição ASGI; corpo é JSON (ou bytes já prontos). Devolve (status, resposta em JSON)."
+    if isinstance(corpo, bytes):
+        dados = corpo
+    else:
+        dados = json.dumps(corpo).encode() if corpo is not None else b''
+    enviados = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': dados}
+
+    async def send(mensagem):
+        enviados.append(mensagem)
+
+    escopo = {'type': 'http', 'method': metodo, 'path': caminho, 'query_string': consulta}
+    await servico(escopo, receive, send)
+    return enviados[0]['status'], json.loads(enviados[1]['body'])
+
+
+def chamar(servico, *argumentos):
+    return asyncio.run(_chamar(servico, *argumentos))
+
+
+@pytest.fixture
+def servico(caminho_modelo):
+    # Um serviço por teste: o loteador fica preso ao laço de eventos de cada asyncio.run
+    return ServicoPontuacao(caminho_modelo=caminho_modelo, caminho_conjunto=None)
+
+
+def test_pontuar_um_registro(servico, perfil):
+    status, resposta = chamar(servico, 'POST', '/pontuar', perfil)
+    assert status == 200
+    assert resposta['classe'] in ('Adimplente', 'Inadimplente')
+    assert 0.0 <= resposta['prob_adimplencia'] <= 1.0
+
+
+def test_valor_desconhecido_responde_nulo(servico, perfil):
+    status, resposta = chamar(servico, 'POST', '/pontuar', [perfil, dict(perfil, CAMPUS='Marte')])
+    assert status == 200
+    assert resposta[0]['prob_adimplencia'] is not None
+    assert resposta[1] == {'classe': None, 'prob_adimplencia': None}
+
+
+@pytest.mark.parametrize('corpo,consulta', [
+    (b'{"GENERO": ', b''),
+    ([1, 2], b''),
+    ('texto', b''),
+    ({}, b'origem=outra'),
+    ({'CURSO_EM_RISCO': [1, 2]}, b''),
+])
+def test_pontuar_corpo_invalido(servico, perfil, corpo, consulta):
+    if isinstance(corpo, dict):
+        corpo = dict(perfil, **corpo)
+    status, resposta = chamar(servico, 'POST', '/pontuar', corpo, consulta)
+    assert status == 400
+    assert 'erro' in resposta
+
+
+def test_erro_de_um_pedido_nao_derruba_o_micro_lote(servico, perfil):
+    async def juntos():
+        return await asyncio.gather(_chamar(servico, 'POST', '/pontuar', perfil),
+                                    _chamar(servico, 'POST', '/pontuar', dict(perfil, CURSO_EM_RISCO=[1, 2])),
+                                    _chamar(servico, 'POST', '/pontuar', [perfil, dict(perfil, CURSO_EM_RISCO='x')]))
+
+    (status_bom, _), (status_ruim, _), (status_lista, lista) = asyncio.run(juntos())
+    assert (status_bom, status_ruim, status_lista) == (200, 400, 200)
+    assert lista[1]['prob_adimplencia'] is None
+
+
+@pytest.mark.parametrize('corpo', [
+    b'[',
+    {'base': {}},
+    {'base': 'texto', 'alternativas': {'TURNO': ['Noite']}},
+    {'alternativas': {'TURNO': 'Noite'}},
+    {'alternativas': {'TURNO': [['Noite']]}},
+    {'alternativas': {'TURNO': ['Madrugada']}},
+    {'alternativas': {'CAMPO': ['Noite']}},
+    {'alternativas': {'TURNO': ['Noite']}, 'principais': 'x'},
+    {'alternativas': {'TURNO': ['Noite']}, 'principais': 2.5},
+    {'alternativas': {'TURNO': ['Noite']}, 'max_mudancas': -1},
+])
+def test_cenarios_corpo_invalido(servico, perfil, corpo):
+    if isinstance(corpo, dict) and 'base' not in corpo:
+        corpo = dict(corpo, base=perfil)
+    status, resposta = chamar(servico, 'POST', '/cenarios', corpo)
+    assert status == 400
+    assert 'erro' in resposta
+
+
+def test_cenarios(servico, perfil):
+    corpo = {'base': perfil, 'alternativas': {'TURNO': ['Noite', 'Tarde']}, 'principais': 2}
+    status, resposta = chamar(servico, 'POST', '/cenarios', corpo)
+    assert status == 200
+    assert resposta['cenarios'] == 3
+    assert len(resposta['ranking']) == 2
+
+
+@pytest.mark.parametrize('corpo', [
+    b'{',
+    {'adimplente': 1},
+    {'prob_adimplencia': 0.9, 'adimplente': 7},
+    {'prob_adimplencia': 0.9, 'adimplente': 0.5},
+    {'prob_adimplencia': 1.5, 'adimplente': 1},
+    {'prob_adimplencia': -0.1, 'adimplente': 0},
+    {'prob_adimplencia': 'alta', 'adimplente': 0},
+])
+def test_desfechos_invalidos(servico, corpo):
+    status, resposta = chamar(servico, 'POST', '/desfechos', corpo)
+    assert status == 400
+    assert 'erro' in resposta
+
+
+def test_desfechos(servico):
+    status, resposta = chamar(servico, 'POST', '/desfechos', [{'prob_adimplencia': 0.9, 'adimplente': 1},
+                                                               {'prob_adimplencia': 0.2, 'adimplente': 0}])
+    assert (status, resposta) == (200, {'desfechos': 2})
+
+
+def test_saude_e_rota_desconhecida(servico):
+    status, resposta = chamar(servico, 'GET', '/saude')
+    assert status == 200 and resposta['versao']
+    assert chamar(servico, 'GET', '/nada')[0] == 404
@@ -0,0 +1,101 @@
+"""
+Cache de predições: acertos, falhas, LRU, validade e troca de versão do modelo.
+"""
+import types
+
+import numpy as np
+
+from previnad import cache as modulo_cache
+from previnad import inferencia
+from previnad.cache import CachePredicoes
+from previnad.codificacao import CODIFICADOR_FORMULARIO
+
+
+class Contador:
+    "Função pontuar do cache que conta os perfis que chegam ao modelo."
+
+    def __init__(self):
+        self.perfis = 0
+
+    def __call__(self, ativos, densas):
+        self.perfis += len(ativos)
+        return np.ones(len(ativos), dtype=int), densas.sum(axis=1) / 10
+
+
+def _perfis(perfil, campi):
+    "Forma compacta de um aluno por campus (campi pode repetir)."
+    colunas = {nome: [valor] * len(campi) for nome, valor in perfil.items()}
+    colunas['CAMPUS'] = campi
+    ativos, densas, _ = CODIFICADOR_FORMULARIO.codificar_ativos(colunas)
+    return ativos, densas
+
+
+def test_acertos_e_falhas(perfil):
+    cache, pontuar = CachePredicoes(), Contador()
+    ativos, densas = _perfis(perfil, ['Lima Centro', 'Lima Norte', 'Lima Centro', 'Piura', 'Piura'])
+
+    cache.consultar('v1', ativos, densas, pontuar)
+    # Repetidos no mesmo lote contam como acerto e vão ao modelo uma vez só
+    assert pontuar.perfis == 3
+    assert cache.estatisticas()['falhas'] == 3 and cache.estatisticas()['acertos'] == 2
+
+    classes, prob = cache.consultar('v1', ativos, densas, pontuar)
+    assert pontuar.perfis == 3
+    assert cache.estatisticas()['acertos'] == 7
+    np.testing.assert_array_equal(prob, densas.sum(axis=1) / 10)
+    np.testing.assert_array_equal(classes, np.ones(5))
+
+
+def test_nova_versao_esvazia_o_cache(perfil):
+    cache, pontuar = CachePredicoes(), Contador()
+    ativos, densas = _perfis(perfil, ['Lima Centro', 'Lima Norte'])
+
+    cache.consultar('v1', ativos, densas, pontuar)
+    cache.consultar('v2', ativos, densas, pontuar)
+    assert pontuar.perfis == 4
+    assert cache.estatisticas()['invalidacoes'] == 1
+    assert len(cache) == 2
+
+    # Voltar à versão anterior também invalida: o cache guarda uma versão só
+    cache.consultar('v1', ativos, densas, pontuar)
+    assert pontuar.perfis == 6
+    assert cache.estatisticas()['invalidacoes'] == 2
+
+
+def test_lru_respeita_a_capacidade(perfil):
+    cache, pontuar = CachePredicoes(capacidade=2), Contador()
+    ativos, densas = _perfis(perfil, ['Lima Centro', 'Lima Norte', 'Piura'])
+    cache.consultar('v1', ativos, densas, pontuar)
+    assert len(cache) == 2
+
+    # O mais recente continua no cache; o mais antigo saiu
+    cache.consultar('v1', ativos[2:], densas[2:], pontuar)
+    assert pontuar.perfis == 3
+    cache.consultar('v1', ativos[:1], densas[:1], pontuar)
+    assert pontuar.perfis == 4
+
+
+def test_validade_expira_os_perfis(perfil, monkeypatch):
+    agora = [100.0]
+    monkeypatch.setattr(modulo_cache, 'time', types.SimpleNamespace(monotonic=lambda: agora[0]))
+    cache, pontuar = CachePredicoes(validade=10), Contador()
+    ativos, densas = _perfis(perfil, ['Lima Centro'])
+
+    cache.consultar('v1', ativos, densas, pontuar)
+    agora[0] += 5
+    cache.consultar('v1', ativos, densas, pontuar)
+    assert pontuar.perfis == 1
+    agora[0] += 20
+    cache.consultar('v1', ativos, densas, pontuar)
+    assert pontuar.perfis == 2
+
+
+def test_pontuar_com_cache_igual_sem_cache(modelo, perfis_aleatorios):
+    codificador = modelo['codificadores']['formulario']
+    cache = CachePredicoes()
+    _, prob, _ = inferencia.pontuar_colunas(modelo, codificador, perfis_aleatorios)
+    _, prob_cache, _ = inferencia.pontuar_colunas(modelo, codificador, perfis_aleatorios, cache=cache)
+    _, prob_acerto, _ = inferencia.pontuar_colunas(modelo, codificador, perfis_aleatorios, cache=cache)
+    np.testing.assert_array_equal(prob_cache, prob)
+    np.testing.assert_array_equal(prob_acerto, prob)
+    assert cache.estatisticas()['falhas'] == len(cache)
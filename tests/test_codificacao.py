@@ -0,0 +1,171 @@
+"""
+Codificador x caminho antigo do app (benchmarks/legado.py).
+"""
+import numpy as np
+import pytest
+
+from benchmarks import legado
+from previnad.codificacao import (CODIFICADOR_FORMULARIO, codificador_arquivo, codificador_formulario,
+                                  codificador_origem)
+from previnad.dominios import (ESCALA_PADRAO, MAPAS_FORMULARIO, MODELO_VARS, VALORES_FORMULARIO,
+                               VARIAVEIS_ESCALA)
+from previnad.esquema import compilar_esquema
+
+# Argumento de legado.codificar_formulario de cada variável do formulário
+ARGUMENTOS_LEGADO = {
+    'PGTO_ANUIDADE_2022': 'pgto_anuidade_2022',
+    'DEFICIENCIA': 'deficiencia',
+    'NUMERO_DISCIPLINAS_MATRICULADAS': 'num_disciplinas_original',
+    'CURSO_EM_RISCO': 'curso_em_risco_original',
+    'MATRICULA': 'matricula',
+    'GENERO': 'genero',
+    'DEPARTAMENTO': 'departamento',
+    'CLASSIFICACAO': 'classificacao',
+    'CAMPUS': 'campus',
+    'FACULDADE': 'faculdade',
+    'TURNO': 'turno',
+    'BOLSAS_DESCONTO': 'bolsas_desconto',
+    'FAIXA_ETARIA': 'faixa_etaria'
+}
+
+# Mapas que o app antigo montava com os argumentos invertidos (modelo -> formulário):
+# opções do formulário e categorias do modelo, pareadas pela posição nas listas do app antigo
+MAPAS_INVERTIDOS = {
+    'FACULDADE': (['Engenharia Sistemas Eletrica', 'Direito Ciencias Politicas', 'Administracao Negocios',
+                   'Ciencias Comunicacao', 'Engenharia Industrial Mecanica', 'Humanas Ciencias Sociais',
+                   'Contabilidade', 'Saude'],
+                  ['Engenharia_Sistemas_Eletrica', 'Direito_Ciencias_Politicas', 'Administracao_Negocios',
+                   'Ciencias_Comunicacao', 'Engenharia_Industrial_Mecanica', 'Humanas_Ciencias_Sociais',
+                   'Contabilidade', 'Saude']),
+    'FAIXA_ETARIA': (['Menor que 18', '19-20', '21-23', '24-29', 'Maior que 30'],
+                     ['Menor_que_18', 'De_19_a_20', 'De_21_a_23', 'De_24_a_29', 'Maior_que_30']),
+    'BOLSAS_DESCONTO': (['Sem Benefício', 'Convenios', 'Bolsa Socioeconômica Especial', 'Bolsa Socioeconomica',
+                         'Bolsa Madre De Dios', 'Bolsa Alto Potencial', 'Bolsa Talento'],
+                        ['Sem_Beneficio', 'Convenios', 'Bolsa_Socioecon_Especial', 'Bolsa_Socioeconomica',
+                         'Bolsa_MadreDeDios', 'Bolsa_Alto_Potencial', 'Bolsa_Talento'])
+}
+
+
+def _legado(perfil):
+    "Linha codificada pelo app antigo, na ordem de MODELO_VARS."
+    argumentos = {ARGUMENTOS_LEGADO[nome]: valor for nome, valor in perfil.items()}
+    # MODALIDADE_ENSINO não entra no modelo
+    argumentos['modalidade_ensino'] = 'Presencial'
+    return legado.codificar_formulario(**argumentos)[MODELO_VARS].to_numpy(dtype=float)[0]
+
+
+def _opcoes(*nomes):
+    return [(nome, opcao) for nome in nomes for opcao in {**VALORES_FORMULARIO, **MAPAS_FORMULARIO}[nome]]
+
+
+@pytest.mark.parametrize('nome,opcao', _opcoes('GENERO', 'DEPARTAMENTO', 'TURNO', 'MATRICULA', 'CLASSIFICACAO',
+                                               'CAMPUS', 'PGTO_ANUIDADE_2022', 'DEFICIENCIA'))
+def test_igual_ao_legado(perfil, nome, opcao):
+    perfil[nome] = opcao
+    np.testing.assert_array_equal(CODIFICADOR_FORMULARIO.codificar_linha(perfil)[0], _legado(perfil))
+
+
+# Nos extremos dos sliders as tabelas do app antigo coincidem com a escala min-max
+@pytest.mark.parametrize('nome,valor', [('CURSO_EM_RISCO', 0), ('NUMERO_DISCIPLINAS_MATRICULADAS', 0),
+                                        ('NUMERO_DISCIPLINAS_MATRICULADAS', 6)])
+def test_sliders_nos_extremos_iguais_ao_legado(perfil, nome, valor):
+    perfil[nome] = valor
+    np.testing.assert_array_equal(CODIFICADOR_FORMULARIO.codificar_linha(perfil)[0], _legado(perfil))
+
+
+@pytest.mark.parametrize('nome,posicao', [(nome, i) for nome, (opcoes, _) in MAPAS_INVERTIDOS.items()
+                                          for i in range(len(opcoes))])
+def test_mapas_invertidos_corrigidos(perfil, nome, posicao):
+    opcoes, categorias = MAPAS_INVERTIDOS[nome]
+    perfil[nome] = opcoes[posicao]
+    linha = CODIFICADOR_FORMULARIO.codificar_linha(perfil)[0]
+
+    # A dummy ativa é a da categoria pareada (nenhuma, na categoria base)
+    colunas = [i for i, coluna in enumerate(MODELO_VARS) if coluna.startswith(f'{nome}_')]
+    esperada = np.zeros(len(colunas))
+    coluna = f'{nome}_{categorias[posicao]}'
+    if coluna in MODELO_VARS:
+        esperada[[MODELO_VARS[i] for i in colunas].index(coluna)] = 1.0
+    np.testing.assert_array_equal(linha[colunas], esperada)
+
+    # As demais variáveis continuam iguais às do app antigo
+    outras = [i for i in range(len(MODELO_VARS)) if i not in colunas]
+    np.testing.assert_array_equal(linha[outras], _legado(perfil)[outras])
+
+
+def test_legado_zerava_as_dummies_dos_mapas_invertidos(perfil):
+    perfil['FACULDADE'] = 'Ciencias Comunicacao'
+    coluna = MODELO_VARS.index('FACULDADE_Ciencias_Comunicacao')
+    assert _legado(perfil)[coluna] == 0.0
+    assert CODIFICADOR_FORMULARIO.codificar_linha(perfil)[0, coluna] == 1.0
+
+
+def test_lote_igual_a_uma_linha_por_vez(perfis_aleatorios):
+    X, validos = CODIFICADOR_FORMULARIO.codificar(perfis_aleatorios)
+    assert validos.all()
+    for i in range(0, len(X), 97):
+        linha = {nome: valores[i] for nome, valores in perfis_aleatorios.items()}
+        np.testing.assert_array_equal(X[i], CODIFICADOR_FORMULARIO.codificar_linha(linha)[0])
+
+
+def test_esparsa_igual_a_densa(perfis_aleatorios):
+    X, _ = CODIFICADOR_FORMULARIO.codificar(perfis_aleatorios)
+    esparsa, _ = CODIFICADOR_FORMULARIO.codificar_esparsa(perfis_aleatorios)
+    np.testing.assert_array_equal(esparsa.toarray(), X)
+
+
+def test_valor_desconhecido_invalida_so_a_linha(perfil):
+    colunas = {nome: [valor, valor] for nome, valor in perfil.items()}
+    colunas['CAMPUS'] = ['Lima Centro', 'Marte']
+    X, validos = CODIFICADOR_FORMULARIO.codificar(colunas)
+    assert validos.tolist() == [True, False]
+    assert not X[1].any()
+    with pytest.raises(ValueError):
+        CODIFICADOR_FORMULARIO.codificar_linha(dict(perfil, CAMPUS='Marte'))
+
+
+def test_arquivo_com_texto_em_coluna_numerica_invalida_so_a_linha():
+    codificador = codificador_origem(ESCALA_PADRAO)
+    linha = {
+        'PGTO_ANUIDADE_2022': 1, 'DEFICIENCIA': 'No', 'NUMERO_DISCIPLINAS_MATRICULADAS': 6,
+        'CURSO_EM_RISCO': 0, 'MATRICULA': 'Nuevo', 'GENERO': 'F', 'DEPARTAMENTO': 'LIMA',
+        'CLASSIFICACAO': 'Carreras Pregrado', 'CAMPUS': 'UTP Lima Centro', 'FACULDADE': 'Fac. Salud',
+        'TURNO': 'MAÑANA', 'BOLSAS_DESCONTO': 'CONVENIOS', 'FAIXA_ETARIA': '2. 19-20'
+    }
+    colunas = {nome: [valor] * 3 for nome, valor in linha.items()}
+    colunas['CURSO_EM_RISCO'] = [0, 'x', 2]
+    _, _, validos = codificador.codificar_ativos(colunas)
+    assert validos.tolist() == [True, False, True]
+
+
+@pytest.mark.parametrize('escala', [ESCALA_PADRAO,
+                                    [{'CURSO_EM_RISCO': [1.0, 4.0]}, {'NUMERO_DISCIPLINAS_MATRICULADAS': [2.0, 9.0]}]],
+                         ids=['padrao', 'outra'])
+@pytest.mark.parametrize('nome', VARIAVEIS_ESCALA)
+def test_slider_igual_ao_treino(escala, nome):
+    from sklearn.preprocessing import MinMaxScaler
+
+    esquema = compilar_esquema(MODELO_VARS, escala)
+    valores = list(VALORES_FORMULARIO[nome])
+    colunas, numeros, encontrados = codificador_formulario(esquema).codificar_variavel(nome, valores)
+    colunas_treino, numeros_treino, _ = codificador_arquivo(esquema).codificar_variavel(
+        nome, [float(VALORES_FORMULARIO[nome][valor]) for valor in valores])
+    # A escala do notebook: MinMaxScaler ajustado nos limites do treino
+    escalador = MinMaxScaler().fit(np.array(esquema['densas'][nome]).reshape(-1, 1))
+    esperados = escalador.transform(np.array(valores, dtype=float).reshape(-1, 1)).ravel()
+
+    assert encontrados.all()
+    np.testing.assert_array_equal(colunas, colunas_treino)
+    np.testing.assert_allclose(numeros, numeros_treino, rtol=0, atol=1e-15)
+    np.testing.assert_allclose(numeros, esperados, rtol=0, atol=1e-15)
+
+
+# Fora dos extremos a tabela do app antigo não seguia a escala do treino (CURSO_EM_RISCO 1 valia 0,4)
+@pytest.mark.parametrize('nome,valor,esperado,antigo', [('CURSO_EM_RISCO', 1, 0.2, 0.4),
+                                                       ('CURSO_EM_RISCO', 2, 0.4, 0.2),
+                                                       ('NUMERO_DISCIPLINAS_MATRICULADAS', 1, 1 / 6, 0.5)])
+def test_slider_na_escala_padrao(perfil, nome, valor, esperado, antigo):
+    perfil[nome] = valor
+    coluna = MODELO_VARS.index(nome)
+    assert CODIFICADOR_FORMULARIO.codificar_linha(perfil)[0, coluna] == pytest.approx(esperado, abs=1e-15)
+    assert _legado(perfil)[coluna] == pytest.approx(antigo, abs=1e-4)
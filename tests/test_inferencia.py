@@ -0,0 +1,65 @@
+"""
+Motor NumPy (ModeloLogistico) x predict/predict_proba do scikit-learn, e artefato .npz.
+"""
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from previnad import inferencia, registro
+from previnad.inferencia import ModeloLogistico
+
+
+def test_motor_igual_ao_sklearn(modelo, perfis_aleatorios):
+    params = modelo['resultados']
+    X, _ = modelo['codificadores']['formulario'].codificar(perfis_aleatorios)
+    entrada = pd.DataFrame(X, columns=params.feature_names_in_)
+    motor = ModeloLogistico.de_sklearn(params)
+
+    np.testing.assert_allclose(motor.predict_proba(X), params.predict_proba(entrada), rtol=0, atol=1e-12)
+    np.testing.assert_array_equal(motor.predict(X), params.predict(entrada))
+    assert inferencia.verificar_paridade(params, X) <= 1e-12
+
+
+def test_forma_compacta_igual_a_densa(modelo, perfis_aleatorios):
+    codificador = modelo['codificadores']['formulario']
+    ativos, densas, _ = codificador.codificar_ativos(perfis_aleatorios)
+    X = codificador.densificar(ativos, densas)
+    classes, prob = modelo['motor'].pontuar_ativos(ativos, densas, codificador.colunas_densas)
+    classes_densa, prob_densa = modelo['motor'].pontuar(X)
+    np.testing.assert_allclose(prob, prob_densa, rtol=0, atol=1e-12)
+    np.testing.assert_array_equal(classes, classes_densa)
+
+
+def test_esparsa_igual_a_densa(modelo, perfis_aleatorios):
+    codificador = modelo['codificadores']['formulario']
+    X, _ = codificador.codificar(perfis_aleatorios)
+    esparsa, _ = codificador.codificar_esparsa(perfis_aleatorios)
+    np.testing.assert_allclose(modelo['motor'].pontuar(esparsa)[1], modelo['motor'].pontuar(X)[1],
+                               rtol=0, atol=1e-12)
+
+
+def test_npz_igual_ao_pkl(modelo, perfis_aleatorios, tmp_path):
+    exportado = registro.carregar_modelo(registro.exportar_modelo(modelo, str(tmp_path)))
+    assert isinstance(exportado['resultados'], ModeloLogistico)
+    assert exportado['esquema']['hash'] == modelo['esquema']['hash']
+
+    _, prob, validos = inferencia.pontuar_colunas(modelo, modelo['codificadores']['formulario'],
+                                                  perfis_aleatorios)
+    _, prob_npz, _ = inferencia.pontuar_colunas(exportado, exportado['codificadores']['formulario'],
+                                                perfis_aleatorios)
+    assert validos.all()
+    np.testing.assert_array_equal(prob_npz, prob)
+
+
+def test_carga_nao_grava_a_copia_npz(caminho_modelo, tmp_path):
+    caminho = shutil.copy(caminho_modelo, tmp_path / 'modelo_final.pkl')
+    modelo = registro.carregar_modelo(str(caminho))
+    assert os.listdir(tmp_path) == ['modelo_final.pkl']
+
+    registro.exportar_ao_lado(registro.carregar_modelo(str(caminho), usar_npz=False), str(caminho))
+    registro._modelos.clear()
+    copia = registro.carregar_modelo(str(caminho))
+    assert isinstance(copia['resultados'], ModeloLogistico)
+    assert copia['versao'] == modelo['versao']
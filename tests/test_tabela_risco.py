@@ -0,0 +1,102 @@
+"""
+Tabela de risco x motor NumPy, num domínio reduzido (até 3 opções por variável).
+"""
+import copy
+import itertools
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from previnad import inferencia, tabela_risco
+
+
+def _reduzir(opcoes_por_variavel):
+    return {nome: dict(list(opcoes.items())[:opcoes_por_variavel])
+            for nome, opcoes in tabela_risco.DOMINIOS_FORMULARIO.items()}
+
+
+DOMINIOS = _reduzir(3)
+
+
+def _todas_as_combinacoes(dominios):
+    nomes = list(dominios)
+    grade = list(itertools.product(*[list(dominios[nome]) for nome in nomes]))
+    return {nome: np.array([linha[i] for linha in grade]) for i, nome in enumerate(nomes)}
+
+
+@pytest.fixture(scope='module')
+def colunas():
+    return _todas_as_combinacoes(DOMINIOS)
+
+
+@pytest.fixture(scope='module')
+def pontuadas(modelo, colunas):
+    "Classe, probabilidade e máscara de validade do motor para todas as combinações."
+    return inferencia.pontuar_colunas(modelo, modelo['codificadores']['formulario'], colunas)
+
+
+@pytest.fixture(scope='module')
+def tabela(modelo, tmp_path_factory):
+    caminho = tabela_risco.gerar_tabela(modelo, str(tmp_path_factory.mktemp('tabela')), dominios=DOMINIOS,
+                                        limite_bloco=500)
+    return tabela_risco.TabelaRisco(caminho)
+
+
+def test_tabela_igual_ao_motor(tabela, colunas, pontuadas):
+    classe, prob, validos = pontuadas
+    classe_tabela, prob_tabela, validos_tabela = tabela.pontuar(colunas)
+    assert validos.all() and validos_tabela.all()
+    # A tabela guarda float32
+    np.testing.assert_allclose(prob_tabela, prob, rtol=0, atol=1e-7)
+    np.testing.assert_array_equal(classe_tabela, classe)
+
+
+@pytest.mark.parametrize('eixos', [[], ['GENERO'], ['CAMPUS', 'BOLSAS_DESCONTO'], ['BOLSAS_DESCONTO', 'CAMPUS']])
+def test_media_das_marginais(tabela, colunas, pontuadas, eixos):
+    prob = pontuadas[1]
+    df = pd.DataFrame(colunas).astype(str).assign(prob=prob)
+    media = tabela.media(eixos)
+    if not eixos:
+        assert media == pytest.approx(prob.mean(), abs=1e-7)
+        return
+    esperada = df.groupby(eixos)['prob'].mean()
+    np.testing.assert_allclose(media.sort_index().to_numpy(), esperada.sort_index().to_numpy(), rtol=0, atol=1e-7)
+
+
+def test_media_com_filtro(tabela, colunas, pontuadas):
+    prob = pontuadas[1]
+    df = pd.DataFrame(colunas).astype(str).assign(prob=prob)
+    faculdade = list(DOMINIOS['FACULDADE'])[1]
+    media = tabela.media(['CAMPUS', 'TURNO'], {'FACULDADE': faculdade})
+    esperada = df[df['FACULDADE'] == faculdade].groupby(['CAMPUS', 'TURNO'])['prob'].mean()
+    np.testing.assert_allclose(media.sort_index().to_numpy(), esperada.sort_index().to_numpy(), rtol=0, atol=1e-7)
+
+
+def test_opcao_desconhecida_invalida_a_linha(tabela, colunas):
+    linhas = {nome: valores[:2] for nome, valores in colunas.items()}
+    linhas['CAMPUS'] = ['Marte', linhas['CAMPUS'][1]]
+    classe, prob, validos = tabela.pontuar(linhas)
+    assert validos.tolist() == [False, True]
+    assert np.isnan(prob[0]) and classe[0] == 0
+
+
+@pytest.mark.parametrize('deslocamento', [1e-9, -1e-9])
+def test_empate_em_float32_segue_o_logito(modelo, tmp_path, deslocamento):
+    # Intercepto ajustado para que uma combinação tenha logito ±1e-9: em float32 a probabilidade é 0,5
+    dominios = _reduzir(2)
+    colunas = _todas_as_combinacoes(dominios)
+    codificador = modelo['codificadores']['formulario']
+    ativos, densas, _ = codificador.codificar_ativos(colunas)
+    alvo = 17
+    logito = modelo['motor'].logito_ativos(ativos[alvo:alvo + 1], densas[alvo:alvo + 1], codificador.colunas_densas)
+    motor = copy.copy(modelo['motor'])
+    motor.intercept_ = modelo['motor'].intercept_ - logito + deslocamento
+    empatado = dict(modelo, motor=motor, versao='empate')
+
+    classe, _, _ = inferencia.pontuar_colunas(empatado, codificador, colunas)
+    tabela = tabela_risco.TabelaRisco(tabela_risco.gerar_tabela(empatado, str(tmp_path), dominios=dominios))
+    classe_tabela, prob_tabela, _ = tabela.pontuar(colunas)
+    assert np.float32(prob_tabela[alvo]) == 0.5
+    assert classe_tabela[alvo] == classe[alvo] == (1 if deslocamento > 0 else 0)
+    np.testing.assert_array_equal(classe_tabela, classe)